@@ -1,43 +1,109 @@
-import pyautogui
-import pyperclip
+import itertools
+import os
+import queue
 import time
 import sys
 import threading
-from typing import Optional
 import signal
 
+# 只导入轻量模块；按键后端（pyautogui 等）在第一次按键时才加载，GUI 在选择菜单项时才加载
+from auto_typer_backends import BACKENDS
+from auto_typer_checkpoint import CheckpointStore
+from auto_typer_clipboard import ClipboardWatcher, ParagraphIndex, paste_text
+from auto_typer_engine import (
+    DEFAULT_PASTE_DELAY,
+    DEFAULT_PASTE_SEGMENT_SIZE,
+    MODE_HYBRID,
+    MODE_PASTE,
+    MODE_TYPE,
+    MODES,
+    SPEED_MAP,
+    TypingEngine,
+)
+from auto_typer_metrics import TypingMetrics
+from auto_typer_pacing import DEFAULT_MAX_CPS, DEFAULT_MIN_CPS, AdaptiveRate
+from auto_typer_plan import PlanCache, has_untypeable
+from auto_typer_sources import StringSource, open_source
+
+# 续打方式：resume 参数取该值时，发现断点后询问用户是否继续
+RESUME_ASK = "ask"
+
+# 剪贴板段落选择：依次输入全部段落
+ALL_PARAGRAPHS = "all"
+# 逐段输入时段落之间的停顿（秒）
+DEFAULT_PARAGRAPH_PAUSE = 1.0
+
+
 class AutoTyper:
     """自动打字类"""
     
-    def __init__(self):
+    def __init__(self, backend=None, mode=MODE_TYPE, paste_segment_size=DEFAULT_PASTE_SEGMENT_SIZE,
+                 paste_delay=DEFAULT_PASTE_DELAY, plan_cache=None, checkpoints=True):
+        """
+        Args:
+            backend (str | KeyBackend | None): 按键后端名称或实例，默认使用 pyautogui
+            mode (str): 输入模式："type" 逐字输入，"paste" 分段粘贴，"hybrid" 长段粘贴、短段打字
+            paste_segment_size (int): 粘贴时每段的字符数
+            paste_delay (float): 每次粘贴后的等待时间（秒）
+            plan_cache (PlanCache | bool | None): 打字计划缓存，True 表示使用默认目录，
+                同一段文本再次输入时直接重放缓存的计划
+            checkpoints (CheckpointStore | bool | None): 断点状态目录，True 表示使用默认目录，
+                False / None 表示不记录断点
+        """
         self.is_typing = False
         self.stop_flag = threading.Event()
+        self.engine = TypingEngine(backend, mode=mode, paste_segment_size=paste_segment_size,
+                                   paste_delay=paste_delay)
+        self.plan_cache = PlanCache() if plan_cache is True else plan_cache or None
+        self.checkpoints = CheckpointStore() if checkpoints is True else checkpoints or None
+        self._progress_mark = 0
+        self._progress_step = 50
+        self._progress_unit = "字符"
+        self._metrics_callback = None
+        self._metrics_json_path = None
+        self._metrics_prometheus_path = None
+        # 回读校验器（auto_typer_verify.ReadBackVerifier），None 表示不校验
+        self.verifier = None
         
-    def auto_type_from_clipboard(self, delay=0.05, countdown=3):
+    def auto_type_from_clipboard(self, delay=0.05, countdown=3, resume=False, paragraph=0,
+                                 pause=DEFAULT_PARAGRAPH_PAUSE):
         """
         从剪贴板获取文本并自动打字
         
         Args:
             delay (float): 每个字符之间的延迟时间（秒）
             countdown (int): 开始前的倒计时秒数
+            resume (bool | str): 有断点时是否从断点继续，RESUME_ASK 表示询问用户（只输入一段时有效）
+            paragraph (int | tuple | str): 要输入的段落（以空行分隔）：段落序号（从0开始），
+                (起始序号, 结束序号) 范围（不含结束序号），或 ALL_PARAGRAPHS 表示全部段落
+            pause (float): 输入多个段落时段落之间的停顿（秒）
         """
         try:
             # 获取剪贴板内容
-            clipboard_content = pyperclip.paste()
+            clipboard_content = paste_text()
             
             if not clipboard_content:
                 print("❌ 剪贴板为空！")
                 return False
             
-            # 分割文本，获取第一段（以双换行符分割）
-            paragraphs = clipboard_content.split('\n\n')
-            text_to_type = paragraphs[0].strip()
+            # 段落索引只记录位置，取哪一段就只扫描到哪一段
+            index = ParagraphIndex(clipboard_content)
+            if paragraph == ALL_PARAGRAPHS:
+                return self._type_paragraphs(index, 0, None, delay, countdown, pause)
+            if isinstance(paragraph, tuple):
+                return self._type_paragraphs(index, paragraph[0], paragraph[1], delay, countdown, pause)
+            
+            try:
+                text_to_type = index[paragraph]
+            except IndexError:
+                print(f"❌ 剪贴板中没有第 {paragraph + 1} 段！")
+                return False
             
             if not text_to_type:
-                print("❌ 第一段为空！")
+                print(f"❌ 第 {paragraph + 1} 段为空！")
                 return False
             
-            return self._type_text(text_to_type, delay, countdown)
+            return self._type_text(text_to_type, delay, countdown, resume)
             
         except KeyboardInterrupt:
             print("\n\n⏹️ 用户中断操作！")
@@ -46,7 +112,7 @@ class AutoTyper:
             print(f"❌ 发生错误: {e}")
             return False
     
-    def auto_type_text(self, text, delay=0.05, countdown=3):
+    def auto_type_text(self, text, delay=0.05, countdown=3, resume=False):
         """
         直接输入指定文本
         
@@ -54,53 +120,372 @@ class AutoTyper:
             text (str): 要输入的文本
             delay (float): 每个字符之间的延迟时间（秒）
             countdown (int): 开始前的倒计时秒数
+            resume (bool | str): 有断点时是否从断点继续，RESUME_ASK 表示询问用户
         """
         if not text.strip():
             print("❌ 文本为空！")
             return False
             
-        return self._type_text(text.strip(), delay, countdown)
+        return self._type_text(text.strip(), delay, countdown, resume)
+    
+    def auto_type_source(self, source, delay=0.05, countdown=3, resume=False):
+        """
+        从文件、标准输入或生成器边读边输入，不会把全部内容读入内存
+        
+        Args:
+            source: 文件路径、"-"（标准输入）、文件对象、产生字符串的可迭代对象或 TextSource
+            delay (float): 每个字符之间的延迟时间（秒）
+            countdown (int): 开始前的倒计时秒数
+            resume (bool | str): 有断点时是否从断点继续（标准输入和生成器不支持），RESUME_ASK 表示询问用户
+        """
+        try:
+            text_source = open_source(source)
+        except OSError as e:
+            print(f"❌ 无法打开文本来源: {e}")
+            return False
+        
+        with text_source:
+            return self._type_source(text_source, delay, countdown, resume)
+    
+    def auto_type_file(self, path, delay=0.05, countdown=3, encoding="utf-8", resume=False):
+        """
+        从文件输入文本（内存映射按块读取）
+        
+        Args:
+            path (str): 文件路径
+            delay (float): 每个字符之间的延迟时间（秒）
+            countdown (int): 开始前的倒计时秒数
+            encoding (str): 文件编码
+            resume (bool | str): 有断点时是否从断点继续，RESUME_ASK 表示询问用户
+        """
+        try:
+            text_source = open_source(path, encoding=encoding)
+        except OSError as e:
+            print(f"❌ 无法打开文件: {e}")
+            return False
+        
+        if text_source.total == 0:
+            print("❌ 文件为空！")
+            return False
+        
+        with text_source:
+            return self._type_source(text_source, delay, countdown, resume)
+    
+    def auto_type_diff(self, text, delay=0.05, countdown=3, target="default", navigation="lines"):
+        """
+        增量输入：与上次输入到同一目标的文本比较，只输入改动的部分
+        
+        光标需要停在上次输入的文本末尾（上次输入完成后没有移动过光标）；第一次输入某个目标时完整输入。
+        
+        Args:
+            text (str): 新文本
+            delay (float): 每个字符之间的延迟时间（秒）
+            countdown (int): 开始前的倒计时秒数
+            target (str): 目标名称，不同的文档 / 窗口分别记录上次输入的文本
+            navigation (str): 光标移动方式："lines" 上下方向键 + Home / End，"chars" 只用左右方向键
+                （目标会自动换行显示长行时使用）
+        
+        Returns:
+            bool: 是否成功完成
+        """
+        from auto_typer_diff import TypedTextStore, compile_diff_plan
+        
+        text = text.strip()
+        if not text:
+            print("❌ 文本为空！")
+            return False
+        
+        store = TypedTextStore()
+        previous = store.get(target)
+        if previous == text:
+            print(f"✅ 文本与上次输入到 {target} 的相同，无需输入")
+            return True
+        # 增量编辑要求目标关闭自动缩进等功能，不使用编辑器精简
+        options = dict(self.engine.plan_options(), editor=None)
+        try:
+            plan, edits = compile_diff_plan(previous or "", text, delay, navigation, **options)
+        except ValueError as e:
+            print(f"❌ {e}")
+            return False
+        if previous is None:
+            print(f"📝 目标 {target} 没有上次输入的记录，完整输入 {len(text)} 字符")
+        elif edits is None:
+            print(f"🔁 改动较多，删除上次输入的 {len(previous)} 字符后完整重打（{plan.keystrokes()} 次按键）")
+        else:
+            print(f"🔀 增量输入: {edits} 处改动，共 {plan.keystrokes()} 次按键"
+                  f"（完整重打需要 {len(previous) + len(text)} 次）")
+        
+        completed = False
+        try:
+            self._reset_progress(len(text), "字符")
+            if not self._countdown(countdown):
+                return False
+            # 输入过程中目标里的文本处于中间状态，先删除记录，完成后再写入新文本
+            store.forget(target)
+            completed = self.engine.run_plan(plan, self.stop_flag, on_progress=self._print_progress)
+            if not completed:
+                print("\n⏹️ 打字被中断！下次将按全新目标完整输入")
+                return False
+            
+            print("\n\n✅ 打字完成！")
+            print(self.engine.last_stats.format_report())
+            if self.verifier is not None:
+                # 校验后仍不一致时目标状态与记录不符，不写入记录
+                completed = self._verify(text, delay)
+            return completed
+            
+        except KeyboardInterrupt:
+            print("\n\n⏹️ 用户中断打字！下次将按全新目标完整输入")
+            return False
+        except Exception as e:
+            print(f"\n❌ 打字过程中发生错误: {e}")
+            return False
+        finally:
+            if completed:
+                store.put(target, text)
+            self.is_typing = False
+            self._report_metrics()
     
-    def _type_text(self, text, delay, countdown):
+    def dry_run(self, source, delay=0.05):
+        """
+        试运行：按校准过的后端耗时模型模拟输入，不发送任何按键，打印预计用时、按键次数和最慢的几行
+        
+        Args:
+            source: 文件路径、"-"（标准输入）、文件对象、产生字符串的可迭代对象或 TextSource
+            delay (float): 每个字符之间的延迟时间（秒）
+        
+        Returns:
+            DryRunReport | None: 试运行结果，无法打开来源时返回 None
+        """
+        from auto_typer_dryrun import dry_run
+        
+        try:
+            text_source = open_source(source)
+        except OSError as e:
+            print(f"❌ 无法打开文本来源: {e}")
+            return None
+        
+        with text_source:
+            print(f"📝 试运行{text_source.describe()}，输入模式: {MODES[self.engine.mode]}，延迟: {delay}秒/字符")
+            report = dry_run(self.engine, text_source, delay)
+        print(report.format_report())
+        return report
+    
+    def calibrate(self, countdown=3):
+        """
+        校准当前后端的耗时模型：在光标位置真实输入约200个字符并测量，结果按机器保存供试运行和预计用时使用
+        
+        Args:
+            countdown (int): 开始前的倒计时秒数
+        
+        Returns:
+            BackendCosts | None: 校准结果，被中断时返回 None
+        """
+        from auto_typer_dryrun import CalibrationStore, calibrate
+        
+        print(f"🔧 校准 {self.engine.backend_name} 后端：将在光标位置输入约200个字符，请先打开一个可以随意输入的空白文档")
+        try:
+            if not self._countdown(countdown):
+                return None
+            costs = calibrate(self.engine.backend)
+        except KeyboardInterrupt:
+            print("\n\n⏹️ 校准被中断！")
+            return None
+        finally:
+            self.is_typing = False
+        
+        CalibrationStore().save(costs)
+        print(f"\n✅ 校准完成: 每次调用 {costs.per_call * 1000:.3f}毫秒，每字符 {costs.per_char * 1000:.3f}毫秒，"
+              f"每次粘贴 {costs.paste_call * 1000:.1f}毫秒")
+        return costs
+    
+    def watch_clipboard(self, delay=0.05, countdown=3, watcher=None, stop_event=None):
+        """
+        监视剪贴板：每复制一段新文本就自动排队输入，直到按 Ctrl+C 或 stop_event 被设置
+        
+        监视在后台线程中进行，输入期间复制的内容也会排队，按复制顺序依次输入。
+        
+        Args:
+            delay (float): 每个字符之间的延迟时间（秒）
+            countdown (int): 每段开始前的倒计时秒数
+            watcher (ClipboardWatcher): 自定义轮询间隔、去重等设置的监视器
+            stop_event (threading.Event): 被设置时停止监视
+        
+        Returns:
+            int: 成功输入的条数
+        """
+        watcher = watcher or ClipboardWatcher()
+        stop_event = stop_event or threading.Event()
+        entries = queue.Queue()
+        # 开始监视前已在剪贴板里的内容不输入
+        watcher.prime()
+        thread = threading.Thread(target=watcher.watch, args=(entries.put, stop_event), daemon=True)
+        thread.start()
+        
+        print("👀 正在监视剪贴板：复制文本后将自动输入，按 Ctrl+C 退出")
+        typed = 0
+        try:
+            while not stop_event.is_set():
+                try:
+                    text = entries.get(timeout=0.5)
+                except queue.Empty:
+                    continue
+                waiting = entries.qsize()
+                print(f"\n📥 检测到新复制的内容（{len(text)} 字符）" + (f"，队列中还有 {waiting} 条" if waiting else ""))
+                if self._type_text(text.strip(), delay, countdown):
+                    typed += 1
+                    print("\n👀 继续监视剪贴板...")
+        except KeyboardInterrupt:
+            print("\n\n⏹️ 已停止监视剪贴板")
+        finally:
+            stop_event.set()
+            thread.join()
+        print(f"📊 共输入 {typed} 条剪贴板内容")
+        return typed
+    
+    def _type_text(self, text, delay, countdown, resume=False):
         """
         内部打字方法
         """
+        return self._type_source(StringSource(text), delay, countdown, resume)
+    
+    def _resume_point(self, source, resume):
+        """
+        查找断点并决定从哪里开始
+        
+        Returns:
+            tuple: (跳过的字符数, Checkpoint 或 None)
+        """
+        if self.checkpoints is None:
+            return 0, None
+        key, state = self.checkpoints.find(source)
+        skip = 0
+        if state is not None and resume:
+            done = state["chars"]
+            progress = f"{done}/{state['total']}" if state.get("total") else str(done)
+            if resume == RESUME_ASK:
+                answer = input(f"♻️ 这段文本上次输入到第 {done} 个字符（{progress}），是否从断点继续？(Y/n): ")
+                resume = answer.strip().lower() in ("", "y", "yes", "是")
+            if resume:
+                skip = done
+                print(f"⏩ 从第 {skip + 1} 个字符继续，跳过已输入的 {progress} 字符")
+        return skip, self.checkpoints.open(source, key)
+    
+    def _type_source(self, source, delay, countdown, resume=False):
+        """
+        从文本来源打字
+        """
+        checkpoint = None
         try:
-            print(f"📝 准备输入文本 ({len(text)} 字符): {text[:50]}{'...' if len(text) > 50 else ''}")
-            print(f"⏰ {countdown}秒后开始自动打字，请将光标放在目标位置...")
-            print("💡 按 Ctrl+C 可随时中断")
+            preview = source.preview(51)
+            if preview:
+                print(f"📝 准备输入{source.describe()}: {preview[:50]}{'...' if len(preview) > 50 else ''}")
+            else:
+                print(f"📝 准备输入{source.describe()}")
+            if self.engine.mode != MODE_TYPE:
+                print(f"📋 输入模式: {MODES[self.engine.mode]}（每段 {self.engine.paste_segment_size} 字符）")
+            elif (isinstance(source, StringSource) and not self.engine.supports_unicode
+                    and has_untypeable(source.text)):
+                print("🈶 文本包含中文等无法直接按键输入的字符，这些部分将通过剪贴板粘贴")
+            skip, checkpoint = self._resume_point(source, resume)
+            self._reset_progress(source.total, source.unit)
+            if not self._countdown(countdown):
+                return False
             
-            # 重置停止标志
-            self.stop_flag.clear()
-            self.is_typing = True
+            # 按批次输入
+            if isinstance(source, StringSource) and self.plan_cache is not None and not skip:
+                plan, hit = self.plan_cache.load_or_compile(source.text, delay, **self.engine.plan_options())
+                if hit:
+                    print("♻️ 使用缓存的打字计划")
+                completed = self.engine.run_plan(plan, self.stop_flag, on_progress=self._print_progress,
+                                                 checkpoint=checkpoint)
+            else:
+                completed = self.engine.type_source(source, delay, self.stop_flag, on_progress=self._print_progress,
+                                                    skip=skip, checkpoint=checkpoint)
+            if not completed:
+                print("\n⏹️ 打字被中断！")
+                self._report_checkpoint(checkpoint)
+                return False
             
-            # 倒计时
-            for i in range(countdown, 0, -1):
-                if self.stop_flag.is_set():
-                    return False
-                print(f"⏳ {i}...")
-                time.sleep(1)
+            print("\n\n✅ 打字完成！")
+            print(self.engine.last_stats.format_report())
+            if self.verifier is not None:
+                return self._verify_source(source, delay)
+            return True
             
-            if self.stop_flag.is_set():
+        except KeyboardInterrupt:
+            print("\n\n⏹️ 用户中断打字！")
+            self._report_checkpoint(checkpoint)
+            return False
+        except Exception as e:
+            print(f"\n❌ 打字过程中发生错误: {e}")
+            self._report_checkpoint(checkpoint)
+            return False
+        finally:
+            self.is_typing = False
+            self._report_metrics()
+    
+    def _verify_source(self, source, delay):
+        """读回完整文本来源后做回读校验"""
+        if isinstance(source, StringSource):
+            text = source.text
+        else:
+            again = source.reopen()
+            if again is None:
+                print("⚠️ 标准输入、生成器等来源无法再次读取，跳过回读校验")
+                return True
+            with again:
+                text = "".join(chunk for chunk, _ in again.chunks())
+        return self._verify(text, delay)
+    
+    def _verify(self, text, delay):
+        """
+        回读目标内容并定点修复出错区域
+        
+        Returns:
+            bool: 目标内容与文本一致（或无法读回、未能校验）时返回 True
+        """
+        print("🔍 回读校验目标中的内容...")
+        report = self.verifier.verify(self.engine, text, delay, self.stop_flag)
+        print(report.format_report())
+        return report.clean or not report.readable
+    
+    def _type_paragraphs(self, index, start, stop, delay, countdown, pause):
+        """
+        依次输入剪贴板中 [start, stop) 范围内的段落（跳过空段落），段落之间输入空行并停顿 pause 秒
+        """
+        try:
+            count = len(index)
+            stop = count if stop is None else min(stop, count)
+            selected = index.paragraphs(start, stop)
+            first = next(selected, None)
+            if first is None:
+                print(f"❌ 剪贴板第 {start + 1}-{stop} 段没有可输入的内容！")
                 return False
-                
-            print("🚀 开始打字！")
             
-            # 逐字符输入
-            for i, char in enumerate(text):
-                if self.stop_flag.is_set():
-                    print("\n⏹️ 打字被中断！")
-                    return False
-                    
-                pyautogui.write(char)
-                time.sleep(delay)
-                
-                # 每50个字符显示进度
-                if (i + 1) % 50 == 0:
-                    progress = (i + 1) / len(text) * 100
-                    print(f"\r📊 进度: {progress:.1f}% ({i + 1}/{len(text)})", end='', flush=True)
+            # 进度按剪贴板中的原始位置计算
+            origin = index.span(first[0])[0]
+            total = index.span(stop - 1)[1] - origin
+            print(f"📝 准备依次输入剪贴板第 {first[0] + 1}-{stop} 段（共 {count} 段），段落之间停顿 {pause} 秒")
+            self._reset_progress(total, "字符")
+            if not self._countdown(countdown):
+                return False
+            
+            def segments():
+                previous_end = origin
+                for number, paragraph in itertools.chain([first], selected):
+                    paragraph_end = index.span(number)[1]
+                    text = paragraph if previous_end == origin else index.separator + paragraph
+                    yield text, previous_end - origin, (paragraph_end - previous_end) / len(text)
+                    previous_end = paragraph_end
+            
+            if not self.engine.type_segments(segments(), delay, pause, self.stop_flag,
+                                             on_progress=self._print_progress, total=total):
+                print("\n⏹️ 打字被中断！")
+                return False
             
             print("\n\n✅ 打字完成！")
+            print(self.engine.last_stats.format_report())
             return True
             
         except KeyboardInterrupt:
@@ -111,6 +496,200 @@ class AutoTyper:
             return False
         finally:
             self.is_typing = False
+            self._report_metrics()
+    
+    def _reset_progress(self, total, unit):
+        """为新的一次打字重置进度显示"""
+        self._progress_mark = 0
+        self._progress_step = 50 if total is None else max(50, total // 1000)
+        self._progress_unit = unit
+    
+    def _countdown(self, countdown):
+        """
+        重置停止标志并倒计时
+        
+        Returns:
+            bool: 倒计时结束返回 True，期间被停止返回 False
+        """
+        print(f"⏰ {countdown}秒后开始自动打字，请将光标放在目标位置...")
+        print("💡 按 Ctrl+C 可随时中断")
+        
+        # 重置停止标志
+        self.stop_flag.clear()
+        self.is_typing = True
+        
+        for i in range(countdown, 0, -1):
+            if self.stop_flag.is_set():
+                return False
+            print(f"⏳ {i}...")
+            time.sleep(1)
+        
+        if self.stop_flag.is_set():
+            return False
+        
+        print("🚀 开始打字！")
+        return True
+    
+    def _report_checkpoint(self, checkpoint):
+        """打字未完成时提示断点位置"""
+        if checkpoint is not None and checkpoint.chars > 0:
+            print(f"💾 已保存断点: 已输入 {checkpoint.chars} 字符，再次输入同一内容时可从断点继续")
+    
+    def _print_progress(self, done, total):
+        """每50个字符（大文件约每0.1%）显示一次进度"""
+        if done // self._progress_step != self._progress_mark // self._progress_step:
+            if total:
+                progress = done / total * 100
+                print(f"\r📊 进度: {progress:.1f}% ({done}/{total})", end='', flush=True)
+            else:
+                print(f"\r📊 进度: 已输入 {done} {self._progress_unit}", end='', flush=True)
+        self._progress_mark = done
+    
+    def enable_metrics(self, callback=None, json_path=None, prometheus_path=None):
+        """
+        启用性能指标：记录后端调用耗时、休眠超时和暂停时长
+        
+        Args:
+            callback (callable): 每次打字结束后调用 callback(metrics)
+            json_path (str): 每次打字结束后把指标写入该 JSON 文件
+            prometheus_path (str): 每次打字结束后把指标写入该 Prometheus 文本格式文件
+        
+        Returns:
+            TypingMetrics: 指标对象（多次打字累计）
+        """
+        if self.engine.metrics is None:
+            self.engine.metrics = TypingMetrics()
+        self._metrics_callback = callback
+        self._metrics_json_path = json_path
+        self._metrics_prometheus_path = prometheus_path
+        return self.engine.metrics
+    
+    def enable_adaptive_speed(self, min_cps=DEFAULT_MIN_CPS, max_cps=DEFAULT_MAX_CPS):
+        """
+        启用自适应速度：系统跟得上时逐步提速，后端变慢时自动减速，delay 参数只作为起始速度
+        
+        Args:
+            min_cps (float): 最低速度（字符/秒）
+            max_cps (float): 最高速度（字符/秒）
+        
+        Returns:
+            AdaptiveRate: 速度控制器
+        """
+        self.engine.timing = None
+        self.engine.rate_control = AdaptiveRate(min_cps, max_cps)
+        return self.engine.rate_control
+    
+    def disable_adaptive_speed(self):
+        """停用自适应速度，恢复固定速度"""
+        self.engine.rate_control = None
+    
+    def enable_human_timing(self, seed=None, **options):
+        """
+        启用拟人节奏：字符间隔随机波动，常见字母组合更快，标点和换行后停顿，delay 参数作为平均间隔
+        
+        Args:
+            seed (int): 随机种子，指定后每次打字的节奏相同
+            **options: 传给 TimingModel 的其他参数（如 jitter、sentence_pause）
+        
+        Returns:
+            TimingModel: 节奏模型
+        """
+        from auto_typer_timing import TimingModel
+        
+        self.engine.rate_control = None
+        self.engine.timing = TimingModel(seed=seed, **options)
+        return self.engine.timing
+    
+    def disable_human_timing(self):
+        """停用拟人节奏，恢复均匀间隔"""
+        self.engine.timing = None
+    
+    def set_editor(self, name):
+        """
+        设置目标编辑器：编译打字计划时省去编辑器会自动输入的缩进、右括号等按键
+        
+        Args:
+            name (str | None): 编辑器配置名称（plain / autoindent / vscode / vscode-python），None 表示逐字输入原文
+        
+        Raises:
+            ValueError: 未知的配置名称
+        """
+        if name is not None:
+            from auto_typer_editor import get_profile
+            get_profile(name)
+        self.engine.editor = name
+    
+    def enable_verification(self, rounds=None, log=True, **options):
+        """
+        启用回读校验：打字完成后全选复制读回目标内容，只重新输入出错的区域，并按速度记录出错率
+        
+        目标中只能有本次输入的文本（例如新建的空白文档）。
+        
+        Args:
+            rounds (int): 最多修复的轮数，默认2轮，0 表示只校验不修复
+            log (VerificationLog | bool): 出错率记录，True 表示使用默认文件，False 表示不记录
+            **options: 传给 ReadBackVerifier 的其他参数（如 repair_delay、navigation）
+        
+        Returns:
+            ReadBackVerifier: 校验器
+        """
+        from auto_typer_verify import DEFAULT_REPAIR_ROUNDS, ReadBackVerifier, VerificationLog
+        
+        if log is True:
+            log = VerificationLog()
+        rounds = DEFAULT_REPAIR_ROUNDS if rounds is None else rounds
+        self.verifier = ReadBackVerifier(rounds, log=log or None, **options)
+        return self.verifier
+    
+    def disable_verification(self):
+        """停用回读校验"""
+        self.verifier = None
+    
+    def enable_trace(self, path):
+        """
+        启用按键轨迹记录：每次打字发给后端的调用都连同时间戳追加写入二进制轨迹文件
+        
+        用 python auto_typer_trace.py summary / replay 查看汇总或重放。
+        
+        Args:
+            path (str): 轨迹文件路径，已存在时在末尾追加
+        
+        Returns:
+            TraceWriter: 轨迹写入器
+        """
+        from auto_typer_trace import TraceWriter
+        
+        self.disable_trace()
+        self.engine.trace = TraceWriter(path)
+        return self.engine.trace
+    
+    def disable_trace(self):
+        """停用按键轨迹记录并关闭轨迹文件"""
+        if self.engine.trace is not None:
+            self.engine.trace.close()
+            self.engine.trace = None
+    
+    def disable_metrics(self):
+        """停用性能指标"""
+        self.engine.metrics = None
+        self._metrics_callback = None
+        self._metrics_json_path = None
+        self._metrics_prometheus_path = None
+    
+    def _report_metrics(self):
+        """打字结束后回调并导出性能指标"""
+        metrics = self.engine.metrics
+        if metrics is None:
+            return
+        try:
+            if self._metrics_callback is not None:
+                self._metrics_callback(metrics)
+            if self._metrics_json_path:
+                metrics.dump_json(self._metrics_json_path)
+            if self._metrics_prometheus_path:
+                metrics.dump_prometheus(self._metrics_prometheus_path)
+        except Exception as e:
+            print(f"\n⚠️ 导出性能指标失败: {e}")
     
     def stop_typing(self):
         """停止打字"""
@@ -118,51 +697,60 @@ class AutoTyper:
         self.is_typing = False
 
 # 保持向后兼容的函数
-def auto_type_from_clipboard(delay=0.05):
+def auto_type_from_clipboard(delay=0.05, resume=False):
     """向后兼容的函数"""
     typer = AutoTyper()
-    return typer.auto_type_from_clipboard(delay)
+    return typer.auto_type_from_clipboard(delay, resume=resume)
 
 def auto_type_with_speed_control():
     """
     带速度控制的自动打字（改进版）
     """
     try:
-        clipboard_content = pyperclip.paste()
+        clipboard_content = paste_text()
         
         if not clipboard_content:
             print("❌ 剪贴板为空！")
             return False
         
-        # 获取第一段
-        paragraphs = clipboard_content.split('\n\n')
-        text_to_type = paragraphs[0].strip()
-        
-        if not text_to_type:
-            print("❌ 第一段为空！")
-            return False
+        # 选择段落：索引只记录段落位置，不会切分整个剪贴板
+        index = ParagraphIndex(clipboard_content)
+        count = len(index)
+        start, stop = 0, 1
+        if count > 1:
+            print(f"\n📑 剪贴板共有 {count} 段（以空行分隔）")
+            while True:
+                answer = input("请选择要输入的段落（如 1、2-4 或 all，默认1）: ").strip().lower() or "1"
+                selection = _parse_paragraph_selection(answer, count)
+                if selection:
+                    start, stop = selection
+                    break
+                print("❌ 无效选择，请重新输入！")
         
-        print(f"📝 文本长度: {len(text_to_type)} 字符")
-        print(f"📄 预览: {text_to_type[:100]}{'...' if len(text_to_type) > 100 else ''}")
+        if stop - start == 1:
+            text_to_type = index[start]
+            if not text_to_type:
+                print(f"❌ 第 {start + 1} 段为空！")
+                return False
+            print(f"📝 文本长度: {len(text_to_type)} 字符")
+            print(f"📄 预览: {text_to_type[:100]}{'...' if len(text_to_type) > 100 else ''}")
+        else:
+            text_to_type = None
+            print(f"📝 将依次输入第 {start + 1}-{stop} 段，段落之间停顿 {DEFAULT_PARAGRAPH_PAUSE} 秒")
         print("\n⚡ 选择打字速度:")
         print("1. 🐌 慢速 (0.1秒/字符) - 适合演示")
         print("2. 🚶 中速 (0.05秒/字符) - 推荐")
         print("3. 🏃 快速 (0.02秒/字符) - 高效")
         print("4. 🚀 极速 (0.01秒/字符) - 最快")
         print("5. 🎯 自定义速度")
+        print(f"6. 🤖 自适应速度 ({DEFAULT_MIN_CPS:.0f}-{DEFAULT_MAX_CPS:.0f}字符/秒) - 自动找到目标程序能跟上的最快速度")
         
+        adaptive = False
         while True:
-            choice = input("\n请选择 (1-5): ").strip()
-            
-            speed_map = {
-                '1': (0.1, "慢速"),
-                '2': (0.05, "中速"),
-                '3': (0.02, "快速"),
-                '4': (0.01, "极速")
-            }
+            choice = input("\n请选择 (1-6): ").strip()
             
-            if choice in speed_map:
-                delay, speed_name = speed_map[choice]
+            if choice in SPEED_MAP:
+                delay, speed_name = SPEED_MAP[choice]
                 break
             elif choice == '5':
                 try:
@@ -175,9 +763,28 @@ def auto_type_with_speed_control():
                 except ValueError:
                     print("❌ 请输入有效的数字！")
                     continue
+            elif choice == '6':
+                # 从最低速度起步，逐步提速
+                delay = 1 / DEFAULT_MIN_CPS
+                speed_name = "自适应"
+                adaptive = True
+                break
             else:
                 print("❌ 无效选择，请重新输入！")
         
+        # 询问输入模式
+        print("\n📋 选择输入模式:")
+        print("1. ⌨️  逐字输入 - 模拟真实打字")
+        print("2. 📋 粘贴输入 - 分段粘贴，适合大段文本")
+        print("3. 🧠 智能混合 - 长段粘贴，短段打字")
+        mode_map = {'1': MODE_TYPE, '2': MODE_PASTE, '3': MODE_HYBRID}
+        while True:
+            mode_choice = input("\n请选择 (1-3，默认1): ").strip() or '1'
+            if mode_choice in mode_map:
+                mode = mode_map[mode_choice]
+                break
+            print("❌ 无效选择，请重新输入！")
+        
         # 询问倒计时时间
         while True:
             try:
@@ -190,17 +797,28 @@ def auto_type_with_speed_control():
                 print("❌ 请输入有效的数字！")
         
         # 创建AutoTyper实例并开始打字
-        typer = AutoTyper()
+        typer = AutoTyper(mode=mode, plan_cache=True)
+        if adaptive:
+            typer.enable_adaptive_speed()
         
         print(f"\n🎯 设置完成:")
-        print(f"   速度: {speed_name} ({delay}秒/字符)")
+        if adaptive:
+            print(f"   速度: {speed_name} ({DEFAULT_MIN_CPS:.0f}-{DEFAULT_MAX_CPS:.0f}字符/秒)")
+        else:
+            print(f"   速度: {speed_name} ({delay}秒/字符)")
+        print(f"   输入模式: {MODES[mode]}")
         print(f"   倒计时: {countdown}秒")
+        if text_to_type is None:
+            print(f"   段落: 第 {start + 1}-{stop} 段")
+            return typer._type_paragraphs(index, start, stop, delay, countdown, DEFAULT_PARAGRAPH_PAUSE)
         print(f"   文本长度: {len(text_to_type)}字符")
         
-        estimated_time = len(text_to_type) * delay
-        print(f"   预计用时: {estimated_time:.1f}秒")
+        # 按后端耗时模型模拟整份计划（含粘贴段和后端开销），不发送按键
+        from auto_typer_dryrun import dry_run, format_duration
+        report = dry_run(typer.engine, StringSource(text_to_type), delay)
+        print(f"   预计用时: {'最多 ' if adaptive else ''}{format_duration(report.duration)}（{report.keystrokes} 次按键）")
         
-        return typer.auto_type_text(text_to_type, delay, countdown)
+        return typer.auto_type_text(text_to_type, delay, countdown, resume=RESUME_ASK)
         
     except KeyboardInterrupt:
         print("\n\n⏹️ 用户取消操作！")
@@ -209,6 +827,25 @@ def auto_type_with_speed_control():
         print(f"❌ 发生错误: {e}")
         return False
 
+def _parse_paragraph_selection(answer, count):
+    """
+    解析段落选择："3"、"2-4" 或 "all"（序号从1开始）
+    
+    Returns:
+        tuple | None: (起始序号, 结束序号)，从0开始、不含结束序号；无效时返回 None
+    """
+    if answer in ("all", "a", "全部"):
+        return 0, count
+    first, _, last = answer.partition("-")
+    try:
+        first = int(first)
+        last = int(last) if last else first
+    except ValueError:
+        return None
+    if not 1 <= first <= last <= count:
+        return None
+    return first - 1, last
+
 def interactive_text_input():
     """
     交互式文本输入模式
@@ -241,10 +878,162 @@ def interactive_text_input():
     
     return text
 
+def run_from_args(argv):
+    """
+    命令行参数模式：直接从文件或标准输入打字、执行批量任务清单或监视剪贴板，不显示菜单
+    
+    示例:
+        python auto_typer.py notes.txt --delay 0.02
+        cat build.log | python auto_typer.py - --mode hybrid
+        python auto_typer.py --batch jobs.toml --summary results.json
+        python auto_typer.py --watch --delay 0.02 --countdown 1
+        python auto_typer.py notes.txt --dry-run --backend xtest
+        python auto_typer.py notes.txt --diff --target report
+    
+    Returns:
+        bool: 是否成功完成
+    """
+    import argparse
+    
+    parser = argparse.ArgumentParser(description="智能自动打字助手")
+    parser.add_argument("source", nargs="?", help="要输入的文件路径，'-' 表示从标准输入读取")
+    parser.add_argument("--delay", type=float, default=0.05, help="每个字符之间的延迟时间（秒），默认0.05")
+    parser.add_argument("--countdown", type=int, default=3, help="开始前的倒计时秒数，默认3")
+    parser.add_argument("--mode", choices=list(MODES), default=MODE_TYPE, help="输入模式，默认 type")
+    parser.add_argument("--backend", choices=list(BACKENDS), default=None,
+                        help="按键后端，默认 pyautogui（Linux 上可用 xtest 获得更高速度）")
+    parser.add_argument("--metrics-json", metavar="PATH", help="结束后把性能指标写入 JSON 文件")
+    parser.add_argument("--metrics-prom", metavar="PATH", help="结束后把性能指标写入 Prometheus 文本格式文件")
+    parser.add_argument("--adaptive", action="store_true",
+                        help="自适应速度：以 --min-cps 起步，系统跟得上时提速，变慢时减速")
+    parser.add_argument("--min-cps", type=float, default=DEFAULT_MIN_CPS,
+                        help=f"自适应速度的下限（字符/秒），默认{DEFAULT_MIN_CPS:.0f}")
+    parser.add_argument("--max-cps", type=float, default=DEFAULT_MAX_CPS,
+                        help=f"自适应速度的上限（字符/秒），默认{DEFAULT_MAX_CPS:.0f}")
+    parser.add_argument("--human", action="store_true",
+                        help="拟人节奏：以 --delay 为平均间隔随机波动，标点和换行后停顿")
+    parser.add_argument("--seed", type=int, default=None, help="拟人节奏的随机种子，指定后节奏可复现")
+    parser.add_argument("--watch", action="store_true", help="监视剪贴板，每复制一段新文本就自动输入")
+    parser.add_argument("--dry-run", action="store_true",
+                        help="试运行：不发送按键，按后端耗时模型报告预计用时、按键次数和最慢的几行")
+    parser.add_argument("--calibrate", action="store_true",
+                        help="在光标位置输入一小段样本文本，校准当前后端的耗时模型（每台机器做一次即可）")
+    parser.add_argument("--diff", action="store_true",
+                        help="增量输入：与上次输入到同一目标的文本比较，只输入改动的部分（光标需停在上次输入的末尾）")
+    parser.add_argument("--target", default="default", help="增量输入的目标名称，不同文档分别记录，默认 default")
+    parser.add_argument("--navigation", choices=["lines", "chars"], default="lines",
+                        help="增量输入的光标移动方式：lines 上下方向键 + Home/End（默认），chars 只用左右方向键（目标自动换行时）")
+    parser.add_argument("--editor", choices=["plain", "autoindent", "vscode", "vscode-python"], default=None,
+                        help="目标编辑器：省去编辑器自动输入的缩进和右括号，并合并重复字符")
+    parser.add_argument("--verify", action="store_true",
+                        help="回读校验：完成后全选复制读回目标内容，只重新输入出错的区域（目标中只能有本次输入的文本）")
+    parser.add_argument("--verify-rounds", type=int, default=2, help="回读校验最多修复的轮数，默认2，0 表示只校验")
+    parser.add_argument("--verify-stats", action="store_true", help="显示回读校验记录的各速度出错率")
+    parser.add_argument("--trace", metavar="PATH",
+                        help="把发给后端的每次调用连同时间戳追加写入二进制轨迹文件（用 auto_typer_trace.py 汇总或重放）")
+    parser.add_argument("--resume", action="store_true", help="上次中断时从断点继续，只补打剩余的字符")
+    parser.add_argument("--plan-cache", action="store_true",
+                        help="缓存编译好的打字计划，再次输入同一段文本（如 --watch 时重复复制的内容）时直接重放")
+    parser.add_argument("--batch", metavar="MANIFEST", help="执行 JSON / TOML 任务清单中的全部任务")
+    parser.add_argument("--summary", metavar="PATH", help="批量任务结束后把每个任务的结果写入 JSON 文件")
+    parser.add_argument("--displays", metavar="LIST",
+                        help="并行输入到多个 X 显示（逗号分隔，如 :1,:2,:3），每个显示一个工作进程，默认使用 xtest 后端")
+    args = parser.parse_args(argv)
+    
+    if args.displays:
+        if not args.batch and (not args.source or args.source == "-"):
+            parser.error("--displays 需要指定要输入的文件或 --batch 任务清单")
+        if args.watch or args.diff or args.resume or args.verify or args.dry_run or args.editor or args.trace:
+            parser.error("--displays 不能与 --watch、--diff、--resume、--verify、--dry-run、--editor、--trace 同时使用")
+    if args.batch:
+        if args.source:
+            parser.error("--batch 不能与 source 同时使用")
+        if args.trace:
+            parser.error("--batch 不能与 --trace 同时使用")
+        if args.displays:
+            from auto_typer_fanout import run_fanout_manifest
+            return run_fanout_manifest(args.batch, args.displays, args.summary, args.backend)
+        from auto_typer_batch import run_batch
+        return run_batch(args.batch, args.summary, args.backend)
+    if args.displays:
+        from auto_typer_fanout import run_fanout
+        manifest = {
+            "countdown": args.countdown,
+            "jobs": [{"file": os.path.abspath(args.source), "speed": args.delay, "mode": args.mode}],
+        }
+        return run_fanout(manifest, args.displays, backend=args.backend, summary_path=args.summary)
+    if args.watch and args.source:
+        parser.error("--watch 不能与 source 同时使用")
+    if args.calibrate:
+        return AutoTyper(backend=args.backend).calibrate(args.countdown) is not None
+    if args.verify_stats:
+        from auto_typer_verify import VerificationLog
+        print(VerificationLog().format_table())
+        return True
+    if not args.source and not args.watch:
+        parser.error("请指定要输入的文件（或使用 --batch 指定任务清单、--watch 监视剪贴板）")
+    
+    if args.adaptive and args.human:
+        parser.error("--adaptive 不能与 --human 同时使用")
+    
+    typer = AutoTyper(backend=args.backend, mode=args.mode, plan_cache=args.plan_cache)
+    delay = args.delay
+    if args.editor:
+        if args.diff:
+            parser.error("--editor 不能与 --diff 同时使用")
+        typer.set_editor(args.editor)
+    if args.human:
+        if delay <= 0:
+            parser.error("--human 需要大于0的 --delay")
+        typer.enable_human_timing(args.seed)
+    if args.adaptive:
+        try:
+            typer.enable_adaptive_speed(args.min_cps, args.max_cps)
+        except ValueError as e:
+            parser.error(str(e))
+        delay = 1 / args.min_cps
+    if args.verify:
+        if args.verify_rounds < 0:
+            parser.error("--verify-rounds 不能小于0")
+        typer.enable_verification(args.verify_rounds, navigation=args.navigation)
+    if args.metrics_json or args.metrics_prom:
+        typer.enable_metrics(json_path=args.metrics_json, prometheus_path=args.metrics_prom)
+    if args.trace and not args.dry_run:
+        try:
+            typer.enable_trace(args.trace)
+        except (OSError, ValueError) as e:
+            print(f"❌ 无法打开轨迹文件: {e}")
+            return False
+    try:
+        return _run_typer(typer, args, delay)
+    finally:
+        typer.disable_trace()
+
+def _run_typer(typer, args, delay):
+    """按命令行参数执行打字（已完成 AutoTyper 的配置）"""
+    if args.dry_run:
+        return typer.dry_run(args.source, delay) is not None
+    if args.watch:
+        typer.watch_clipboard(delay, args.countdown)
+        return True
+    if args.diff:
+        # 增量输入需要比较完整的新旧文本
+        try:
+            with open_source(args.source) as source:
+                text = "".join(chunk for chunk, _ in source.chunks())
+        except (OSError, UnicodeDecodeError) as e:
+            print(f"❌ 无法读取文本来源: {e}")
+            return False
+        return typer.auto_type_diff(text, delay, args.countdown, args.target, args.navigation)
+    return typer.auto_type_source(args.source, delay, args.countdown, resume=args.resume)
+
 def main():
     """
     主函数
     """
+    if len(sys.argv) > 1:
+        sys.exit(0 if run_from_args(sys.argv[1:]) else 1)
+    
     print("🖊️" + "=" * 48)
     print("🎯           智能自动打字助手 v2.0")
     print("🖊️" + "=" * 48)
@@ -259,6 +1048,10 @@ def main():
     
     signal.signal(signal.SIGINT, signal_handler)
     
+    # 菜单中的各个模式共用一个打字器，GUI 也复用它的打字引擎（按键后端只创建一次）；
+    # 菜单中常反复输入同一段剪贴板文本，默认启用打字计划缓存
+    typer = AutoTyper(plan_cache=True)
+    
     while True:
         print("\n📋 选择输入模式:")
         print("1. 📋 剪贴板模式 (从剪贴板获取文本)")
@@ -267,13 +1060,15 @@ def main():
         print("4. 🖥️  启动GUI界面")
         print("5. ❓ 帮助信息")
         print("6. 🚪 退出程序")
+        print("7. 📄 文件模式 (从文件读取文本)")
+        print("8. 👀 剪贴板监视模式 (复制后自动输入)")
         
         try:
-            choice = input("\n请选择模式 (1-6): ").strip()
+            choice = input("\n请选择模式 (1-8): ").strip()
             
             if choice == '1':
                 print("\n🚀 启动简单剪贴板模式...")
-                result = auto_type_from_clipboard()
+                result = auto_type_from_clipboard(resume=RESUME_ASK)
                 if result:
                     print("\n✅ 任务完成！")
                 else:
@@ -291,8 +1086,7 @@ def main():
                 print("\n🚀 启动手动输入模式...")
                 text = interactive_text_input()
                 if text:
-                    typer = AutoTyper()
-                    result = typer.auto_type_text(text)
+                    result = typer.auto_type_text(text, resume=RESUME_ASK)
                     if result:
                         print("\n✅ 任务完成！")
                     else:
@@ -301,10 +1095,13 @@ def main():
             elif choice == '4':
                 print("\n🖥️ 启动GUI界面...")
                 try:
-                    import subprocess
-                    subprocess.run([sys.executable, "auto_typer_gui.py"], check=True)
-                except FileNotFoundError:
-                    print("❌ GUI文件 'auto_typer_gui.py' 未找到！")
+                    # 在当前进程中打开，已加载的模块无需重新导入；关闭窗口后回到菜单
+                    from auto_typer_gui import main as gui_main
+                    gui_main(typer.engine)
+                    # 界面中选择的自适应速度只在界面中生效
+                    typer.engine.rate_control = None
+                except ImportError as e:
+                    print(f"❌ 无法加载GUI: {e}")
                 except Exception as e:
                     print(f"❌ 启动GUI失败: {e}")
                     
@@ -332,8 +1129,27 @@ def main():
                 print("🎯 如有问题或建议，欢迎反馈")
                 sys.exit(0)
                 
+            elif choice == '7':
+                print("\n🚀 启动文件模式...")
+                path = input("📄 请输入文件路径: ").strip().strip('"')
+                if path:
+                    result = typer.auto_type_file(path, resume=RESUME_ASK)
+                    if result:
+                        print("\n✅ 任务完成！")
+                    else:
+                        print("\n❌ 任务失败或被取消")
+                        
+            elif choice == '8':
+                print("\n🚀 启动剪贴板监视模式...")
+                # 监视期间 Ctrl+C 只结束监视，回到菜单
+                previous_handler = signal.signal(signal.SIGINT, signal.default_int_handler)
+                try:
+                    typer.watch_clipboard()
+                finally:
+                    signal.signal(signal.SIGINT, previous_handler)
+                
             else:
-                print("❌ 无效选择，请输入1-6之间的数字！")
+                print("❌ 无效选择，请输入1-8之间的数字！")
                 
         except KeyboardInterrupt:
             print("\n\n👋 程序已退出，再见！")
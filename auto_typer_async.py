@@ -0,0 +1,232 @@
+"""
+异步打字接口
+
+在 asyncio 程序中使用自动打字：打字循环中的等待全部交给事件循环的定时器，不阻塞事件循环，
+也不需要为每个任务开一个线程，一个进程可以同时安排许多打字任务。
+
+    typer = AsyncTyper(backend="xtest")
+    task = typer.type("notes.txt", delay=0.02)     # 文本用 typer.type_text("...")
+    ...
+    task.pause()
+    task.resume()
+    print(task.progress)
+    completed = await task      # 完成返回 True，被 task.cancel() 取消返回 False
+
+按键后端的调用本身仍是同步的（每个批次一次，通常不到1毫秒）。同一个 AsyncTyper 上的任务按提交顺序
+依次执行，避免多个任务的按键交错；需要并行输入到不同目标时使用多个 AsyncTyper。
+"""
+
+import asyncio
+import time
+from contextlib import closing
+
+from auto_typer_checkpoint import CheckpointStore
+from auto_typer_engine import MODE_TYPE, STEP_DEADLINE, STEP_SLEEP, STEP_TURN, TypingEngine
+from auto_typer_sources import StringSource, open_source
+
+
+class TypingTask:
+    """一次异步打字：可以 await 等待结果，也可以暂停、继续、取消和查询进度"""
+
+    def __init__(self):
+        # 当前位置和总量（单位由来源决定，总量未知时为 None）
+        self.position = 0
+        self.total = None
+        # 结束后的节奏统计（PacingStats）
+        self.stats = None
+        self._running = asyncio.Event()
+        self._running.set()
+        self._stopped = False
+        self._sleeper = None
+        self._task = None
+
+    def pause(self):
+        """暂停打字（在下一个批次发出前生效），暂停时间不计入追赶"""
+        self._running.clear()
+
+    def resume(self):
+        """继续打字"""
+        self._running.set()
+
+    def cancel(self):
+        """取消打字：正在等待的定时器立即结束，任务结果为 False，未完成的部分保存为断点"""
+        self._stopped = True
+        self._running.set()
+        if self._sleeper is not None and not self._sleeper.done():
+            self._sleeper.set_result(None)
+
+    @property
+    def paused(self):
+        """是否处于暂停状态"""
+        return not self._running.is_set()
+
+    @property
+    def cancelled(self):
+        """是否已被取消"""
+        return self._stopped
+
+    @property
+    def progress(self):
+        """
+        Returns:
+            tuple: (当前位置, 总量)
+        """
+        return self.position, self.total
+
+    def done(self):
+        """打字是否已结束"""
+        return self._task is not None and self._task.done()
+
+    def result(self):
+        """
+        Returns:
+            bool: 全部输入完成返回 True，被取消返回 False（任务未结束时抛出 asyncio.InvalidStateError）
+        """
+        return self._task.result()
+
+    def __await__(self):
+        return self._task.__await__()
+
+    async def _sleep(self, seconds):
+        """用事件循环定时器等待 seconds 秒，cancel() 会提前唤醒；seconds 为0时只让出一次控制权"""
+        if seconds <= 0:
+            await asyncio.sleep(0)
+            return
+        loop = asyncio.get_running_loop()
+        self._sleeper = loop.create_future()
+        handle = loop.call_later(seconds, _wake, self._sleeper)
+        try:
+            await self._sleeper
+        finally:
+            handle.cancel()
+            self._sleeper = None
+
+    async def _wait_deadline(self, scheduler):
+        """等待到调度器的下一个截止时间（DeadlineScheduler.wait 的异步版本）"""
+        remaining = scheduler.remaining()
+        await self._sleep(remaining)
+        if remaining > 0 and scheduler.overshoot is not None:
+            scheduler.overshoot.observe(max(0.0, scheduler.clock() - scheduler.deadline))
+
+    async def _wait_turn(self, scheduler, metrics=None):
+        """
+        处理取消和暂停
+
+        Returns:
+            bool: 可以继续输入返回 True，已被取消返回 False
+        """
+        if self._stopped:
+            return False
+        if not self._running.is_set():
+            paused_at = time.perf_counter()
+            await self._running.wait()
+            paused = time.perf_counter() - paused_at
+            scheduler.shift(paused)
+            if metrics is not None:
+                metrics.pause.observe(paused)
+        return not self._stopped
+
+
+def _wake(future):
+    if not future.done():
+        future.set_result(None)
+
+
+class AsyncTyper:
+    """异步自动打字"""
+
+    def __init__(self, backend=None, mode=MODE_TYPE, checkpoints=True, engine=None):
+        """
+        Args:
+            backend (str | KeyBackend | None): 按键后端名称或实例，默认使用 pyautogui
+            mode (str): 默认输入模式
+            checkpoints (CheckpointStore | bool | None): 断点状态目录，True 表示使用默认目录
+            engine (TypingEngine): 使用已有的打字引擎（忽略 backend 和 mode）
+        """
+        self.engine = engine or TypingEngine(backend, mode=mode)
+        self.checkpoints = CheckpointStore() if checkpoints is True else checkpoints or None
+        self._lock = None
+
+    def type(self, source, delay=0.05, mode=None, countdown=0, resume=False, on_progress=None):
+        """
+        安排一次打字（需在事件循环中调用），立即返回可等待的任务
+
+        Args:
+            source: 文件路径、"-"（标准输入）、文件对象、产生字符串的可迭代对象或 TextSource
+            delay (float): 每个字符之间的延迟时间（秒）
+            mode (str): 输入模式，None 表示使用引擎的默认模式
+            countdown (float): 开始前等待的秒数
+            resume (bool): 有断点时是否从断点继续
+            on_progress (callable): 每个批次完成后调用 on_progress(当前位置, 总量)
+
+        Returns:
+            TypingTask: await 得到 True（完成）或 False（被取消）；来源无法打开等错误在 await 时抛出
+        """
+        task = TypingTask()
+        task._task = asyncio.ensure_future(self._run(task, source, delay, mode, countdown, resume, on_progress))
+        return task
+
+    def type_text(self, text, delay=0.05, mode=None, countdown=0, resume=False, on_progress=None):
+        """
+        安排输入一段文本（参数同 type()）
+
+        Returns:
+            TypingTask: 可等待的任务
+        """
+        return self.type(StringSource(text), delay, mode, countdown, resume, on_progress)
+
+    def close(self):
+        """释放按键后端"""
+        self.engine.close()
+
+    async def _run(self, task, source, delay, mode, countdown, resume, on_progress):
+        if self._lock is None:
+            self._lock = asyncio.Lock()
+        async with self._lock:
+            with open_source(source) as text_source:
+                task.total = text_source.total
+                skip, checkpoint = self._resume_point(text_source, resume)
+                if countdown:
+                    await task._sleep(countdown)
+                if task.cancelled:
+                    return False
+                return await self._type(task, text_source, delay, mode, skip, checkpoint, on_progress)
+
+    def _resume_point(self, source, resume):
+        """
+        Returns:
+            tuple: (跳过的字符数, Checkpoint 或 None)
+        """
+        if self.checkpoints is None:
+            return 0, None
+        key, state = self.checkpoints.find(source)
+        skip = state["chars"] if state is not None and resume else 0
+        return skip, self.checkpoints.open(source, key)
+
+    async def _type(self, task, source, delay, mode, skip, checkpoint, on_progress):
+        """TypingEngine._run_plans 的异步版本：打字步骤与同步版相同，只是等待交给事件循环"""
+        engine = self.engine
+        metrics = engine.metrics
+
+        def progress(position, total):
+            task.position = position
+            if on_progress is not None:
+                on_progress(position, total)
+
+        plans = engine._source_plans(source, delay, mode, skip)
+        try:
+            with closing(engine._steps(plans, delay, source.total, progress, skip, checkpoint)) as steps:
+                for step, scheduler, seconds in steps:
+                    if step == STEP_SLEEP:
+                        await task._sleep(seconds)
+                    elif step == STEP_TURN:
+                        if not await task._wait_turn(scheduler, metrics):
+                            return False
+                    else:
+                        await task._wait_deadline(scheduler)
+                        # 等待期间可能被暂停或取消
+                        if step == STEP_DEADLINE and not await task._wait_turn(scheduler, metrics):
+                            return False
+            return True
+        finally:
+            task.stats = engine.last_stats
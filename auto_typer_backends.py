@@ -0,0 +1,423 @@
+"""
+按键后端
+
+打字引擎只和这里定义的后端接口打交道，具体怎样把字符送进系统由后端决定：
+
+- ``pyautogui``: 默认后端，基于 pyautogui 模拟键盘
+- ``xtest``: Linux 专用，通过 ctypes 直接调用 X11 XTEST 扩展，保持一条显示连接并批量发送按键
+- ``null``: 丢弃所有按键，只做计数，用于压测和基准测试
+- ``recording``: 记录所有按键事件及时间戳，用于测试和调试
+
+新的后端只需继承 ``KeyBackend`` 并通过 ``register_backend`` 注册即可。
+"""
+
+import ctypes
+import os
+import time
+
+from auto_typer_clipboard import PASTE_HOTKEY, copy_text
+
+
+class KeyBackend:
+    """按键后端基类"""
+
+    # 后端名称（用于注册和显示）
+    name = "base"
+    # 是否能直接输入任意Unicode字符（如中文）
+    supports_unicode = False
+    # paste() 是否借助系统剪贴板（是则打字引擎会在粘贴前后保存、恢复剪贴板）
+    pastes_via_clipboard = True
+    # press(key, presses) 能否在一次调用中发出全部重复按键（是则编辑器精简会合并连续重复的字符）
+    supports_key_repeat = False
+
+    def write(self, text):
+        """
+        输入一段连续的字符
+
+        Args:
+            text (str): 要输入的字符串（一个或多个字符）
+        """
+        raise NotImplementedError
+
+    def press(self, key, presses=1):
+        """
+        按下并释放一个按键
+
+        Args:
+            key (str): 按键名称，如 'enter'、'backspace'
+            presses (int): 连续按下的次数
+        """
+        raise NotImplementedError
+
+    def hotkey(self, *keys):
+        """
+        按下组合键，如 hotkey('ctrl', 'v')
+        """
+        raise NotImplementedError
+
+    def paste(self, text):
+        """
+        通过剪贴板一次性粘贴一段文本
+
+        Args:
+            text (str): 要粘贴的文本
+        """
+        copy_text(text)
+        self.hotkey(*PASTE_HOTKEY)
+
+    def flush(self):
+        """把缓冲中的按键事件真正发送出去（默认无缓冲）"""
+
+    def sync(self):
+        """等待已发送的按键被系统处理完（默认调用本身就是同步的，无需等待）"""
+
+    def close(self):
+        """释放后端占用的资源"""
+
+
+class PyAutoGUIBackend(KeyBackend):
+    """基于 pyautogui 的后端"""
+
+    name = "pyautogui"
+    supports_key_repeat = True
+
+    def __init__(self):
+        # 延迟导入：pyautogui 会连带导入 pyscreeze、PIL 等，只在真正打字时才加载
+        import pyautogui
+        self._pyautogui = pyautogui
+
+    def write(self, text):
+        # _pause=False 跳过 pyautogui 每次调用后的全局 PAUSE 休眠，节奏由打字引擎控制
+        self._pyautogui.write(text, _pause=False)
+
+    def press(self, key, presses=1):
+        self._pyautogui.press(key, presses=presses, _pause=False)
+
+    def hotkey(self, *keys):
+        self._pyautogui.hotkey(*keys, _pause=False)
+
+
+# X11 常量
+_NO_SYMBOL = 0
+_XK_SHIFT_L = 0xffe1
+# 控制字符对应的 keysym
+_CONTROL_KEYSYMS = {
+    "\n": 0xff0d,  # Return
+    "\r": 0xff0d,
+    "\t": 0xff09,  # Tab
+    "\b": 0xff08,  # BackSpace
+}
+# pyautogui 按键名称 -> X11 keysym 名称
+_X11_KEY_NAMES = {
+    "enter": "Return", "return": "Return", "tab": "Tab", "space": "space",
+    "backspace": "BackSpace", "delete": "Delete", "del": "Delete", "insert": "Insert",
+    "esc": "Escape", "escape": "Escape", "capslock": "Caps_Lock",
+    "shift": "Shift_L", "shiftleft": "Shift_L", "shiftright": "Shift_R",
+    "ctrl": "Control_L", "ctrlleft": "Control_L", "ctrlright": "Control_R",
+    "alt": "Alt_L", "altleft": "Alt_L", "altright": "Alt_R",
+    "win": "Super_L", "winleft": "Super_L", "winright": "Super_R", "command": "Super_L", "super": "Super_L",
+    "up": "Up", "down": "Down", "left": "Left", "right": "Right",
+    "home": "Home", "end": "End", "pageup": "Prior", "pgup": "Prior", "pagedown": "Next", "pgdn": "Next",
+}
+
+
+class XTestBackend(KeyBackend):
+    """
+    基于 X11 XTEST 扩展的后端（仅限 Linux / X11）
+
+    与 pyautogui 相比：整个后端只打开一次显示连接；字符到键码的映射在连接建立时一次性读出并缓存；
+    每次调用只把按键事件写入 Xlib 的输出缓冲，由 flush() 一次性发送（XFlush），
+    不会每个按键都与 X 服务器往返一次。
+    """
+
+    name = "xtest"
+    supports_key_repeat = True
+
+    def __init__(self, display=None):
+        """
+        Args:
+            display (str): X 显示名称，默认使用环境变量 DISPLAY
+        """
+        # ctypes.util 会导入 subprocess，只在创建该后端时加载
+        import ctypes.util
+        x11_path = ctypes.util.find_library("X11")
+        xtst_path = ctypes.util.find_library("Xtst")
+        if not x11_path or not xtst_path:
+            raise RuntimeError("未找到 libX11 或 libXtst，请先安装（如 sudo apt-get install libxtst6）")
+        self._x11 = x11 = ctypes.cdll.LoadLibrary(x11_path)
+        xtst = ctypes.cdll.LoadLibrary(xtst_path)
+
+        x11.XOpenDisplay.argtypes = [ctypes.c_char_p]
+        x11.XOpenDisplay.restype = ctypes.c_void_p
+        x11.XCloseDisplay.argtypes = [ctypes.c_void_p]
+        x11.XFlush.argtypes = [ctypes.c_void_p]
+        x11.XSync.argtypes = [ctypes.c_void_p, ctypes.c_int]
+        x11.XDisplayKeycodes.argtypes = [ctypes.c_void_p, ctypes.POINTER(ctypes.c_int), ctypes.POINTER(ctypes.c_int)]
+        x11.XGetKeyboardMapping.argtypes = [ctypes.c_void_p, ctypes.c_ubyte, ctypes.c_int,
+                                            ctypes.POINTER(ctypes.c_int)]
+        x11.XGetKeyboardMapping.restype = ctypes.POINTER(ctypes.c_ulong)
+        x11.XChangeKeyboardMapping.argtypes = [ctypes.c_void_p, ctypes.c_int, ctypes.c_int,
+                                               ctypes.POINTER(ctypes.c_ulong), ctypes.c_int]
+        x11.XFree.argtypes = [ctypes.c_void_p]
+        x11.XStringToKeysym.argtypes = [ctypes.c_char_p]
+        x11.XStringToKeysym.restype = ctypes.c_ulong
+        xtst.XTestQueryExtension.argtypes = [ctypes.c_void_p] + [ctypes.POINTER(ctypes.c_int)] * 4
+        xtst.XTestFakeKeyEvent.argtypes = [ctypes.c_void_p, ctypes.c_uint, ctypes.c_int, ctypes.c_ulong]
+        self._fake_key = xtst.XTestFakeKeyEvent
+
+        self._display = x11.XOpenDisplay(display.encode() if display else None)
+        if not self._display:
+            raise RuntimeError(f"无法连接到 X 服务器（DISPLAY={display or os.environ.get('DISPLAY', '')}）")
+        unused = [ctypes.c_int() for _ in range(4)]
+        if not xtst.XTestQueryExtension(self._display, *[ctypes.byref(value) for value in unused]):
+            x11.XCloseDisplay(self._display)
+            self._display = None
+            raise RuntimeError("X 服务器不支持 XTEST 扩展")
+
+        # keysym -> (键码, 是否需要按住 Shift)
+        self._keysyms = {}
+        # 字符 -> (键码, 是否需要按住 Shift)，write() 的快速路径
+        self._chars = {}
+        # 没有任何符号的空闲键码，用于临时映射键盘布局中没有的字符；以及已借用的键码 -> keysym
+        self._spare_keycodes = []
+        self._borrowed = {}
+        self._load_keyboard_mapping()
+        self._shift_keycode = self._keycode(_XK_SHIFT_L)[0]
+
+    def _load_keyboard_mapping(self):
+        """一次性读取键盘映射并建立 keysym 到键码的索引"""
+        min_keycode, max_keycode = ctypes.c_int(), ctypes.c_int()
+        self._x11.XDisplayKeycodes(self._display, ctypes.byref(min_keycode), ctypes.byref(max_keycode))
+        count = max_keycode.value - min_keycode.value + 1
+        per_keycode = ctypes.c_int()
+        table = self._x11.XGetKeyboardMapping(self._display, min_keycode.value, count, ctypes.byref(per_keycode))
+        self._keysyms_per_keycode = per = per_keycode.value
+        try:
+            for index in range(count):
+                keycode = min_keycode.value + index
+                row = table[index * per:(index + 1) * per]
+                if not any(row):
+                    self._spare_keycodes.append(keycode)
+                    continue
+                # 只使用第一、二层（不按 / 按 Shift），优先不需要 Shift 的键码
+                for level in range(min(2, per)):
+                    if row[level] != _NO_SYMBOL:
+                        self._keysyms.setdefault(row[level], (keycode, level == 1))
+        finally:
+            self._x11.XFree(table)
+
+    def _keycode(self, keysym):
+        """
+        查找 keysym 对应的键码，键盘布局中没有时借用一个空闲键码临时映射
+
+        Returns:
+            tuple: (键码, 是否需要按住 Shift)
+        """
+        try:
+            return self._keysyms[keysym]
+        except KeyError:
+            pass
+        if not self._spare_keycodes:
+            raise ValueError(f"键盘布局中没有该字符，且没有空闲键码可用 (keysym 0x{keysym:x})")
+
+        # 轮流借用空闲键码；被替换的旧映射从缓存中移除
+        keycode = self._spare_keycodes.pop(0)
+        self._spare_keycodes.append(keycode)
+        old = self._borrowed.get(keycode)
+        if old is not None:
+            del self._keysyms[old]
+            self._chars.clear()
+            # 等待已发送的按键处理完毕再改映射
+            self._x11.XSync(self._display, 0)
+        self._change_mapping(keycode, keysym)
+        self._borrowed[keycode] = keysym
+        self._keysyms[keysym] = (keycode, False)
+        return keycode, False
+
+    def _change_mapping(self, keycode, keysym):
+        per = self._keysyms_per_keycode
+        row = (ctypes.c_ulong * per)(*([keysym] * per))
+        self._x11.XChangeKeyboardMapping(self._display, keycode, per, row, 1)
+        self._x11.XSync(self._display, 0)
+
+    @staticmethod
+    def _char_keysym(char):
+        """字符对应的 keysym：Latin-1 与码位相同，其余使用 Unicode keysym"""
+        keysym = _CONTROL_KEYSYMS.get(char)
+        if keysym is not None:
+            return keysym
+        code = ord(char)
+        if 0x20 <= code <= 0x7e or 0xa0 <= code <= 0xff:
+            return code
+        return 0x01000000 | code
+
+    def _key_keysym(self, key):
+        """按键名称（pyautogui 命名）对应的 keysym"""
+        if len(key) == 1:
+            return self._char_keysym(key)
+        name = _X11_KEY_NAMES.get(key.lower())
+        if name is None:
+            name = key.upper() if key[:1] in "fF" and key[1:].isdigit() else key
+        keysym = self._x11.XStringToKeysym(name.encode())
+        if keysym == _NO_SYMBOL:
+            raise ValueError(f"未知的按键: {key}")
+        return keysym
+
+    def _tap(self, keycode, shift):
+        display = self._display
+        fake_key = self._fake_key
+        if shift:
+            fake_key(display, self._shift_keycode, True, 0)
+        fake_key(display, keycode, True, 0)
+        fake_key(display, keycode, False, 0)
+        if shift:
+            fake_key(display, self._shift_keycode, False, 0)
+
+    def write(self, text):
+        chars = self._chars
+        for char in text:
+            entry = chars.get(char)
+            if entry is None:
+                entry = chars[char] = self._keycode(self._char_keysym(char))
+            self._tap(*entry)
+
+    def press(self, key, presses=1):
+        keycode, shift = self._keycode(self._key_keysym(key))
+        for _ in range(presses):
+            self._tap(keycode, shift)
+
+    def hotkey(self, *keys):
+        keycodes = [self._keycode(self._key_keysym(key))[0] for key in keys]
+        for keycode in keycodes:
+            self._fake_key(self._display, keycode, True, 0)
+        for keycode in reversed(keycodes):
+            self._fake_key(self._display, keycode, False, 0)
+
+    def flush(self):
+        self._x11.XFlush(self._display)
+
+    def sync(self):
+        # 与 X 服务器往返一次：服务器积压的事件越多，耗时越长，供自适应速度判断拥塞
+        self._x11.XSync(self._display, 0)
+
+    def close(self):
+        if self._display is None:
+            return
+        # 还原借用的键码
+        for keycode in self._borrowed:
+            self._change_mapping(keycode, _NO_SYMBOL)
+        self._borrowed.clear()
+        self._x11.XCloseDisplay(self._display)
+        self._display = None
+
+
+class NullBackend(KeyBackend):
+    """空后端：不发送任何按键，只统计调用次数和字符数"""
+
+    name = "null"
+    supports_key_repeat = True
+    supports_unicode = True
+    pastes_via_clipboard = False
+
+    def __init__(self):
+        self.calls = 0
+        self.chars = 0
+
+    def write(self, text):
+        self.calls += 1
+        self.chars += len(text)
+
+    def press(self, key, presses=1):
+        self.calls += 1
+        self.chars += presses
+
+    def hotkey(self, *keys):
+        self.calls += 1
+
+    def paste(self, text):
+        self.calls += 1
+        self.chars += len(text)
+
+
+class RecordingBackend(KeyBackend):
+    """记录后端：保存每一次调用及其时间戳"""
+
+    name = "recording"
+    supports_key_repeat = True
+    supports_unicode = True
+    pastes_via_clipboard = False
+
+    def __init__(self, supports_unicode=True):
+        """
+        Args:
+            supports_unicode (bool): 是否模拟能直接输入Unicode的后端；
+                为 False 时可用来观察中文等字符被改为粘贴的情况
+        """
+        # 每个事件为 (时间戳, 类型, 内容)，时间戳取自 time.perf_counter()
+        self.events = []
+        self.supports_unicode = supports_unicode
+
+    def write(self, text):
+        self.events.append((time.perf_counter(), "write", text))
+
+    def press(self, key, presses=1):
+        for _ in range(presses):
+            self.events.append((time.perf_counter(), "press", key))
+
+    def hotkey(self, *keys):
+        self.events.append((time.perf_counter(), "hotkey", keys))
+
+    def paste(self, text):
+        self.events.append((time.perf_counter(), "paste", text))
+
+    @property
+    def text(self):
+        """所有 write 和 paste 调用拼接起来的文本"""
+        return "".join(payload for _, kind, payload in self.events if kind in ("write", "paste"))
+
+    def clear(self):
+        """清空已记录的事件"""
+        self.events.clear()
+
+
+# 已注册的后端：名称 -> 后端类
+BACKENDS = {
+    PyAutoGUIBackend.name: PyAutoGUIBackend,
+    XTestBackend.name: XTestBackend,
+    NullBackend.name: NullBackend,
+    RecordingBackend.name: RecordingBackend,
+}
+
+DEFAULT_BACKEND = PyAutoGUIBackend.name
+
+
+def register_backend(backend_class):
+    """
+    注册一个新的后端类
+
+    Args:
+        backend_class (type): KeyBackend 的子类，使用其 name 属性作为注册名
+    """
+    BACKENDS[backend_class.name] = backend_class
+    return backend_class
+
+
+def create_backend(backend=None):
+    """
+    根据名称创建后端实例
+
+    Args:
+        backend (str | KeyBackend | None): 后端名称或已创建的后端实例，None 表示默认后端
+
+    Returns:
+        KeyBackend: 后端实例
+    """
+    if isinstance(backend, KeyBackend):
+        return backend
+
+    name = backend or DEFAULT_BACKEND
+    try:
+        backend_class = BACKENDS[name]
+    except KeyError:
+        raise ValueError(f"未知的按键后端: {name}（可选: {', '.join(BACKENDS)}）") from None
+    return backend_class()
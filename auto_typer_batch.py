@@ -0,0 +1,399 @@
+"""
+批量任务
+
+按任务清单（JSON 或 TOML）无人值守地连续执行多个打字任务：
+
+1. 读取清单并校验每个任务，任何一个任务有错都不会开始打字
+2. 读取全部文本并预先编译打字计划
+3. 只倒计时一次，然后共用同一个按键后端依次执行，每个任务前后可以等待一段时间
+4. 输出每个任务的结果（用时、实际速度、错误），可写入 JSON 文件
+
+清单示例（TOML）::
+
+    backend = "xtest"     # 可选，默认 pyautogui
+    countdown = 5         # 第一个任务前的倒计时（秒），默认3
+
+    [defaults]            # 所有任务的默认设置
+    speed = "快速"
+
+    [[jobs]]
+    name = "标题"
+    text = "Hello, world!"
+    post_delay = 1
+
+    [[jobs]]
+    file = "body.md"
+    speed = 0.01          # 预设速度（1-4 或名称）或每字符延迟（秒）
+    mode = "hybrid"
+    pre_delay = 0.5
+"""
+
+import json
+import os
+import time
+
+from auto_typer_backends import BACKENDS
+from auto_typer_engine import MODE_TYPE, MODES, SPEED_MAP, TypingEngine
+
+# 任务中允许出现的字段
+JOB_FIELDS = ("name", "text", "file", "encoding", "speed", "countdown", "mode", "pre_delay", "post_delay")
+# 清单顶层允许出现的字段
+MANIFEST_FIELDS = ("backend", "countdown", "defaults", "jobs")
+
+# 任务状态
+STATUS_DONE = "done"
+STATUS_STOPPED = "stopped"
+STATUS_FAILED = "failed"
+STATUS_SKIPPED = "skipped"
+
+
+def load_manifest(path):
+    """
+    读取任务清单，按扩展名识别格式（.toml 为 TOML，其余按 JSON）
+
+    Raises:
+        OSError: 文件无法读取
+        ValueError: 格式错误
+    """
+    with open(path, "rb") as f:
+        data = f.read()
+
+    if path.lower().endswith(".toml"):
+        try:
+            import tomllib
+        except ImportError:
+            try:
+                import tomli as tomllib
+            except ImportError:
+                raise ValueError("读取 TOML 清单需要 Python 3.11+ 或安装 tomli（pip install tomli）") from None
+        try:
+            return tomllib.loads(data.decode("utf-8"))
+        except tomllib.TOMLDecodeError as e:
+            raise ValueError(f"TOML 格式错误: {e}") from None
+
+    try:
+        return json.loads(data.decode("utf-8"))
+    except json.JSONDecodeError as e:
+        raise ValueError(f"JSON 格式错误: {e}") from None
+
+
+def parse_speed(speed):
+    """
+    把速度设置转换为每个字符的延迟（秒）
+
+    Args:
+        speed: 预设速度编号（"1"-"4"）、名称（如 "快速"）或延迟秒数
+
+    Raises:
+        ValueError: 无法识别的速度
+    """
+    if isinstance(speed, bool):
+        raise ValueError(f"无效的速度: {speed}")
+    if isinstance(speed, (int, float)):
+        if speed < 0:
+            raise ValueError("延迟时间不能为负数")
+        return float(speed)
+    speed = str(speed).strip()
+    if speed in SPEED_MAP:
+        return SPEED_MAP[speed][0]
+    for delay, name in SPEED_MAP.values():
+        if speed == name:
+            return delay
+    raise ValueError(f"无效的速度: {speed}（可选: 1-4、{'、'.join(name for _, name in SPEED_MAP.values())} 或延迟秒数）")
+
+
+class BatchJob:
+    """清单中的一个任务"""
+
+    def __init__(self, index, spec, base_dir):
+        """
+        Args:
+            index (int): 任务序号（从1开始）
+            spec (dict): 任务设置（已合并默认设置）
+            base_dir (str): 清单所在目录，任务中的相对路径相对于该目录
+
+        Raises:
+            ValueError: 任务设置有误
+        """
+        unknown = [key for key in spec if key not in JOB_FIELDS]
+        if unknown:
+            raise ValueError(f"未知的字段: {', '.join(unknown)}")
+        if ("text" in spec) == ("file" in spec):
+            raise ValueError("必须且只能指定 text 或 file 之一")
+
+        self.index = index
+        self.text = spec.get("text")
+        self.file = os.path.join(base_dir, spec["file"]) if "file" in spec else None
+        if self.file is not None and not os.path.isfile(self.file):
+            raise ValueError(f"文件不存在: {self.file}")
+        self.name = str(spec.get("name") or (os.path.basename(self.file) if self.file else f"任务{index}"))
+        self.encoding = spec.get("encoding", "utf-8")
+        self.delay = parse_speed(spec.get("speed", SPEED_MAP['2'][0]))
+        self.mode = spec.get("mode", MODE_TYPE)
+        if self.mode not in MODES:
+            raise ValueError(f"未知的输入模式: {self.mode}（可选: {', '.join(MODES)}）")
+        self.countdown = _non_negative(spec, "countdown", 0)
+        self.pre_delay = _non_negative(spec, "pre_delay", 0)
+        self.post_delay = _non_negative(spec, "post_delay", 0)
+        self.plan = None
+
+    def load_text(self):
+        """
+        读取任务文本
+
+        Raises:
+            OSError: 文件无法读取
+            ValueError: 文本为空或无法解码
+        """
+        if self.file is not None:
+            with open(self.file, encoding=self.encoding) as f:
+                text = f.read()
+            if text.startswith("\ufeff"):
+                text = text[1:]
+        else:
+            text = str(self.text)
+        if not text:
+            raise ValueError("文本为空")
+        return text
+
+    def describe(self):
+        return f"{self.index}. {self.name}"
+
+    def result(self):
+        """尚未执行时的结果字典"""
+        return {
+            "index": self.index,
+            "name": self.name,
+            "chars": len(self.plan.text),
+            "delay": self.delay,
+            "mode": self.mode,
+            "status": STATUS_SKIPPED,
+            "duration": 0.0,
+            "achieved_cps": None,
+            "error": None,
+        }
+
+
+def _non_negative(spec, key, default):
+    value = spec.get(key, default)
+    if isinstance(value, bool) or not isinstance(value, (int, float)) or value < 0:
+        raise ValueError(f"{key} 必须是非负数")
+    return value
+
+
+class BatchRunner:
+    """批量任务执行器：校验、预编译并依次执行清单中的任务"""
+
+    def __init__(self, manifest, base_dir=".", backend=None):
+        """
+        Args:
+            manifest (dict): 任务清单
+            base_dir (str): 任务中相对路径的基准目录
+            backend (str | KeyBackend | None): 按键后端，优先于清单中的 backend
+        """
+        self.manifest = manifest
+        self.base_dir = base_dir
+        self.backend = backend
+        self.countdown = 3
+        self.jobs = []
+        self.engine = None
+
+    def prepare(self, open_backend=True):
+        """
+        校验全部任务并预先编译打字计划
+
+        Args:
+            open_backend (bool): 是否同时创建按键后端（由其他进程发送按键时不创建）
+
+        Returns:
+            list: 错误信息列表，为空表示全部通过
+        """
+        manifest = self.manifest
+        if not isinstance(manifest, dict):
+            return ["清单必须是一个对象"]
+        errors = [f"清单: 未知的字段 {key}" for key in manifest if key not in MANIFEST_FIELDS]
+
+        backend = self.backend or manifest.get("backend")
+        if isinstance(backend, str) and backend not in BACKENDS:
+            errors.append(f"清单: 未知的按键后端 {backend}（可选: {', '.join(BACKENDS)}）")
+        try:
+            self.countdown = _non_negative(manifest, "countdown", 3)
+        except ValueError as e:
+            errors.append(f"清单: {e}")
+
+        defaults = manifest.get("defaults", {})
+        specs = manifest.get("jobs")
+        if not isinstance(defaults, dict):
+            errors.append("清单: defaults 必须是一个对象")
+            defaults = {}
+        if not isinstance(specs, list) or not specs:
+            errors.append("清单: jobs 必须是非空列表")
+            specs = []
+
+        for index, spec in enumerate(specs, 1):
+            if not isinstance(spec, dict):
+                errors.append(f"任务 {index}: 必须是一个对象")
+                continue
+            merged = dict(defaults)
+            merged.update(spec)
+            try:
+                self.jobs.append(BatchJob(index, merged, self.base_dir))
+            except ValueError as e:
+                errors.append(f"任务 {index}: {e}")
+
+        if errors:
+            return errors
+
+        # 所有任务共用一个引擎和后端，后端只创建一次
+        self.engine = TypingEngine(backend)
+        for job in self.jobs:
+            try:
+                job.plan = self.engine.compile(job.load_text(), job.delay, job.mode)
+            except (OSError, ValueError) as e:
+                errors.append(f"任务 {job.describe()}: {e}")
+        if open_backend and not errors:
+            # 后端在第一次使用时才创建：在这里创建，初始化失败（如没有 X 显示）时在倒计时之前就报错
+            try:
+                self.engine.backend
+            except Exception as e:
+                errors.append(f"初始化按键后端失败: {e}")
+        return errors
+
+    def run(self, stop_event=None):
+        """
+        依次执行全部任务（须先调用 prepare 且没有错误）
+
+        Args:
+            stop_event (threading.Event): 被设置时停止当前任务并跳过其余任务
+
+        Returns:
+            list: 每个任务的结果字典
+        """
+        results = []
+        stopped = False
+        print(f"⏰ {self.countdown}秒后开始执行 {len(self.jobs)} 个任务，请将光标放在目标位置...")
+        try:
+            _countdown(self.countdown, stop_event)
+        except KeyboardInterrupt:
+            # 还没有开始任何任务：全部任务记为跳过
+            print("\n⏹️ 用户中断，未执行任何任务")
+            self.engine.close()
+            return [job.result() for job in self.jobs]
+
+        for job in self.jobs:
+            result = job.result()
+            results.append(result)
+            if stopped or (stop_event is not None and stop_event.is_set()):
+                continue
+
+            print(f"\n🚀 任务 {job.describe()} ({result['chars']} 字符, {MODES[job.mode]})")
+            try:
+                _countdown(job.countdown, stop_event)
+                _wait(job.pre_delay, stop_event)
+                started = time.perf_counter()
+                completed = self.engine.run_plan(job.plan, stop_event)
+                result["duration"] = round(time.perf_counter() - started, 3)
+                result["achieved_cps"] = round(self.engine.last_stats.achieved_cps, 1)
+                if completed:
+                    result["status"] = STATUS_DONE
+                    print(f"✅ {self.engine.last_stats.format_report()}")
+                    _wait(job.post_delay, stop_event)
+                else:
+                    result["status"] = STATUS_STOPPED
+                    stopped = True
+                    print("⏹️ 任务被中断，其余任务将被跳过")
+            except KeyboardInterrupt:
+                result["status"] = STATUS_STOPPED
+                stopped = True
+                print("\n⏹️ 用户中断，其余任务将被跳过")
+            except Exception as e:
+                result["status"] = STATUS_FAILED
+                result["error"] = str(e)
+                print(f"❌ 任务失败: {e}")
+
+        self.engine.close()
+        return results
+
+
+def _countdown(seconds, stop_event=None):
+    for i in range(int(seconds), 0, -1):
+        if stop_event is not None and stop_event.is_set():
+            return
+        print(f"⏳ {i}...")
+        _wait(1, stop_event)
+    _wait(seconds - int(seconds), stop_event)
+
+
+def _wait(seconds, stop_event=None):
+    """等待 seconds 秒，stop_event 被设置时提前返回"""
+    if seconds <= 0:
+        return
+    if stop_event is None:
+        time.sleep(seconds)
+    else:
+        stop_event.wait(seconds)
+
+
+def format_results(results):
+    """把任务结果格式化为表格"""
+    names = {STATUS_DONE: "✅ 完成", STATUS_STOPPED: "⏹️ 中断", STATUS_FAILED: "❌ 失败", STATUS_SKIPPED: "⏭️ 跳过"}
+    lines = [f"{'#':>3} {'状态':<6} {'字符':>8} {'用时(秒)':>9} {'字符/秒':>9}  任务"]
+    for result in results:
+        cps = "-" if result["achieved_cps"] is None else f"{result['achieved_cps']:.1f}"
+        line = (f"{result['index']:>3} {names[result['status']]:<6} {result['chars']:>8} "
+                f"{result['duration']:>9.2f} {cps:>9}  {result['name']}")
+        if result["error"]:
+            line += f"（{result['error']}）"
+        lines.append(line)
+    return "\n".join(lines)
+
+
+def run_batch(manifest_path, summary_path=None, backend=None, stop_event=None):
+    """
+    读取清单并执行全部任务
+
+    Args:
+        manifest_path (str): 任务清单路径（.json 或 .toml）
+        summary_path (str): 把结果写入该 JSON 文件
+        backend (str): 按键后端，优先于清单中的设置
+        stop_event (threading.Event): 被设置时停止
+
+    Returns:
+        bool: 全部任务完成返回 True
+    """
+    try:
+        manifest = load_manifest(manifest_path)
+    except (OSError, ValueError) as e:
+        print(f"❌ 无法读取任务清单: {e}")
+        return False
+
+    runner = BatchRunner(manifest, os.path.dirname(os.path.abspath(manifest_path)), backend)
+    errors = runner.prepare()
+    if errors:
+        print("❌ 任务清单校验失败，未执行任何任务:")
+        for error in errors:
+            print(f"   - {error}")
+        return False
+
+    total_chars = sum(len(job.plan.text) for job in runner.jobs)
+    estimated = sum(job.plan.estimate_duration() + job.countdown + job.pre_delay + job.post_delay
+                    for job in runner.jobs)
+    print(f"📋 已校验并编译 {len(runner.jobs)} 个任务，共 {total_chars} 字符，预计用时 {estimated:.1f}秒")
+
+    results = runner.run(stop_event)
+    print("\n" + format_results(results))
+
+    if summary_path:
+        summary = {
+            "manifest": os.path.abspath(manifest_path),
+            "finished_at": time.time(),
+            "jobs": results,
+        }
+        try:
+            with open(summary_path, "w", encoding="utf-8") as f:
+                json.dump(summary, f, ensure_ascii=False, indent=2)
+            print(f"\n📝 结果已写入 {summary_path}")
+        except OSError as e:
+            print(f"\n⚠️ 写入结果失败: {e}")
+
+    return all(result["status"] == STATUS_DONE for result in results)
@@ -0,0 +1,300 @@
+"""
+打字引擎基准测试
+
+在各个预设速度和不同文本长度下运行打字引擎，统计：
+
+- 实际吞吐量（字符/秒）
+- 按键间隔的分位数（毫秒）
+- 调度漂移：实际发出时间相对计划时间的偏差（毫秒）
+- 每次按键的后端调用开销（微秒）
+- CPU 占用率
+
+默认使用 null 后端，可在无图形界面的 Linux 上运行；加 --xvfb 时启动一个 Xvfb
+虚拟显示并使用 pyautogui 后端真实发送按键。结果以 JSON 输出，便于跟踪性能回退。
+
+加 --startup 时改为测量启动耗时：在新的解释器中导入 auto_typer 所需的时间，
+超出 STARTUP_BUDGET 时以非零状态退出。
+
+示例:
+    python auto_typer_bench.py
+    python auto_typer_bench.py --sizes 100,10000 --max-seconds 1 --output bench.json
+    python auto_typer_bench.py --xvfb
+    python auto_typer_bench.py --startup
+"""
+
+import argparse
+import json
+import os
+import platform
+import shutil
+import subprocess
+import sys
+import threading
+import time
+from array import array
+
+from auto_typer_backends import KeyBackend, create_backend
+from auto_typer_engine import SPEED_MAP, TypingEngine
+
+# 默认测试的文本长度（字符）
+DEFAULT_SIZES = (100, 1000, 10000, 100000, 1000000)
+# 每个用例最长运行时间（秒），慢速下的大文本只测前一部分
+DEFAULT_MAX_SECONDS = 2.0
+# 用于生成测试文本的样本
+SAMPLE_TEXT = "The quick brown fox jumps over the lazy dog. 0123456789\n"
+# 启动耗时预算（秒）：导入 auto_typer（不含解释器本身启动）允许的最长时间
+STARTUP_BUDGET = 0.15
+# 启动耗时测量的重复次数（取最小值，排除系统抖动）
+STARTUP_REPEAT = 5
+# 启动时不应被导入的重量级模块
+HEAVY_MODULES = ("pyautogui", "pyperclip", "tkinter", "argparse", "subprocess")
+
+
+class TimingBackend(KeyBackend):
+    """包装另一个后端，记录每次调用的开始时间、耗时和字符数"""
+
+    def __init__(self, inner):
+        self.inner = inner
+        self.name = f"timing:{inner.name}"
+        self.supports_unicode = inner.supports_unicode
+        self.pastes_via_clipboard = inner.pastes_via_clipboard
+        self.starts = array('d')
+        self.costs = array('d')
+        self.counts = array('l')
+
+    def _timed(self, count, call, *args):
+        start = time.perf_counter()
+        call(*args)
+        self.starts.append(start)
+        self.costs.append(time.perf_counter() - start)
+        self.counts.append(count)
+
+    def write(self, text):
+        self._timed(len(text), self.inner.write, text)
+
+    def press(self, key, presses=1):
+        self._timed(presses, self.inner.press, key, presses)
+
+    def hotkey(self, *keys):
+        self._timed(1, self.inner.hotkey, *keys)
+
+    def paste(self, text):
+        self._timed(len(text), self.inner.paste, text)
+
+    def flush(self):
+        self.inner.flush()
+
+    def close(self):
+        self.inner.close()
+
+
+def make_text(size):
+    """生成指定长度的测试文本"""
+    repeat = size // len(SAMPLE_TEXT) + 1
+    return (SAMPLE_TEXT * repeat)[:size]
+
+
+def percentiles(values, points=(50, 90, 99)):
+    """
+    计算分位数
+
+    Returns:
+        dict: {"p50": ..., "p90": ..., "p99": ..., "max": ...}，没有数据时各项为 None
+    """
+    result = {}
+    ordered = sorted(values)
+    for p in points:
+        index = int(round(p / 100 * (len(ordered) - 1)))
+        result[f"p{p}"] = round(ordered[index], 4) if ordered else None
+    result["max"] = round(ordered[-1], 4) if ordered else None
+    return result
+
+
+def run_case(backend_name, delay, size, max_seconds):
+    """
+    运行一个用例
+
+    Args:
+        backend_name (str): 后端名称
+        delay (float): 每个字符之间的延迟时间（秒）
+        size (int): 文本长度
+        max_seconds (float): 最长运行时间（秒）
+
+    Returns:
+        dict: 用例结果
+    """
+    backend = TimingBackend(create_backend(backend_name))
+    engine = TypingEngine(backend)
+    text = make_text(size)
+    stop_event = threading.Event()
+    timer = threading.Timer(max_seconds, stop_event.set)
+
+    cpu_start = time.process_time()
+    wall_start = time.perf_counter()
+    timer.start()
+    try:
+        completed = engine.type_text(text, delay, stop_event)
+    finally:
+        timer.cancel()
+    wall = time.perf_counter() - wall_start
+    cpu = time.process_time() - cpu_start
+
+    stats = engine.last_stats
+    starts, costs, counts = backend.starts, backend.costs, backend.counts
+
+    # 按键间隔：相邻两次调用的间隔平摊到前一次调用的每个字符上
+    intervals = [(starts[i + 1] - starts[i]) / counts[i] * 1000 for i in range(len(starts) - 1)]
+
+    # 调度漂移：第 k 个字符的实际发出时间 - (第一次调用时间 + k × 延迟)
+    drifts = []
+    sent = 0
+    for start, count in zip(starts, counts):
+        drifts.append((start - starts[0] - sent * delay) * 1000)
+        sent += count
+
+    overheads = [cost / count * 1e6 for cost, count in zip(costs, counts) if count]
+
+    return {
+        "delay": delay,
+        "size": size,
+        "chars": stats.chars,
+        "completed": completed,
+        "calls": len(starts),
+        "wall_seconds": round(wall, 4),
+        "target_cps": stats.target_cps,
+        "achieved_cps": round(stats.achieved_cps, 1),
+        "interval_ms": percentiles(intervals),
+        "drift_ms": {
+            "final": round(drifts[-1], 4) if drifts else None,
+            "max_abs": round(max(abs(d) for d in drifts), 4) if drifts else None,
+        },
+        "overhead_us": percentiles(overheads),
+        "cpu_percent": round(cpu / wall * 100, 1) if wall > 0 else None,
+    }
+
+
+def measure_startup(module="auto_typer", repeat=STARTUP_REPEAT):
+    """
+    在新的解释器中测量导入模块的耗时
+
+    Returns:
+        dict: 导入耗时、解释器启动耗时（秒）以及启动时被导入的重量级模块
+    """
+    def best_of(code):
+        best = None
+        for _ in range(repeat):
+            start = time.perf_counter()
+            output = subprocess.run([sys.executable, "-c", code], check=True, capture_output=True, text=True,
+                                    cwd=os.path.dirname(os.path.abspath(__file__))).stdout
+            elapsed = time.perf_counter() - start
+            best = elapsed if best is None else min(best, elapsed)
+        return best, output
+
+    baseline, _ = best_of("pass")
+    total, output = best_of(f"import sys, {module}; print(','.join(m for m in {HEAVY_MODULES!r} if m in sys.modules))")
+    return {
+        "module": module,
+        "interpreter_seconds": round(baseline, 4),
+        "import_seconds": round(max(0.0, total - baseline), 4),
+        "budget_seconds": STARTUP_BUDGET,
+        "heavy_modules": [name for name in output.strip().split(",") if name],
+    }
+
+
+def start_xvfb(display=":99"):
+    """
+    启动 Xvfb 虚拟显示并设置 DISPLAY 环境变量
+
+    Returns:
+        subprocess.Popen: Xvfb 进程
+    """
+    if shutil.which("Xvfb") is None:
+        raise RuntimeError("未找到 Xvfb，请先安装（如 sudo apt-get install xvfb）")
+    process = subprocess.Popen(["Xvfb", display, "-screen", "0", "1280x720x24"],
+                               stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    time.sleep(0.5)
+    if process.poll() is not None:
+        raise RuntimeError(f"Xvfb 启动失败（显示 {display} 可能已被占用）")
+    os.environ["DISPLAY"] = display
+    return process
+
+
+def format_row(result):
+    """把一个用例结果格式化为表格中的一行"""
+    def ms(value):
+        return "-" if value is None else f"{value:.2f}"
+
+    target = "不限速" if result["target_cps"] is None else f"{result['target_cps']:.0f}"
+    return (f"{result['delay']:>6} {result['size']:>8} {result['chars']:>8} {target:>7} "
+            f"{result['achieved_cps']:>11.1f} {ms(result['interval_ms']['p50']):>8} "
+            f"{ms(result['interval_ms']['p99']):>8} {ms(result['drift_ms']['max_abs']):>8} "
+            f"{ms(result['overhead_us']['p50']):>8} {result['cpu_percent']:>6}")
+
+
+def main(argv=None):
+    """基准测试入口"""
+    parser = argparse.ArgumentParser(description="打字引擎基准测试")
+    parser.add_argument("--backend", default=None,
+                        help="按键后端，默认 null（使用 --xvfb 时默认 pyautogui）")
+    parser.add_argument("--sizes", default=",".join(map(str, DEFAULT_SIZES)),
+                        help="逗号分隔的文本长度列表")
+    parser.add_argument("--delays", default=None,
+                        help="逗号分隔的延迟列表（秒），默认使用全部预设速度以及不限速(0)")
+    parser.add_argument("--max-seconds", type=float, default=DEFAULT_MAX_SECONDS,
+                        help="每个用例最长运行时间（秒）")
+    parser.add_argument("--xvfb", action="store_true", help="启动 Xvfb 虚拟显示后再运行")
+    parser.add_argument("--output", help="把 JSON 结果写入文件（默认输出到标准输出）")
+    parser.add_argument("--startup", action="store_true", help="只测量启动（导入）耗时")
+    args = parser.parse_args(argv)
+
+    if args.startup:
+        result = measure_startup()
+        within_budget = result["import_seconds"] <= STARTUP_BUDGET and not result["heavy_modules"]
+        print(json.dumps(result, ensure_ascii=False, indent=2))
+        if result["heavy_modules"]:
+            print(f"\n❌ 启动时导入了重量级模块: {', '.join(result['heavy_modules'])}", file=sys.stderr)
+        elif not within_budget:
+            print(f"\n❌ 启动耗时 {result['import_seconds']:.3f}秒，超出预算 {STARTUP_BUDGET}秒", file=sys.stderr)
+        else:
+            print(f"\n✅ 启动耗时 {result['import_seconds']:.3f}秒，预算 {STARTUP_BUDGET}秒", file=sys.stderr)
+        return 0 if within_budget else 1
+
+    backend = args.backend or ("pyautogui" if args.xvfb else "null")
+    sizes = [int(size) for size in args.sizes.split(",")]
+    if args.delays:
+        delays = [float(delay) for delay in args.delays.split(",")]
+    else:
+        delays = [delay for delay, _ in SPEED_MAP.values()] + [0.0]
+
+    xvfb = start_xvfb() if args.xvfb else None
+    try:
+        print(f"{'延迟':>6} {'长度':>8} {'已输入':>8} {'目标':>7} {'实际字符/秒':>11} "
+              f"{'间隔p50':>8} {'间隔p99':>8} {'最大漂移':>8} {'开销us':>8} {'CPU%':>6}", file=sys.stderr)
+        results = []
+        for delay in delays:
+            for size in sizes:
+                result = run_case(backend, delay, size, args.max_seconds)
+                results.append(result)
+                print(format_row(result), file=sys.stderr)
+    finally:
+        if xvfb is not None:
+            xvfb.terminate()
+
+    report = {
+        "backend": backend,
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "max_seconds": args.max_seconds,
+        "results": results,
+    }
+    output = json.dumps(report, ensure_ascii=False, indent=2)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            f.write(output)
+        print(f"\n✅ 结果已写入 {args.output}", file=sys.stderr)
+    else:
+        print(output)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,171 @@
+"""
+断点续打
+
+长文本打字时，打字引擎定期把已输入的字符数写入一个很小的状态文件（~/.auto_typer/checkpoints）。
+打字被停止、中断或程序崩溃后，再次输入同一段文本（或同一个文件）时可以从断点继续，
+只需补打剩余的字符。打字正常完成后状态文件会被删除。
+
+状态文件以文本的 SHA-256（文件则以 路径 + 大小 + 修改时间）命名，文本有任何变化都不会误用旧断点。
+"""
+
+import hashlib
+import json
+import os
+import time
+
+from auto_typer_plan import APP_DIR
+from auto_typer_sources import FileSource, StringSource
+
+# 写入状态文件的最短间隔（秒）
+DEFAULT_CHECKPOINT_INTERVAL = 1.0
+# 少于这么多字符（或字节）的文本不记录断点
+CHECKPOINT_MIN_SIZE = 1000
+
+
+def source_key(source):
+    """
+    计算文本来源的断点键
+
+    Returns:
+        str | None: 十六进制 SHA-256；标准输入、生成器等无法重新读取的来源返回 None
+    """
+    digest = hashlib.sha256()
+    if isinstance(source, StringSource):
+        digest.update(b"text\0")
+        digest.update(source.text.encode("utf-8", errors="surrogatepass"))
+    elif isinstance(source, FileSource):
+        stat = os.stat(source.path)
+        digest.update(f"file\0{os.path.abspath(source.path)}\0{stat.st_size}\0{stat.st_mtime_ns}\0{source.encoding}"
+                      .encode("utf-8", errors="surrogateescape"))
+    else:
+        return None
+    return digest.hexdigest()
+
+
+class Checkpoint:
+    """一次打字的断点：由打字引擎在输入过程中更新"""
+
+    def __init__(self, store, key, description="", total=None, interval=DEFAULT_CHECKPOINT_INTERVAL):
+        """
+        Args:
+            store (CheckpointStore): 所属的状态文件目录
+            key (str): 断点键
+            description (str): 文本描述（显示给用户）
+            total (int): 文本总字符数，未知时为 None
+            interval (float): 写入状态文件的最短间隔（秒）
+        """
+        self.store = store
+        self.key = key
+        self.description = description
+        self.total = total
+        self.interval = interval
+        # 已输入的字符数（从文本开头算起，包含续打时跳过的部分）
+        self.chars = 0
+        self._saved_at = time.monotonic()
+
+    def update(self, chars):
+        """记录已输入的字符数，距上次写入超过 interval 时写入状态文件"""
+        self.chars = chars
+        now = time.monotonic()
+        if now - self._saved_at >= self.interval:
+            self._saved_at = now
+            self.save()
+
+    def save(self):
+        """立即写入状态文件"""
+        self.store.save(self.key, {
+            "chars": self.chars,
+            "total": self.total,
+            "description": self.description,
+            "updated": time.time(),
+        })
+
+    def finish(self, completed):
+        """打字结束：完成时删除状态文件，否则保存最终位置"""
+        if completed:
+            self.store.discard(self.key)
+        elif self.chars > 0:
+            self.save()
+
+
+class CheckpointStore:
+    """断点状态文件目录"""
+
+    def __init__(self, directory=None, interval=DEFAULT_CHECKPOINT_INTERVAL, min_size=CHECKPOINT_MIN_SIZE):
+        """
+        Args:
+            directory (str): 状态文件目录，默认 ~/.auto_typer/checkpoints
+            interval (float): 写入状态文件的最短间隔（秒）
+            min_size (int): 少于这么多字符（或字节）的文本不记录断点
+        """
+        self.directory = directory or os.path.join(APP_DIR, "checkpoints")
+        self.interval = interval
+        self.min_size = min_size
+
+    def _path(self, key):
+        return os.path.join(self.directory, f"{key}.json")
+
+    def load(self, key):
+        """
+        读取断点
+
+        Returns:
+            dict | None: {"chars", "total", "description", "updated"}，没有断点时返回 None
+        """
+        try:
+            with open(self._path(key), encoding="utf-8") as f:
+                state = json.load(f)
+        except (OSError, ValueError):
+            return None
+        if not isinstance(state, dict) or not isinstance(state.get("chars"), int) or state["chars"] <= 0:
+            return None
+        return state
+
+    def save(self, key, state):
+        """写入断点（先写临时文件再替换；写入失败时静默跳过）"""
+        try:
+            os.makedirs(self.directory, exist_ok=True)
+            temp_path = f"{self._path(key)}.tmp"
+            with open(temp_path, "w", encoding="utf-8") as f:
+                json.dump(state, f, ensure_ascii=False)
+            os.replace(temp_path, self._path(key))
+        except OSError:
+            pass
+
+    def discard(self, key):
+        """删除断点"""
+        try:
+            os.remove(self._path(key))
+        except OSError:
+            pass
+
+    def find(self, source):
+        """
+        查找文本来源的断点
+
+        Returns:
+            tuple: (断点键, 断点状态)；来源不支持续打时键为 None，没有断点时状态为 None
+        """
+        key = source_key(source)
+        if key is None:
+            return None, None
+        return key, self.load(key)
+
+    def open(self, source, key=None):
+        """
+        为一次打字创建断点
+
+        Args:
+            source (TextSource): 文本来源
+            key (str): 已算好的断点键（可选）
+
+        Returns:
+            Checkpoint | None: 来源不支持续打或文本太短时返回 None
+        """
+        if source.total is not None and source.total < self.min_size:
+            return None
+        key = key or source_key(source)
+        if key is None:
+            return None
+        total = source.total if isinstance(source, StringSource) else None
+        return Checkpoint(self, key, source.describe(), total, self.interval)
@@ -0,0 +1,233 @@
+"""
+剪贴板工具
+
+粘贴输入模式用到的剪贴板操作：发送粘贴快捷键、保存并恢复用户原来的剪贴板内容；
+以及剪贴板模式用到的段落索引和剪贴板监视器。
+
+pyperclip 在第一次读写剪贴板时才导入，只显示菜单或帮助时不必加载。
+"""
+
+import hashlib
+import sys
+from collections import deque
+from contextlib import contextmanager
+
+# 粘贴、全选、复制快捷键（macOS 使用 Command）
+PASTE_HOTKEY = ('command', 'v') if sys.platform == 'darwin' else ('ctrl', 'v')
+SELECT_ALL_HOTKEY = ('command', 'a') if sys.platform == 'darwin' else ('ctrl', 'a')
+COPY_HOTKEY = ('command', 'c') if sys.platform == 'darwin' else ('ctrl', 'c')
+# 剪贴板模式中的段落分隔符（空行）
+PARAGRAPH_SEPARATOR = "\n\n"
+
+# 剪贴板监视：轮询间隔从最短间隔开始，剪贴板没有变化时逐步放慢到最长间隔
+DEFAULT_WATCH_MIN_INTERVAL = 0.25
+DEFAULT_WATCH_MAX_INTERVAL = 2.0
+DEFAULT_WATCH_BACKOFF = 1.5
+# 记住最近多少条已排队的内容，重复复制时不再输入
+DEFAULT_WATCH_HISTORY = 20
+
+# 最近由本程序写入剪贴板的内容摘要（粘贴输入时写入的片段、恢复的原内容），监视剪贴板时忽略
+_own_copies = deque(maxlen=16)
+
+
+def _pyperclip():
+    import pyperclip
+    return pyperclip
+
+
+def _digest(text):
+    return hashlib.blake2b(text.encode("utf-8", errors="surrogatepass"), digest_size=16).digest()
+
+
+def copy_text(text):
+    """把文本写入剪贴板"""
+    _own_copies.append(_digest(text))
+    _pyperclip().copy(text)
+
+
+def paste_text():
+    """读取剪贴板中的文本"""
+    return _pyperclip().paste()
+
+
+def split_segments(text, segment_size):
+    """
+    把文本切成不超过 segment_size 个字符的片段
+
+    Yields:
+        str: 文本片段
+    """
+    for start in range(0, len(text), segment_size):
+        yield text[start:start + segment_size]
+
+
+@contextmanager
+def preserved_clipboard():
+    """
+    在 with 块结束后恢复进入前的剪贴板内容
+
+    只能保存文本内容；剪贴板里是图片等非文本数据时无法恢复。
+    读取剪贴板失败时不做恢复。
+    """
+    pyperclip = _pyperclip()
+    try:
+        saved = pyperclip.paste()
+    except pyperclip.PyperclipException:
+        saved = None
+
+    try:
+        yield
+    finally:
+        if saved is not None:
+            try:
+                # 通过 copy_text 恢复：恢复的内容也记为本程序写入，监视剪贴板时不会被当作新复制的内容
+                copy_text(saved)
+            except pyperclip.PyperclipException as e:
+                print(f"⚠️ 恢复剪贴板失败: {e}")
+
+
+class ParagraphIndex:
+    """
+    剪贴板文本的段落索引（以空行分隔，与 text.split("\\n\\n") 的划分相同）
+
+    只记录段落的起止位置，并且按需向后扫描：取第 N 段只需扫描到第 N 段结尾，
+    不会为其余段落分配字符串，开销与剪贴板总长度无关。
+    """
+
+    def __init__(self, text, separator=PARAGRAPH_SEPARATOR):
+        """
+        Args:
+            text (str): 剪贴板文本
+            separator (str): 段落分隔符
+        """
+        self.text = text
+        self.separator = separator
+        # 已扫描到的各段起始位置；_complete 为 True 时已扫描到文本末尾
+        self._starts = [0]
+        self._complete = False
+
+    def _scan_to(self, index):
+        """向后扫描，直到找到第 index 段的起始位置或到达文本末尾"""
+        starts = self._starts
+        while len(starts) <= index and not self._complete:
+            found = self.text.find(self.separator, starts[-1])
+            if found < 0:
+                self._complete = True
+            else:
+                starts.append(found + len(self.separator))
+        return index < len(starts)
+
+    def __len__(self):
+        """段落总数（需要扫描整个文本，但只记录位置）"""
+        while not self._complete:
+            self._scan_to(len(self._starts))
+        return len(self._starts)
+
+    def span(self, index):
+        """
+        第 index 段（从0开始）在文本中的位置
+
+        Returns:
+            tuple: (起始位置, 结束位置)，不含分隔符
+
+        Raises:
+            IndexError: 没有这一段
+        """
+        if index < 0 or not self._scan_to(index):
+            raise IndexError(f"没有第 {index + 1} 段")
+        start = self._starts[index]
+        if self._scan_to(index + 1):
+            return start, self._starts[index + 1] - len(self.separator)
+        return start, len(self.text)
+
+    def __getitem__(self, index):
+        """第 index 段的文本（去掉首尾空白）"""
+        start, end = self.span(index)
+        return self.text[start:end].strip()
+
+    def paragraphs(self, start=0, stop=None):
+        """
+        依次取出 [start, stop) 范围内的段落，跳过空段落
+
+        Yields:
+            tuple: (段落序号, 段落文本)
+        """
+        index = start
+        while (stop is None or index < stop) and self._scan_to(index):
+            paragraph = self[index]
+            if paragraph:
+                yield index, paragraph
+            index += 1
+
+
+class ClipboardWatcher:
+    """
+    剪贴板监视器：轮询剪贴板，发现新复制的文本时交给回调
+
+    每次轮询只比较内容摘要；剪贴板长时间没有变化时轮询间隔按 backoff 倍数放慢到 max_interval，
+    发现变化后立即恢复到 min_interval，空闲时几乎不占用 CPU。
+    空白内容、最近已交出过的内容以及本程序自己写入的内容（粘贴输入的片段、恢复的原内容）都会被忽略。
+    """
+
+    def __init__(self, min_interval=DEFAULT_WATCH_MIN_INTERVAL, max_interval=DEFAULT_WATCH_MAX_INTERVAL,
+                 backoff=DEFAULT_WATCH_BACKOFF, history=DEFAULT_WATCH_HISTORY, read=None):
+        """
+        Args:
+            min_interval (float): 最短轮询间隔（秒）
+            max_interval (float): 最长轮询间隔（秒）
+            backoff (float): 剪贴板没有变化时间隔乘以的系数
+            history (int): 记住最近多少条已交出的内容用于去重，0 表示不去重
+            read (callable): 读取剪贴板的函数，默认 paste_text
+        """
+        self.min_interval = min_interval
+        self.max_interval = max(min_interval, max_interval)
+        self.backoff = backoff
+        self.read = read or paste_text
+        # 下一次轮询前等待的时间（秒）
+        self.interval = min_interval
+        self._last = None
+        self._history = deque(maxlen=history) if history > 0 else None
+
+    def prime(self):
+        """把剪贴板当前的内容记为已读，只有之后复制的内容才会交出"""
+        self.poll()
+        self.interval = self.min_interval
+
+    def poll(self):
+        """
+        读取一次剪贴板
+
+        Returns:
+            str | None: 新复制的文本；没有变化、读取失败或内容被忽略时返回 None
+        """
+        try:
+            text = self.read()
+        except Exception:
+            text = None
+        digest = _digest(text) if text else None
+        if digest == self._last:
+            self.interval = min(self.max_interval, self.interval * self.backoff)
+            return None
+
+        self._last = digest
+        self.interval = self.min_interval
+        if digest is None or not text.strip() or digest in _own_copies:
+            return None
+        if self._history is not None:
+            if digest in self._history:
+                return None
+            self._history.append(digest)
+        return text
+
+    def watch(self, on_text, stop_event):
+        """
+        持续监视剪贴板，直到 stop_event 被设置
+
+        Args:
+            on_text (callable): 发现新内容时调用 on_text(文本)
+            stop_event (threading.Event): 停止监视
+        """
+        while not stop_event.wait(self.interval):
+            text = self.poll()
+            if text is not None:
+                on_text(text)
@@ -0,0 +1,314 @@
+"""
+增量输入（diff-typing）
+
+先输入草稿、修改原文、再输入一遍时，只需补上改动的部分。每个目标记住上一次完整输入的文本，
+下一次输入时与新文本做差异比较，生成最少的编辑操作：
+
+- 改动不多时用 Myers 算法直接逐字符求最少编辑（重复行很多的文本也能对齐到正确的位置）
+- 改动很多时先按行比较，再对改动的行逐字符细化（每一级同样先试 Myers 算法，编辑太多时用 difflib.SequenceMatcher）
+- 光标停在上次输入的末尾：移到第一处改动，从前往后依次用 Delete 删除旧字符、输入新字符，
+  最后移回末尾，下一次增量输入仍从末尾开始
+- 每次移动在"左右方向键逐字符移动"和"上下方向键换行 + Home / End + 左右方向键"中取按键最少的一种
+- 编辑脚本的按键次数不少于"全部删除再重打"时，直接退格删除全部旧文本并完整重打
+
+只使用方向键、Home / End、Delete 和退格，不依赖编辑器专有的快捷键。目标会自动换行显示长行时，
+上下方向键按显示行移动，需改用 NAVIGATE_CHARS（只用左右方向键）；
+目标中的自动缩进、自动补全括号等会改变文本的功能需要关闭。
+"""
+
+import difflib
+import hashlib
+import os
+from itertools import accumulate
+
+from auto_typer_plan import APP_DIR, KeyPlan, run_length, settings_from_options
+
+# 改动的行块不超过这么多字符时逐字符细化，更大的块整块替换（逐字符比较是平方级的）
+CHAR_DIFF_LIMIT = 4000
+# Myers 算法最多求这么多次插入、删除，超出后改用按行比较 / SequenceMatcher（耗时与编辑数的平方成正比）
+MYERS_MAX_EDITS = 500
+# 逐字符细化改动的行块时 Myers 算法的编辑数上限（行块很多，每块只做小范围的尝试）
+MYERS_REFINE_EDITS = 8
+
+# 编辑用到的按键
+KEY_LEFT = "left"
+KEY_RIGHT = "right"
+KEY_DELETE = "delete"
+KEY_BACKSPACE = "backspace"
+KEY_UP = "up"
+KEY_DOWN = "down"
+KEY_HOME = "home"
+KEY_END = "end"
+
+# 光标移动方式
+NAVIGATE_LINES = "lines"    # 上下方向键换行，Home / End 定位行首行尾
+NAVIGATE_CHARS = "chars"    # 只用左右方向键（适合自动换行显示的目标）
+NAVIGATIONS = (NAVIGATE_LINES, NAVIGATE_CHARS)
+
+# 默认的目标名称
+DEFAULT_TARGET = "default"
+
+
+def diff_edits(old, new):
+    """
+    计算把 old 改成 new 的编辑列表
+
+    Args:
+        old (str): 上次输入的文本
+        new (str): 新文本
+
+    Returns:
+        list: [(i1, i2, j1, j2)]，按位置从前往后，表示把 old[i1:i2] 替换为 new[j1:j2]
+    """
+    edits = _myers_blocks(old, new)
+    if edits is not None:
+        return edits
+
+    old_lines = old.splitlines(keepends=True)
+    new_lines = new.splitlines(keepends=True)
+    old_offsets = [0] + list(accumulate(map(len, old_lines)))
+    new_offsets = [0] + list(accumulate(map(len, new_lines)))
+
+    edits = []
+    for a1, a2, b1, b2 in _changed_blocks(old_lines, new_lines):
+        i1, i2, j1, j2 = old_offsets[a1], old_offsets[a2], new_offsets[b1], new_offsets[b2]
+        if i1 < i2 and j1 < j2 and (i2 - i1) + (j2 - j1) <= CHAR_DIFF_LIMIT:
+            for c1, c2, d1, d2 in _changed_blocks(old[i1:i2], new[j1:j2], MYERS_REFINE_EDITS):
+                edits.append((i1 + c1, i1 + c2, j1 + d1, j1 + d2))
+        else:
+            edits.append((i1, i2, j1, j2))
+    return edits
+
+
+def _changed_blocks(a, b, max_edits=MYERS_MAX_EDITS):
+    """
+    比较两个序列：编辑不超过 max_edits 次时用 Myers 算法，否则用 SequenceMatcher
+
+    Returns:
+        list: [(i1, i2, j1, j2)]，按位置从前往后，表示 a[i1:i2] 替换为 b[j1:j2]
+    """
+    blocks = _myers_blocks(a, b, max_edits)
+    if blocks is None:
+        matcher = difflib.SequenceMatcher(None, a, b, autojunk=False)
+        blocks = [(i1, i2, j1, j2) for tag, i1, i2, j1, j2 in matcher.get_opcodes() if tag != "equal"]
+    return blocks
+
+
+def _myers_blocks(a, b, max_edits=MYERS_MAX_EDITS):
+    """
+    Myers 差异算法：求插入、删除次数最少的编辑
+
+    SequenceMatcher 先找最长的相同块，文本中重复的行很多时可能错位对齐，产生大段的删除和插入；
+    回读校验、增量输入的改动通常不多，用最少编辑对齐更准确。
+
+    Returns:
+        list | None: 同 _changed_blocks；编辑数超过 max_edits 时返回 None
+    """
+    n, m = len(a), len(b)
+    offset = max_edits + 1
+    # frontier[offset + k]: 第 k 条对角线（x - y = k）上走到的最远 x
+    frontier = [0] * (2 * max_edits + 3)
+    history = []
+    for edits in range(max_edits + 1):
+        history.append(frontier[:])
+        for k in range(-edits, edits + 1, 2):
+            if k == -edits or (k != edits and frontier[offset + k - 1] < frontier[offset + k + 1]):
+                x = frontier[offset + k + 1]
+            else:
+                x = frontier[offset + k - 1] + 1
+            y = x - k
+            common = _common_length(a, b, x, y)
+            x += common
+            y += common
+            frontier[offset + k] = x
+            if x >= n and y >= m:
+                return _myers_path(history, offset, n, m)
+    return None
+
+
+def _common_length(a, b, x, y):
+    """a[x:] 与 b[y:] 相同的开头长度：按倍增的长度整段比较切片，长段相同的文本不必逐个元素比较"""
+    limit = min(len(a) - x, len(b) - y)
+    if limit <= 0 or a[x] != b[y]:
+        return 0
+    length = 0
+    step = 8
+    while length < limit:
+        step = min(step, limit - length)
+        if a[x + length:x + length + step] == b[y + length:y + length + step]:
+            length += step
+            step *= 2
+        elif step == 1:
+            break
+        else:
+            step //= 2
+    return length
+
+
+def _myers_path(history, offset, x, y):
+    """从终点回溯 Myers 算法的路径，把相邻的插入、删除合并为块"""
+    steps = []
+    for edits in range(len(history) - 1, 0, -1):
+        frontier = history[edits]
+        k = x - y
+        if k == -edits or (k != edits and frontier[offset + k - 1] < frontier[offset + k + 1]):
+            previous_x = frontier[offset + k + 1]
+            previous_y = previous_x - k - 1
+            steps.append((previous_x, previous_x, previous_y, previous_y + 1))
+        else:
+            previous_x = frontier[offset + k - 1]
+            previous_y = previous_x - k + 1
+            steps.append((previous_x, previous_x + 1, previous_y, previous_y))
+        x, y = previous_x, previous_y
+
+    blocks = []
+    for i1, i2, j1, j2 in reversed(steps):
+        if blocks and blocks[-1][1] == i1 and blocks[-1][3] == j1:
+            blocks[-1] = (blocks[-1][0], i2, blocks[-1][2], j2)
+        else:
+            blocks.append((i1, i2, j1, j2))
+    return blocks
+
+
+def compile_diff_plan(old, new, delay, navigation=NAVIGATE_LINES, **options):
+    """
+    编译增量输入计划：光标位于 old 的末尾，执行后目标中的文本变为 new，光标回到末尾
+
+    Args:
+        old (str): 上次输入的文本
+        new (str): 新文本
+        delay (float): 每个字符之间的延迟时间（秒）
+        navigation (str): 光标移动方式（NAVIGATE_LINES / NAVIGATE_CHARS）
+        **options: 其余编译设置（同 compile_plan）
+
+    Returns:
+        tuple: (KeyPlan, 编辑处数)；编辑处数为 None 表示编辑脚本不划算，计划为全部删除后完整重打
+    """
+    if navigation not in NAVIGATIONS:
+        raise ValueError(f"未知的光标移动方式: {navigation}（可选: {', '.join(NAVIGATIONS)}）")
+    settings = settings_from_options(options)
+    size = run_length(delay, settings["batch_window"], settings["max_run"])
+
+    retype = KeyPlan(new, delay, settings)
+    _add_presses(retype, KEY_BACKSPACE, len(old), size)
+    retype.add_text(0, len(new))
+
+    edits = diff_edits(old, new)
+    plan = KeyPlan(new, delay, settings)
+    if edits:
+        # 从旧文本末尾移到第一处改动（此时目标中全是旧文本）
+        first = edits[0][0]
+        _add_move(plan, size, navigation, first - len(old), -old.count("\n", first),
+                  *_line_info(old, first, old, first))
+        cursor = edits[0][2]
+        for i1, i2, j1, j2 in edits:
+            # 已改完的部分与新文本相同，光标之后仍是旧文本，两处改动之间的文本新旧相同
+            if j1 > cursor:
+                _add_move(plan, size, navigation, j1 - cursor, new.count("\n", cursor, j1),
+                          *_line_info(new, j1, old, i1))
+            _add_presses(plan, KEY_DELETE, i2 - i1, size)
+            plan.add_text(j1, j2)
+            cursor = j2
+        # 移回末尾
+        if cursor < len(new):
+            _add_move(plan, size, navigation, len(new) - cursor, new.count("\n", cursor),
+                      *_line_info(new, len(new), new, len(new)))
+
+    if plan.keystrokes() >= retype.keystrokes():
+        return retype, None
+    return plan, len(edits)
+
+
+def _line_info(head, head_position, tail, tail_position):
+    """
+    移动目标所在行的信息
+
+    Args:
+        head (str): 目标位置所在行的前半部分取自 head[:head_position]
+        head_position (int): 目标位置在 head 中的下标
+        tail (str): 目标位置所在行的后半部分取自 tail[tail_position:]
+        tail_position (int): 目标位置在 tail 中的下标
+
+    Returns:
+        tuple: (列号, 到行尾的字符数, 行首是否为空白)
+    """
+    line_start = head.rfind("\n", 0, head_position) + 1
+    line_end = tail.find("\n", tail_position)
+    if line_end < 0:
+        line_end = len(tail)
+    first = head[line_start] if line_start < head_position else tail[tail_position:tail_position + 1]
+    return head_position - line_start, line_end - tail_position, first in (" ", "\t")
+
+
+def _add_move(plan, size, navigation, distance, lines, column, remaining, indented):
+    """
+    追加把光标移动 distance 个字符（跨 lines 行）的按键，选按键最少的方式
+
+    行首有空白时不用 Home：许多编辑器的 Home 先跳到第一个非空白字符。
+    """
+    routes = [(abs(distance), None)]
+    if navigation == NAVIGATE_LINES:
+        routes.append((abs(lines) + 1 + remaining, KEY_END))
+        if not indented:
+            routes.append((abs(lines) + 1 + column, KEY_HOME))
+    _, anchor = min(routes, key=lambda route: route[0])
+
+    if anchor is None:
+        _add_presses(plan, KEY_RIGHT if distance > 0 else KEY_LEFT, abs(distance), size)
+        return
+    _add_presses(plan, KEY_DOWN if lines > 0 else KEY_UP, abs(lines), size)
+    plan.add_key(anchor)
+    if anchor == KEY_END:
+        _add_presses(plan, KEY_LEFT, remaining, size)
+    else:
+        _add_presses(plan, KEY_RIGHT, column, size)
+
+
+def _add_presses(plan, key, count, size):
+    """追加 count 次按键，按批次大小切分，使长距离移动也能按节奏进行并随时停止"""
+    for start in range(0, count, size):
+        plan.add_key(key, min(size, count - start))
+
+
+class TypedTextStore:
+    """记录每个目标上一次完整输入的文本"""
+
+    def __init__(self, directory=None):
+        """
+        Args:
+            directory (str): 保存目录，默认 ~/.auto_typer/typed
+        """
+        self.directory = directory or os.path.join(APP_DIR, "typed")
+
+    def _path(self, target):
+        name = hashlib.sha256(target.encode("utf-8")).hexdigest()[:32]
+        return os.path.join(self.directory, f"{name}.txt")
+
+    def get(self, target):
+        """
+        Returns:
+            str | None: 上次输入的文本，没有记录时返回 None
+        """
+        try:
+            with open(self._path(target), encoding="utf-8", newline="") as f:
+                return f.read()
+        except (OSError, UnicodeDecodeError):
+            return None
+
+    def put(self, target, text):
+        """记录输入完成的文本（写入失败时静默跳过，下次会完整重打）"""
+        try:
+            os.makedirs(self.directory, exist_ok=True)
+            temp_path = f"{self._path(target)}.tmp"
+            with open(temp_path, "w", encoding="utf-8", newline="") as f:
+                f.write(text)
+            os.replace(temp_path, self._path(target))
+        except OSError:
+            pass
+
+    def forget(self, target):
+        """删除记录（目标中的文本状态未知时使用）"""
+        try:
+            os.remove(self._path(target))
+        except OSError:
+            pass
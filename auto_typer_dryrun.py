@@ -0,0 +1,325 @@
+"""
+试运行与用时预测
+
+试运行（dry run）把文本编译成完整的打字计划，再按校准过的后端耗时模型模拟打字引擎的节奏调度，
+不发送任何按键，报告预计用时、按键次数和最慢的几行。
+
+后端耗时模型为：
+
+- 打字 / 按键批次: 每次调用的固定开销 + 每个字符的开销
+- 粘贴: 每次粘贴的开销（写剪贴板 + 快捷键），之后再加上粘贴等待时间
+
+校准（calibrate）在当前光标位置真实输入一小段样本文本来测量这些开销，每台机器每个后端只需做一次，
+结果保存在 ~/.auto_typer/calibration.json；没有校准时使用各后端的典型值。
+"""
+
+import json
+import os
+import time
+from bisect import bisect_right
+
+from auto_typer_clipboard import preserved_clipboard
+from auto_typer_plan import APP_DIR, OP_HOTKEY, OP_KEY, OP_PASTE, OP_TYPE, OP_WAIT
+
+# 未校准时各后端的典型开销（秒）：(每次调用, 每个字符, 每次粘贴)
+DEFAULT_COSTS = {
+    "pyautogui": (0.0005, 0.0012, 0.03),
+    "xtest": (0.00005, 0.00003, 0.03),
+    "null": (0.0, 0.0, 0.0),
+    "recording": (0.0, 0.0, 0.0),
+}
+# 未知后端按 pyautogui 估算
+FALLBACK_COSTS = DEFAULT_COSTS["pyautogui"]
+
+# 校准时输入的样本文本
+CALIBRATION_TEXT = "calibration sample text 0123456789 "
+# 校准时测量的批次大小（字符）及每种大小的重复次数
+CALIBRATION_SIZES = (1, 16)
+CALIBRATION_REPEAT = 10
+CALIBRATION_PASTES = 3
+
+# 试运行报告中列出的最慢行数
+SLOWEST_LINES = 5
+
+
+class BackendCosts:
+    """一个后端的耗时模型"""
+
+    def __init__(self, backend, per_call, per_char, paste_call, calibrated_at=None):
+        """
+        Args:
+            backend (str): 后端名称
+            per_call (float): 每次打字 / 按键调用的固定开销（秒）
+            per_char (float): 每个字符的开销（秒）
+            paste_call (float): 每次粘贴的开销（秒）
+            calibrated_at (float): 校准时间（Unix 时间戳），使用典型值时为 None
+        """
+        self.backend = backend
+        self.per_call = per_call
+        self.per_char = per_char
+        self.paste_call = paste_call
+        self.calibrated_at = calibrated_at
+
+    @classmethod
+    def default(cls, backend):
+        """未校准时的典型值"""
+        return cls(backend, *DEFAULT_COSTS.get(backend, FALLBACK_COSTS))
+
+    @property
+    def calibrated(self):
+        return self.calibrated_at is not None
+
+    def call_cost(self, chars):
+        """发出 chars 个字符的一次调用的耗时（秒）"""
+        return self.per_call + self.per_char * chars
+
+    def to_dict(self):
+        return {
+            "per_call": self.per_call,
+            "per_char": self.per_char,
+            "paste_call": self.paste_call,
+            "calibrated_at": self.calibrated_at,
+        }
+
+    @classmethod
+    def from_dict(cls, backend, data):
+        return cls(backend, float(data["per_call"]), float(data["per_char"]), float(data["paste_call"]),
+                   data.get("calibrated_at"))
+
+
+class CalibrationStore:
+    """校准结果文件：按 主机名 -> 后端名称 保存"""
+
+    def __init__(self, path=None):
+        """
+        Args:
+            path (str): 文件路径，默认 ~/.auto_typer/calibration.json
+        """
+        self.path = path or os.path.join(APP_DIR, "calibration.json")
+
+    @staticmethod
+    def _machine():
+        import platform
+        return platform.node() or "default"
+
+    def _read(self):
+        try:
+            with open(self.path, encoding="utf-8") as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            return {}
+        return data if isinstance(data, dict) else {}
+
+    def load(self, backend):
+        """
+        读取后端的耗时模型
+
+        Returns:
+            BackendCosts: 没有校准结果时返回典型值
+        """
+        entry = self._read().get(self._machine(), {}).get(backend)
+        if isinstance(entry, dict):
+            try:
+                return BackendCosts.from_dict(backend, entry)
+            except (KeyError, TypeError, ValueError):
+                pass
+        return BackendCosts.default(backend)
+
+    def save(self, costs):
+        """保存校准结果（写入失败时静默跳过）"""
+        data = self._read()
+        data.setdefault(self._machine(), {})[costs.backend] = costs.to_dict()
+        try:
+            os.makedirs(os.path.dirname(self.path), exist_ok=True)
+            temp_path = f"{self.path}.tmp"
+            with open(temp_path, "w", encoding="utf-8") as f:
+                json.dump(data, f, ensure_ascii=False, indent=2)
+            os.replace(temp_path, self.path)
+        except OSError:
+            pass
+
+
+def calibrate(backend, paste=True):
+    """
+    在当前光标位置真实输入样本文本，测量后端开销
+
+    会输入约 200 个字符（以及 paste 为 True 时的3次粘贴），请先把光标放在可以随意输入的地方。
+
+    Args:
+        backend (KeyBackend): 按键后端
+        paste (bool): 是否测量粘贴开销
+
+    Returns:
+        BackendCosts: 测量结果
+    """
+    sample = CALIBRATION_TEXT * (max(CALIBRATION_SIZES) // len(CALIBRATION_TEXT) + 1)
+    averages = []
+    for size in CALIBRATION_SIZES:
+        text = sample[:size]
+        start = time.perf_counter()
+        for _ in range(CALIBRATION_REPEAT):
+            backend.write(text)
+            backend.flush()
+            backend.sync()
+        averages.append((time.perf_counter() - start) / CALIBRATION_REPEAT)
+
+    # 两点直线拟合：cost = per_call + per_char × 字符数
+    (small, small_cost), (large, large_cost) = zip(CALIBRATION_SIZES, averages)
+    per_char = max(0.0, (large_cost - small_cost) / (large - small))
+    per_call = max(0.0, small_cost - per_char * small)
+
+    paste_call = DEFAULT_COSTS.get(backend.name, FALLBACK_COSTS)[2]
+    if paste and backend.pastes_via_clipboard:
+        with preserved_clipboard():
+            start = time.perf_counter()
+            for _ in range(CALIBRATION_PASTES):
+                backend.paste(CALIBRATION_TEXT)
+                backend.flush()
+                backend.sync()
+            paste_call = (time.perf_counter() - start) / CALIBRATION_PASTES
+    elif not backend.pastes_via_clipboard:
+        paste_call = per_call + per_char * len(CALIBRATION_TEXT)
+    return BackendCosts(backend.name, per_call, per_char, paste_call, time.time())
+
+
+class DryRunReport:
+    """试运行结果"""
+
+    def __init__(self, costs):
+        self.costs = costs
+        # 预计用时（秒）
+        self.duration = 0.0
+        self.chars = 0
+        self.keystrokes = 0
+        self.pastes = 0
+        # 预计后端调用总耗时（秒），其余为节奏等待
+        self.backend_time = 0.0
+        # [(行号, 预计用时, 行首预览)]，按用时从大到小
+        self.slowest = []
+        # 进度表：已输入字符数 -> 预计已用时间，用于计算剩余时间
+        self._marks = [0]
+        self._times = [0.0]
+
+    def elapsed_at(self, chars):
+        """输入前 chars 个字符时的预计用时（秒）"""
+        index = bisect_right(self._marks, chars) - 1
+        return self._times[max(index, 0)]
+
+    def remaining(self, fraction):
+        """
+        按进度比例估算剩余时间
+
+        Args:
+            fraction (float): 已完成的比例（0-1）
+
+        Returns:
+            float: 预计剩余秒数
+        """
+        return max(0.0, self.duration - self.elapsed_at(int(self.chars * fraction)))
+
+    def format_report(self):
+        """格式化为多行报告"""
+        source = "已校准" if self.costs.calibrated else "典型值，可用 --calibrate 校准"
+        lines = [
+            f"🧪 试运行（未发送任何按键）",
+            f"⏱️ 预计用时: {format_duration(self.duration)}（其中后端开销 {self.backend_time:.2f}秒）",
+            f"⌨️ 字符数: {self.chars} | 按键次数: {self.keystrokes} | 粘贴次数: {self.pastes}",
+            f"🔧 后端耗时模型: {self.costs.backend}（{source}）",
+        ]
+        if self.slowest:
+            lines.append("🐢 最慢的几行:")
+            for line_number, seconds, preview in self.slowest:
+                lines.append(f"   第 {line_number} 行 {seconds:.2f}秒  {preview}")
+        return "\n".join(lines)
+
+
+def dry_run(engine, source, delay, mode=None, costs=None, skip=0):
+    """
+    模拟输入整个文本来源，不发送任何按键
+
+    Args:
+        engine (TypingEngine): 打字引擎（使用其编译设置和拟人节奏）
+        source (TextSource): 文本来源
+        delay (float): 每个字符之间的延迟时间（秒）
+        mode (str): 输入模式，None 表示使用引擎的默认模式
+        costs (BackendCosts): 后端耗时模型，默认读取引擎当前后端的校准结果
+        skip (int): 跳过开头的字符数
+
+    Returns:
+        DryRunReport: 试运行结果
+    """
+    if costs is None:
+        costs = CalibrationStore().load(engine.backend_name)
+    report = DryRunReport(costs)
+    timing = engine.timing
+    line_times = {}
+    previews = {}
+
+    # 模拟 DeadlineScheduler：now 为模拟时钟，deadline 为下一次按键的截止时间
+    now = deadline = 0.0
+    line = 1
+    for plan, _, _ in engine._source_plans(source, delay, mode, skip):
+        text = plan.text
+        keys = plan.keys
+        expected = timing.delays(text, plan.delay, expected=True) if timing is not None else None
+        line_start = 0
+        for op, a, b in plan:
+            started = now
+            if op == OP_PASTE:
+                cost = costs.paste_call
+                now += cost + plan.paste_delay
+                deadline = max(deadline, now)
+                report.pastes += 1
+                report.keystrokes += 1
+            elif op == OP_WAIT:
+                now += a / 1e6
+                deadline = max(deadline, now)
+                cost = 0.0
+            else:
+                now = max(now, deadline)
+                if op == OP_TYPE:
+                    count = b - a
+                    pace = sum(expected[a:b]) if expected is not None else count * plan.delay
+                elif op == OP_KEY:
+                    count = b
+                    pace = count * plan.delay
+                else:
+                    count = len(keys[a].split("+"))
+                    pace = plan.delay
+                cost = costs.call_cost(count)
+                now += cost
+                deadline += pace
+                report.keystrokes += count if op != OP_HOTKEY else 1
+            report.backend_time += cost
+
+            if op in (OP_TYPE, OP_PASTE):
+                # 按行累计用时：操作的用时记到它开头所在的行
+                newlines = text.count("\n", line_start, a)
+                if newlines:
+                    line += newlines
+                    line_start = text.rfind("\n", line_start, a) + 1
+                if line not in previews:
+                    previews[line] = text[line_start:line_start + 40].split("\n", 1)[0]
+                line_times[line] = line_times.get(line, 0.0) + (now - started)
+                report._marks.append(report.chars + b)
+                report._times.append(now)
+        line += text.count("\n", line_start)
+        report.chars += len(text)
+
+    # 正常结束时等满最后一个间隔
+    report.duration = max(now, deadline)
+    slowest = sorted(line_times.items(), key=lambda item: item[1], reverse=True)[:SLOWEST_LINES]
+    report.slowest = [(number, seconds, previews.get(number, "")) for number, seconds in slowest]
+    return report
+
+
+def format_duration(seconds):
+    """把秒数格式化为 "1分20秒" 之类的字符串"""
+    if seconds < 60:
+        return f"{seconds:.1f}秒"
+    seconds = int(round(seconds))
+    minutes, seconds = divmod(seconds, 60)
+    if minutes < 60:
+        return f"{minutes}分{seconds:02d}秒"
+    hours, minutes = divmod(minutes, 60)
+    return f"{hours}小时{minutes:02d}分"
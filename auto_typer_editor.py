@@ -0,0 +1,300 @@
+"""
+编辑器感知的按键精简
+
+往 IDE 里输入源代码时，编辑器会自己插入一部分字符：换行后自动缩进、输入左括号时自动补上右括号。
+照原文逐字输入会让这些字符重复出现。选择与目标编辑器相符的配置（EditorProfile）后，
+编译打字计划时对打字段做一遍精简：
+
+- 自动缩进：换行后只补上编辑器缩进与原文缩进的差值，缩进多了用退格删除
+  （能"退格删除一级缩进"的编辑器按级删除）；以右括号开头的行交给编辑器自动减少缩进
+- 自动补全括号：右括号在同一行内紧接着输入时会被编辑器"跳过"，无需处理；
+  右括号不在同一行的左括号，输入后立即按 Delete 删掉编辑器补上的右括号
+- 连续重复字符（分隔线、对齐空格等）在后端支持按键重复时合并为一次按键调用
+
+配置必须与编辑器的实际行为一致，否则输出会出错；可用 register_profile 注册自定义配置。
+"""
+
+from auto_typer_plan import OP_TYPE
+
+# 连续重复至少这么多个、且至少占满两个批次的相同字符合并为一次按键调用
+# （快速输入时一个批次本来就能装下整段重复字符，合并反而会把批次拆开）
+REPEAT_MIN = 4
+
+# 编辑器自动补全的括号
+BRACKET_PAIRS = {"(": ")", "[": "]", "{": "}"}
+# Python 编辑器在这些语句之后自动减少缩进
+PYTHON_DEDENT_KEYWORDS = ("return", "pass", "break", "continue", "raise")
+
+KEY_BACKSPACE = "backspace"
+KEY_DELETE = "delete"
+
+
+class EditorProfile:
+    """目标编辑器的自动输入行为"""
+
+    def __init__(self, name, auto_indent=False, indent_unit="    ", indent_after="", dedent_after=(),
+                 auto_pairs=None, outdent_closers="", trims_blank_lines=False, backspace_unindents=False):
+        """
+        Args:
+            name (str): 配置名称
+            auto_indent (bool): 换行后是否自动插入与上一行相同的缩进
+            indent_unit (str): 一级缩进
+            indent_after (str): 行末为这些字符时，下一行多缩进一级
+            dedent_after (tuple): 以这些关键字开头的行之后，下一行少缩进一级
+            auto_pairs (dict): 左括号 -> 编辑器自动补上的右括号
+            outdent_closers (str): 在行首输入这些字符时，编辑器自动把该行减少一级缩进
+            trims_blank_lines (bool): 离开只有自动缩进的空行时，编辑器是否自动删除这些空白
+            backspace_unindents (bool): 在缩进中按退格是否删除到上一个缩进位置
+        """
+        self.name = name
+        self.auto_indent = auto_indent
+        self.indent_unit = indent_unit
+        self.indent_after = indent_after
+        self.dedent_after = dedent_after
+        self.auto_pairs = auto_pairs or {}
+        self.outdent_closers = outdent_closers
+        self.trims_blank_lines = trims_blank_lines
+        self.backspace_unindents = backspace_unindents
+
+    def new_line_indent(self, line):
+        """
+        在内容为 line 的行末按下回车后，编辑器为新行插入的缩进
+
+        Args:
+            line (str): 当前行在编辑器中的内容
+        """
+        if not self.auto_indent:
+            return ""
+        stripped = line.strip()
+        indent = line[:len(line) - len(line.lstrip(" \t"))]
+        if stripped and stripped[-1] in self.indent_after:
+            return indent + self.indent_unit
+        if stripped and stripped.split(None, 1)[0] in self.dedent_after:
+            return self.dedent(indent)
+        return indent
+
+    def dedent(self, indent):
+        """减少一级缩进"""
+        unit = self.indent_unit
+        return indent[:-len(unit)] if unit and indent.endswith(unit) else indent
+
+    def backspaces(self, indent, keep):
+        """
+        把光标前的缩进 indent 删到剩下 keep（indent 的前缀）所需的退格次数
+
+        Returns:
+            tuple: (退格次数, 删除后实际剩下的缩进长度)；按级删除可能删过头，剩下的部分需要重新输入
+        """
+        unit = len(self.indent_unit)
+        if not (self.backspace_unindents and unit and indent.strip(" ") == ""):
+            return len(indent) - len(keep), len(keep)
+        column = len(indent)
+        presses = 0
+        while column > len(keep):
+            column -= (column - 1) % unit + 1
+            presses += 1
+        return presses, column
+
+
+# 内置配置
+EDITOR_PROFILES = {}
+
+
+def register_profile(profile):
+    """注册编辑器配置"""
+    EDITOR_PROFILES[profile.name] = profile
+    return profile
+
+
+# 记事本、网页文本框等：没有任何自动输入，只合并重复字符
+register_profile(EditorProfile("plain"))
+# gedit、Kate、nano -i 等：换行后保持上一行的缩进
+register_profile(EditorProfile("autoindent", auto_indent=True))
+# VS Code（JavaScript / C 等花括号语言）
+register_profile(EditorProfile("vscode", auto_indent=True, indent_after="{[(", auto_pairs=BRACKET_PAIRS,
+                               outdent_closers="}])", trims_blank_lines=True, backspace_unindents=True))
+# VS Code（Python）
+register_profile(EditorProfile("vscode-python", auto_indent=True, indent_after=":{[(",
+                               dedent_after=PYTHON_DEDENT_KEYWORDS, auto_pairs=BRACKET_PAIRS,
+                               outdent_closers="}])", trims_blank_lines=True, backspace_unindents=True))
+
+
+def get_profile(name):
+    """
+    Raises:
+        ValueError: 未知的配置名称
+    """
+    profile = EDITOR_PROFILES.get(name)
+    if profile is None:
+        raise ValueError(f"未知的编辑器配置: {name}（可选: {', '.join(EDITOR_PROFILES)}）")
+    return profile
+
+
+def add_editor_text(plan, start, end, profile, size, key_repeat):
+    """
+    追加输入打字段 text[start:end] 的精简操作
+
+    打字段从行首开始时，当前行视为空行（前一段粘贴的内容不会触发自动缩进，
+    前一个打字段以换行结束时已删掉编辑器插入的缩进）。
+
+    Args:
+        plan (KeyPlan): 打字计划（plan.context 为计划之前已输入的文本，用于确定当前行的内容）
+        start (int): 起始位置
+        end (int): 结束位置
+        profile (EditorProfile): 编辑器配置
+        size (int): 每个批次的字符数
+        key_repeat (bool): 后端能否在一次调用中重复按键
+    """
+    text = plan.text
+    line_start = text.rfind("\n", 0, start) + 1
+    if line_start:
+        line = text[line_start:start]
+    else:
+        context = plan.context
+        line = context[context.rfind("\n") + 1:] + text[:start]
+
+    position = start
+    if profile.outdent_closers and not line.strip(" \t"):
+        # 本行到目前为止只有缩进（包括上一段输入的部分），接着是右括号时编辑器会减少一级缩进：先多输入一级
+        segment = text[start:end]
+        content = end - len(segment.lstrip(" \t"))
+        if content < end and text[content] in profile.outdent_closers and line + text[start:content]:
+            _add_run(plan, start, content, size, key_repeat)
+            for char in profile.indent_unit:
+                plan.add_key(char)
+            position = content
+            line += text[start:content]
+    while True:
+        newline = text.find("\n", position, end)
+        line_end = end if newline < 0 else newline
+        _add_line(plan, position, line_end, profile, size, key_repeat)
+        if newline < 0:
+            return
+        line += text[position:newline]
+        _add_run(plan, newline, newline + 1, size, key_repeat)
+        indent = profile.new_line_indent(line)
+        position = newline + 1
+
+        # 新的一行：编辑器已插入 indent，按原文调整
+        next_newline = text.find("\n", position, end)
+        line_end = end if next_newline < 0 else next_newline
+        desired = text[position:line_end]
+        if not desired and (next_newline < 0 or not profile.trims_blank_lines):
+            # 空行（或打字段在行首结束）：删掉自动缩进；会自动清理空行的编辑器保留缩进，按回车时由它删除
+            _add_presses(plan, KEY_BACKSPACE, profile.backspaces(indent, "")[0], size, key_repeat)
+            line = ""
+        elif not desired:
+            line = indent
+        else:
+            content = desired.lstrip(" \t")
+            wanted = desired[:len(desired) - len(content)]
+            if content[:1] and content[0] in profile.outdent_closers and wanted:
+                # 输入右括号时编辑器自己减少一级缩进：先调整到比原文多一级（能少一级时）
+                if wanted == profile.dedent(indent):
+                    pass
+                elif profile.dedent(wanted + profile.indent_unit) == wanted:
+                    _adjust_indent(plan, position, indent, wanted, profile, size, key_repeat,
+                                   extra=profile.indent_unit)
+                else:
+                    _adjust_indent(plan, position, indent, wanted, profile, size, key_repeat)
+            else:
+                # 只有空白的行要重新输入，否则会被当作自动缩进清理掉
+                retype = not content and profile.trims_blank_lines
+                _adjust_indent(plan, position, indent, wanted, profile, size, key_repeat, retype)
+            position += len(wanted)
+            line = wanted
+
+
+def _adjust_indent(plan, position, indent, wanted, profile, size, key_repeat, retype=False, extra=""):
+    """
+    把编辑器插入的缩进 indent 调整为原文的缩进 wanted（text[position:position + len(wanted)]）再加上 extra
+
+    Args:
+        retype (bool): 是否删掉全部自动缩进后重新输入
+        extra (str): 原文之外多输入的缩进（逐个按键输入）
+    """
+    target = wanted + extra
+    common = 0
+    while not retype and common < min(len(indent), len(target)) and indent[common] == target[common]:
+        common += 1
+    presses, remaining = profile.backspaces(indent, indent[:common])
+    _add_presses(plan, KEY_BACKSPACE, presses, size, key_repeat)
+    _add_run(plan, position + min(remaining, len(wanted)), position + len(wanted), size, key_repeat)
+    for char in target[max(remaining, len(wanted)):]:
+        plan.add_key(char)
+
+
+def _add_line(plan, start, end, profile, size, key_repeat):
+    """输入同一行内的 text[start:end]，处理自动补全的右括号"""
+    if not profile.auto_pairs:
+        _add_run(plan, start, end, size, key_repeat)
+        return
+    unclosed = _unclosed_openers(plan.text, start, end, profile.auto_pairs)
+    position = start
+    for opener in unclosed:
+        _add_run(plan, position, opener + 1, size, key_repeat)
+        plan.add_key(KEY_DELETE)
+        position = opener + 1
+    _add_run(plan, position, end, size, key_repeat)
+
+
+def _unclosed_openers(text, start, end, pairs):
+    """
+    模拟编辑器的自动补全：右括号紧挨在光标右边时，输入同一个字符会跳过它而不是再插入一个
+
+    Returns:
+        list: 补上的右括号在本行内不会被跳过的左括号位置（输入后需要删掉补上的右括号）
+    """
+    unclosed = set()
+    while True:
+        pending = []
+        for position in range(start, end):
+            char = text[position]
+            if pending and pending[-1][1] == char:
+                pending.pop()
+            elif char in pairs and position not in unclosed:
+                pending.append((position, pairs[char]))
+        found = {position for position, _ in pending}
+        if not found:
+            return sorted(unclosed)
+        unclosed |= found
+
+
+def _add_run(plan, start, end, size, key_repeat):
+    """输入 text[start:end]：连续重复的字符合并为一次按键，其余按批次输入"""
+    text = plan.text
+    position = start
+    minimum = max(REPEAT_MIN, 2 * size)
+    if key_repeat and end - start >= minimum:
+        index = start
+        while index < end:
+            char = text[index]
+            run_end = index + 1
+            while run_end < end and text[run_end] == char:
+                run_end += 1
+            if run_end - index >= minimum and _repeatable(char):
+                _add_batches(plan, position, index, size)
+                plan.add_key(char, run_end - index)
+                position = run_end
+            index = run_end
+    _add_batches(plan, position, end, size)
+
+
+def _repeatable(char):
+    # 只合并可直接按键的字符；换行会触发自动缩进，不合并
+    return char == "\t" or " " <= char <= "~"
+
+
+def _add_batches(plan, start, end, size):
+    for batch_start in range(start, end, size):
+        plan.add(OP_TYPE, batch_start, min(batch_start + size, end))
+
+
+def _add_presses(plan, key, count, size, key_repeat):
+    if not count:
+        return
+    if key_repeat:
+        plan.add_key(key, count)
+        return
+    for start in range(0, count, size):
+        plan.add_key(key, min(size, count - start))
@@ -0,0 +1,527 @@
+"""
+打字引擎
+
+命令行版和图形界面版共用的打字循环。文本先由 auto_typer_plan 编译成打字计划：
+文本被切成若干"字符批次"，每个批次只调用一次后端，从而把后端的单次调用开销分摊到多个字符上；
+批次之间的等待由 DeadlineScheduler 按绝对截止时间安排，误差不会累积。
+
+除逐字输入外，引擎还支持把文本分段通过剪贴板粘贴（粘贴输入），
+以及按代价自动选择打字或粘贴的智能混合模式。
+
+文本可以来自任意 TextSource（字符串、文件、标准输入、生成器），引擎按块边读边打。
+"""
+
+import time
+from contextlib import ExitStack, closing
+
+from auto_typer_backends import BACKENDS, DEFAULT_BACKEND, KeyBackend, create_backend
+from auto_typer_clipboard import preserved_clipboard
+from auto_typer_pacing import DEFAULT_MAX_LAG, DEFAULT_SPIN_BELOW, DeadlineScheduler
+from auto_typer_plan import (  # noqa: F401  模式常量等仍可从引擎导入
+    DEFAULT_BATCH_WINDOW,
+    DEFAULT_MAX_RUN,
+    DEFAULT_PASTE_DELAY,
+    DEFAULT_PASTE_SEGMENT_SIZE,
+    MODE_HYBRID,
+    MODE_PASTE,
+    MODE_TYPE,
+    MODES,
+    OP_HOTKEY,
+    OP_KEY,
+    OP_PASTE,
+    OP_TYPE,
+    OP_WAIT,
+    compile_plan,
+)
+from auto_typer_sources import StringSource
+
+# 预设速度：菜单选项 -> (每个字符的延迟时间, 名称)，命令行菜单、批量任务和基准测试共用
+SPEED_MAP = {
+    '1': (0.1, "慢速"),
+    '2': (0.05, "中速"),
+    '3': (0.02, "快速"),
+    '4': (0.01, "极速")
+}
+
+# 打字步骤（TypingEngine._steps）中的等待点
+STEP_TURN = "turn"            # 处理暂停和停止
+STEP_SLEEP = "sleep"          # 等待固定的秒数
+STEP_DEADLINE = "deadline"    # 等到调度器的下一个截止时间
+STEP_FINISH = "finish"        # 等满最后一个间隔（不再处理暂停和停止）
+
+
+class TypingEngine:
+    """打字引擎：把文本按批次送给按键后端"""
+
+    def __init__(self, backend=None, batch_window=DEFAULT_BATCH_WINDOW, max_run=DEFAULT_MAX_RUN,
+                 max_lag=DEFAULT_MAX_LAG, spin_below=DEFAULT_SPIN_BELOW, mode=MODE_TYPE,
+                 paste_segment_size=DEFAULT_PASTE_SEGMENT_SIZE, paste_delay=DEFAULT_PASTE_DELAY):
+        """
+        Args:
+            backend (str | KeyBackend | None): 后端名称或实例，None 表示默认后端
+            batch_window (float): 批次时间窗口（秒）
+            max_run (int): 单个批次最多包含的字符数
+            max_lag (float): 落后计划时允许追赶的最大时间（秒）
+            spin_below (float): 间隔小于该值（秒）时使用 sleep + 自旋 的混合等待
+            mode (str): 默认输入模式（MODE_TYPE / MODE_PASTE / MODE_HYBRID）
+            paste_segment_size (int): 粘贴时每段的字符数
+            paste_delay (float): 每次粘贴后的等待时间（秒）
+        """
+        self._backend_spec = backend
+        self._backend = None
+        self.batch_window = batch_window
+        self.max_run = max_run
+        self.max_lag = max_lag
+        self.spin_below = spin_below
+        self.mode = mode
+        self.paste_segment_size = paste_segment_size
+        self.paste_delay = paste_delay
+        # 最近一次打字的节奏统计（PacingStats）
+        self.last_stats = None
+        # 可选的性能指标（TypingMetrics），为 None 时不做任何记录
+        self.metrics = None
+        # 可选的自适应速度控制（AdaptiveRate），启用后 delay 只作为起始速度
+        self.rate_control = None
+        # 可选的拟人节奏（auto_typer_timing.TimingModel），启用后 delay 作为平均间隔，优先于 rate_control
+        self.timing = None
+        # 可选的目标编辑器配置名称（auto_typer_editor），启用后省去编辑器会自动输入的按键
+        self.editor = None
+        # 可选的按键轨迹记录（auto_typer_trace.TraceWriter），启用后记录每次发给后端的调用及其时间
+        self.trace = None
+
+    @property
+    def backend(self):
+        """按键后端（第一次使用时才创建）"""
+        if self._backend is None:
+            self._backend = create_backend(self._backend_spec)
+        return self._backend
+
+    @property
+    def backend_name(self):
+        """当前（或将要创建的）后端名称"""
+        if self._backend is not None:
+            return self._backend.name
+        return getattr(self._backend_spec, "name", self._backend_spec) or DEFAULT_BACKEND
+
+    @property
+    def supports_unicode(self):
+        """当前（或将要创建的）后端能否直接输入任意 Unicode 字符，只编译计划时不必创建后端"""
+        return self._backend_capability("supports_unicode")
+
+    @property
+    def supports_key_repeat(self):
+        """当前（或将要创建的）后端能否在一次调用中重复按键"""
+        return self._backend_capability("supports_key_repeat")
+
+    def _backend_capability(self, attribute):
+        """读取后端的能力属性：已注册的后端直接读类属性，不必创建后端"""
+        if self._backend is not None:
+            return getattr(self._backend, attribute)
+        if isinstance(self._backend_spec, KeyBackend):
+            return getattr(self._backend_spec, attribute)
+        backend_class = BACKENDS.get(self.backend_name)
+        if backend_class is None:
+            return getattr(self.backend, attribute)
+        return getattr(backend_class, attribute)
+
+    def set_backend(self, backend):
+        """
+        更换按键后端，旧后端会被关闭
+
+        Args:
+            backend (str | KeyBackend | None): 后端名称或实例，None 表示默认后端
+        """
+        self.close()
+        self._backend_spec = backend
+
+    def close(self):
+        """关闭已创建的后端（之后再使用时会重新创建）"""
+        if self._backend is not None:
+            self._backend.close()
+            self._backend = None
+
+    def plan_options(self, mode=None):
+        """
+        按当前设置整理编译计划所用的参数
+
+        Returns:
+            dict: 可传给 compile_plan 或 PlanCache.load_or_compile 的关键字参数
+        """
+        return {
+            "mode": mode or self.mode,
+            "paste_segment_size": self.paste_segment_size,
+            "paste_delay": self.paste_delay,
+            "unicode_ok": self.supports_unicode,
+            "batch_window": self.batch_window,
+            "max_run": self.max_run,
+            "editor": self.editor,
+            "key_repeat": self.supports_key_repeat,
+        }
+
+    def compile(self, text, delay, mode=None):
+        """
+        按当前设置把文本编译为打字计划
+
+        Returns:
+            KeyPlan: 打字计划
+        """
+        return compile_plan(text, delay, **self.plan_options(mode))
+
+    def type_text(self, text, delay, stop_event=None, pause_event=None, on_progress=None, mode=None,
+                  skip=0, checkpoint=None):
+        """
+        输入文本
+
+        Args:
+            text (str): 要输入的文本
+            delay (float): 每个字符之间的延迟时间（秒）
+            stop_event (threading.Event): 被设置时停止打字
+            pause_event (threading.Event): 被清除时暂停打字，直到再次被设置
+            on_progress (callable): 每个批次完成后调用 on_progress(已输入字符数, 总字符数)
+            mode (str): 输入模式，None 表示使用引擎的默认模式
+            skip (int): 跳过开头的字符数（从断点继续时使用）
+            checkpoint (Checkpoint): 断点，输入过程中定期记录已输入的字符数
+
+        Returns:
+            bool: 全部输入完成返回 True，被停止返回 False
+        """
+        return self.type_source(StringSource(text), delay, stop_event, pause_event, on_progress, mode,
+                                skip, checkpoint)
+
+    def type_source(self, source, delay, stop_event=None, pause_event=None, on_progress=None, mode=None,
+                    skip=0, checkpoint=None):
+        """
+        从文本来源边读边输入
+
+        Args:
+            source (TextSource): 文本来源
+            delay (float): 每个字符之间的延迟时间（秒）
+            stop_event (threading.Event): 被设置时停止打字
+            pause_event (threading.Event): 被清除时暂停打字，直到再次被设置
+            on_progress (callable): 每个批次完成后调用 on_progress(当前位置, 总量)，
+                单位由来源决定（见 source.unit），总量未知时为 None
+            mode (str): 输入模式，None 表示使用引擎的默认模式
+            skip (int): 跳过开头的字符数（从断点继续时使用，跳过的部分只读取不输入）
+            checkpoint (Checkpoint): 断点，输入过程中定期记录已输入的字符数
+
+        Returns:
+            bool: 全部输入完成返回 True，被停止返回 False
+        """
+        return self._run_plans(self._source_plans(source, delay, mode, skip), delay, source.total,
+                               stop_event, pause_event, on_progress, skip, checkpoint)
+
+    def _source_plans(self, source, delay, mode=None, skip=0):
+        """
+        按块读取文本来源并逐块编译
+
+        Yields:
+            tuple: (计划, 起始位置, 每个字符对应的位置增量)
+        """
+        options = self.plan_options(mode)
+        remaining = skip
+        chunk_start = 0
+        # 编辑器精简需要知道块开头所在行已输入的内容
+        context = ""
+        for chunk, chunk_end in source.chunks():
+            # 块内按已输入字符的比例换算出来源中的位置
+            scale = (chunk_end - chunk_start) / len(chunk)
+            if remaining:
+                if len(chunk) <= remaining:
+                    remaining -= len(chunk)
+                    chunk_start = chunk_end
+                    context = _last_line(context, chunk)
+                    continue
+                chunk_start += int(remaining * scale)
+                context = _last_line(context, chunk[:remaining])
+                chunk = chunk[remaining:]
+                remaining = 0
+            if options["editor"]:
+                yield compile_plan(chunk, delay, context=context, **options), chunk_start, scale
+                context = _last_line(context, chunk)
+            else:
+                yield compile_plan(chunk, delay, **options), chunk_start, scale
+            chunk_start = chunk_end
+
+    def type_segments(self, segments, delay, pause=0.0, stop_event=None, pause_event=None, on_progress=None,
+                      mode=None, total=None):
+        """
+        依次输入多段文本，段与段之间停顿 pause 秒（例如逐段输入剪贴板中的段落）
+
+        Args:
+            segments: 产生 (文本, 起始位置, 每个字符对应的位置增量) 的可迭代对象，按需逐段编译
+            delay (float): 每个字符之间的延迟时间（秒）
+            pause (float): 每段开始前的停顿（秒），第一段之前不停顿
+            stop_event (threading.Event): 被设置时停止打字
+            pause_event (threading.Event): 被清除时暂停打字，直到再次被设置
+            on_progress (callable): 每个批次完成后调用 on_progress(当前位置, 总量)
+            mode (str): 输入模式，None 表示使用引擎的默认模式
+            total (int): 进度总量，未知时为 None
+
+        Returns:
+            bool: 全部输入完成返回 True，被停止返回 False
+        """
+        options = self.plan_options(mode)
+
+        def plans():
+            for number, (text, start, scale) in enumerate(segments):
+                if number and pause > 0:
+                    wait = compile_plan("", delay, **options)
+                    wait.add(OP_WAIT, int(pause * 1e6), 0)
+                    yield wait, start, scale
+                yield compile_plan(text, delay, **options), start, scale
+
+        return self._run_plans(plans(), delay, total, stop_event, pause_event, on_progress)
+
+    def run_plan(self, plan, stop_event=None, pause_event=None, on_progress=None, checkpoint=None):
+        """
+        执行编译好的打字计划（例如从缓存读取的计划）
+
+        Args:
+            plan (KeyPlan): 打字计划
+            stop_event (threading.Event): 被设置时停止打字
+            pause_event (threading.Event): 被清除时暂停打字，直到再次被设置
+            on_progress (callable): 每个批次完成后调用 on_progress(已输入字符数, 总字符数)
+            checkpoint (Checkpoint): 断点，输入过程中定期记录已输入的字符数
+
+        Returns:
+            bool: 全部输入完成返回 True，被停止返回 False
+        """
+        return self._run_plans([(plan, 0, 1.0)], plan.delay, len(plan.text), stop_event, pause_event, on_progress,
+                               checkpoint=checkpoint)
+
+    def _run_plans(self, plans, delay, total, stop_event, pause_event, on_progress, skip=0, checkpoint=None):
+        """
+        依次执行多份计划，共用同一个节奏调度器（在当前线程中等待）
+
+        Args:
+            plans: 产生 (计划, 起始位置, 每个字符对应的位置增量) 的可迭代对象
+            delay (float): 每个字符之间的延迟时间（秒）
+            total (int): 进度总量，未知时为 None
+            skip (int): 第一份计划之前已跳过的字符数
+            checkpoint (Checkpoint): 断点
+        """
+        metrics = self.metrics
+        with closing(self._steps(plans, delay, total, on_progress, skip, checkpoint)) as steps:
+            for step, scheduler, seconds in steps:
+                if step == STEP_TURN:
+                    if not self._wait_turn(stop_event, pause_event, scheduler, metrics):
+                        return False
+                elif step == STEP_SLEEP:
+                    # 段落停顿、粘贴后的等待可能较长，等待期间也响应停止
+                    if stop_event is None:
+                        time.sleep(seconds)
+                    elif stop_event.wait(seconds):
+                        return False
+                else:
+                    scheduler.wait()
+        return True
+
+    def _steps(self, plans, delay, total, on_progress, skip=0, checkpoint=None):
+        """
+        一次打字的全部步骤，同步的 _run_plans 和异步的 AsyncTyper 共用
+
+        生成器负责发出按键、推进调度器、回报进度和结算，遇到需要等待的地方产生一个等待点，
+        由调用方按自己的方式等待（线程中 sleep，事件循环中用定时器）后继续迭代；
+        调用方被停止时不再迭代并关闭生成器，未完成的运行照常结算。
+
+        Args:
+            plans: 产生 (计划, 起始位置, 每个字符对应的位置增量) 的可迭代对象
+            delay (float): 每个字符之间的延迟时间（秒）
+            total (int): 进度总量，未知时为 None
+            on_progress (callable): 每个批次完成后调用 on_progress(已输入字符数, 总字符数)
+            skip (int): 第一份计划之前已跳过的字符数
+            checkpoint (Checkpoint): 断点
+
+        Yields:
+            tuple: (等待点 STEP_*, 节奏调度器, 等待秒数)
+        """
+        backend = self._traced_backend(delay)
+        metrics = self.metrics
+        scheduler, rate, timing = self._start_run(delay)
+        completed = False
+
+        with ExitStack() as stack:
+            clipboard_saved = not backend.pastes_via_clipboard
+            scheduler.start()
+            # 已输入的字符数（从文本开头算起）
+            chars_before = skip
+            try:
+                for plan, start, scale in plans:
+                    if not clipboard_saved and plan.has_paste:
+                        # 第一次粘贴前保存剪贴板，结束后恢复用户原来的内容
+                        stack.enter_context(preserved_clipboard())
+                        clipboard_saved = True
+
+                    report = self._reporter(on_progress, checkpoint, total, start, scale, chars_before)
+                    # 拟人节奏：开始输入这份计划前一次性生成整份时间表
+                    schedule = timing.schedule(plan.text, plan.delay) if timing is not None else None
+                    text = plan.text
+                    keys = plan.keys
+                    for op, a, b in plan:
+                        yield STEP_TURN, scheduler, 0.0
+
+                        if op == OP_PASTE:
+                            self._paste(backend, text[a:b], metrics)
+                            yield STEP_SLEEP, scheduler, plan.paste_delay
+                            scheduler.rebase(b - a)
+                        elif op == OP_WAIT:
+                            yield STEP_SLEEP, scheduler, a / 1e6
+                            scheduler.rebase(0)
+                        else:
+                            yield STEP_DEADLINE, scheduler, 0.0
+                            self._press(backend, scheduler, op, a, b, text, keys, metrics, rate, schedule)
+
+                        if report is not None and op in (OP_TYPE, OP_PASTE):
+                            report(b)
+                    chars_before += len(plan.text)
+
+                # 等满最后一个间隔，使总用时与 字符数 × 延迟 一致
+                yield STEP_FINISH, scheduler, 0.0
+                completed = True
+            finally:
+                scheduler.finish(wait=False)
+                self._finish_run(scheduler, rate, checkpoint, completed)
+
+    def _start_run(self, delay):
+        """
+        为一次打字创建节奏调度器，并重置拟人节奏 / 自适应速度
+
+        Returns:
+            tuple: (DeadlineScheduler, 生效的 AdaptiveRate 或 None, 生效的 TimingModel 或 None)
+        """
+        metrics = self.metrics
+        timing = self.timing
+        rate = self.rate_control if timing is None else None
+        if timing is not None:
+            timing.start()
+        elif rate is not None:
+            rate.start(1.0 / delay if delay > 0 else None)
+            delay = rate.interval
+        scheduler = DeadlineScheduler(delay, self.max_lag, self.spin_below,
+                                      overshoot=metrics.sleep_overshoot if metrics is not None else None)
+        return scheduler, rate, timing
+
+    @staticmethod
+    def _reporter(on_progress, checkpoint, total, start, scale, base):
+        """
+        创建一份计划的进度回调 report(计划内偏移)，不需要回报时返回 None
+
+        Args:
+            start (int): 计划在来源中的起始位置
+            scale (float): 每个字符对应的位置增量
+            base (int): 计划之前已输入的字符数
+        """
+        if on_progress is not None and checkpoint is not None:
+            def report(offset):
+                on_progress(start + int(offset * scale), total)
+                checkpoint.update(base + offset)
+        elif on_progress is not None:
+            def report(offset):
+                on_progress(start + int(offset * scale), total)
+        elif checkpoint is not None:
+            def report(offset):
+                checkpoint.update(base + offset)
+        else:
+            report = None
+        return report
+
+    def _traced_backend(self, delay):
+        """本次打字使用的后端：启用轨迹记录时返回记录每次调用的包装后端"""
+        if self.trace is None:
+            return self.backend
+        return self.trace.wrap(self.backend, delay)
+
+    def _finish_run(self, scheduler, rate, checkpoint, completed):
+        """结束一次打字：保存节奏统计、结算断点、性能指标和轨迹（调度器已 finish）"""
+        self.last_stats = scheduler.stats
+        if rate is not None:
+            self.last_stats.rate_range = (rate.lowest, rate.highest)
+            self.last_stats.backoffs = rate.backoffs
+        if checkpoint is not None:
+            checkpoint.finish(completed)
+        if self.metrics is not None:
+            self.metrics.runs += 1
+            self.metrics.chars += self.last_stats.chars
+        if self.trace is not None:
+            self.trace.flush()
+
+    @staticmethod
+    def _paste(backend, text, metrics):
+        """粘贴一段文本（调用方负责之后的等待）"""
+        call_start = time.perf_counter()
+        backend.paste(text)
+        backend.flush()
+        if metrics is not None:
+            metrics.backend_call.observe(time.perf_counter() - call_start)
+
+    @staticmethod
+    def _press(backend, scheduler, op, a, b, text, keys, metrics, rate, schedule):
+        """发出一个打字 / 按键 / 组合键批次，并推后调度器的截止时间（调用方负责之前的等待）"""
+        timed = metrics is not None or rate is not None
+        call_start = time.perf_counter() if timed else 0.0
+        if op == OP_TYPE:
+            backend.write(text[a:b])
+            count = b - a
+        elif op == OP_KEY:
+            backend.press(keys[a], presses=b)
+            count = b
+        else:
+            backend.hotkey(*keys[a].split("+"))
+            count = 1
+        backend.flush()
+        if rate is not None:
+            backend.sync()
+        if timed:
+            cost = time.perf_counter() - call_start
+            if metrics is not None:
+                metrics.backend_call.observe(cost)
+        if schedule is not None and op == OP_TYPE:
+            scheduler.advance(count, schedule[b] - schedule[a])
+        else:
+            scheduler.advance(count)
+        if rate is not None:
+            scheduler.set_interval(rate.observe(cost, count, scheduler.last_lag))
+
+    def estimate_duration(self, text, delay, mode=None):
+        """
+        估算输入文本所需的时间（秒）：打字段按 字符数 × 延迟（启用拟人节奏时按其期望间隔），
+        粘贴段按每段的粘贴等待时间
+        """
+        plan = self.compile(text, delay, mode)
+        estimated = plan.estimate_duration()
+        if self.timing is not None:
+            expected = self.timing.delays(text, plan.delay, expected=True)
+            for op, a, b in plan:
+                if op == OP_TYPE:
+                    estimated += sum(expected[a:b]) - (b - a) * plan.delay
+        return estimated
+
+    @staticmethod
+    def _wait_turn(stop_event, pause_event, scheduler, metrics=None):
+        """
+        处理停止和暂停
+
+        Returns:
+            bool: 可以继续输入返回 True，已被停止返回 False
+        """
+        if stop_event is not None and stop_event.is_set():
+            return False
+
+        if pause_event is not None and not pause_event.is_set():
+            # 等待暂停解除，暂停时间不计入追赶
+            paused_at = time.perf_counter()
+            pause_event.wait()
+            paused = time.perf_counter() - paused_at
+            scheduler.shift(paused)
+            if metrics is not None:
+                metrics.pause.observe(paused)
+            if stop_event is not None and stop_event.is_set():
+                return False
+
+        return True
+
+
+def _last_line(context, text):
+    """已输入的文本依次为 context、text 时，最后一行的内容（含前面的换行符）"""
+    newline = text.rfind("\n")
+    return text[newline:] if newline >= 0 else context + text
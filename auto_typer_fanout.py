@@ -0,0 +1,409 @@
+"""
+多显示器并行输入（fan-out）
+
+同时驱动多个测试桌面（如多个 Xvfb 实例）时，把同一组任务并行输入到每个 X 显示：
+
+1. 在主进程中校验任务清单并编译一次打字计划（与批量任务相同）
+2. 把全部计划序列化后放进一块共享内存，每个工作进程直接从共享内存解析计划，不必各自复制一份文本
+3. 每个显示由进程池中的一个工作进程负责，使用自己的按键后端连接（DISPLAY 设为该显示）
+4. 工作进程把进度和每个任务的结果通过队列发回主进程，由主进程汇总显示
+
+共享内存需要 Python 3.8+。
+"""
+
+import json
+import os
+import time
+
+from auto_typer_batch import (
+    STATUS_DONE,
+    STATUS_FAILED,
+    STATUS_STOPPED,
+    BatchRunner,
+    _countdown,
+    format_results,
+    load_manifest,
+)
+
+# 未指定后端时使用 XTEST（每个进程一个显示连接，开销最小）
+DEFAULT_FANOUT_BACKEND = "xtest"
+# 工作进程发送进度的最短间隔（秒）
+PROGRESS_INTERVAL = 0.5
+
+# 队列消息类型
+_MESSAGE_PROGRESS = "progress"
+_MESSAGE_RESULT = "result"
+
+# 工作进程中的共享状态（由进程池的 initializer 设置）
+_worker_state = {}
+
+
+def parse_displays(value):
+    """
+    解析显示列表
+
+    Args:
+        value (str | list): 逗号分隔的显示名称（如 ":1,:2,:3"）或名称列表
+
+    Raises:
+        ValueError: 列表为空或有重复
+    """
+    if isinstance(value, str):
+        value = value.split(",")
+    displays = [str(display).strip() for display in value if str(display).strip()]
+    if not displays:
+        raise ValueError("请至少指定一个显示（如 :1,:2）")
+    if len(set(displays)) != len(displays):
+        raise ValueError("显示列表中有重复的显示")
+    return displays
+
+
+class SharedPlans:
+    """把多份打字计划序列化后放进一块共享内存，供工作进程读取"""
+
+    def __init__(self, plans):
+        """
+        Args:
+            plans (list): KeyPlan 列表
+
+        Raises:
+            RuntimeError: 当前 Python 不支持共享内存
+        """
+        try:
+            from multiprocessing import shared_memory
+        except ImportError:
+            raise RuntimeError("多显示器并行输入需要 Python 3.8+（multiprocessing.shared_memory）") from None
+
+        blobs = [plan.to_bytes() for plan in plans]
+        # 每份计划在共享内存中的 (偏移, 长度)
+        self.layout = []
+        offset = 0
+        for blob in blobs:
+            self.layout.append((offset, len(blob)))
+            offset += len(blob)
+        self._memory = shared_memory.SharedMemory(create=True, size=max(offset, 1))
+        for blob, (offset, size) in zip(blobs, self.layout):
+            self._memory.buf[offset:offset + size] = blob
+
+    @property
+    def name(self):
+        return self._memory.name
+
+    @property
+    def size(self):
+        return self._memory.size
+
+    def close(self):
+        """释放共享内存（所有工作进程结束后调用）"""
+        self._memory.close()
+        self._memory.unlink()
+
+
+def load_shared_plans(name, layout):
+    """
+    在工作进程中从共享内存解析计划
+
+    Args:
+        name (str): 共享内存名称
+        layout (list): 每份计划的 (偏移, 长度)
+
+    Returns:
+        list: KeyPlan 列表
+    """
+    from multiprocessing import shared_memory
+    from auto_typer_plan import KeyPlan
+
+    memory = shared_memory.SharedMemory(name=name)
+    try:
+        view = memory.buf
+        plans = [KeyPlan.from_bytes(view[offset:offset + size]) for offset, size in layout]
+        del view
+    finally:
+        memory.close()
+    return plans
+
+
+def _init_worker(messages, stop_event):
+    import signal
+
+    # Ctrl+C 由主进程处理，通过 stop_event 通知工作进程停止
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    _worker_state["messages"] = messages
+    _worker_state["stop_event"] = stop_event
+
+
+def _run_display(display, backend, memory_name, layout, jobs):
+    """
+    工作进程：连接显示 display，依次执行全部任务
+
+    Args:
+        display (str): X 显示名称
+        backend (str): 按键后端名称
+        memory_name (str): 共享内存名称
+        layout (list): 每份计划在共享内存中的 (偏移, 长度)
+        jobs (list): 每个任务的设置（BatchJob.result() 加上 countdown / pre_delay / post_delay）
+
+    Returns:
+        list: 每个任务的结果字典
+    """
+    from auto_typer_engine import TypingEngine
+
+    messages = _worker_state["messages"]
+    stop_event = _worker_state["stop_event"]
+    os.environ["DISPLAY"] = display
+    results = [dict(job["result"], display=display) for job in jobs]
+
+    plans = load_shared_plans(memory_name, layout)
+    engine = TypingEngine(backend)
+    try:
+        # 先建立显示连接，连接失败时所有任务都记为失败
+        engine.backend
+    except Exception as e:
+        for result in results:
+            result["status"] = STATUS_FAILED
+            result["error"] = f"无法连接显示 {display}: {e}"
+        return results
+
+    try:
+        for job, plan, result in zip(jobs, plans, results):
+            if stop_event.is_set():
+                break
+            last_report = [0.0]
+
+            def on_progress(done, total, index=result["index"]):
+                now = time.monotonic()
+                if now - last_report[0] >= PROGRESS_INTERVAL or done == total:
+                    last_report[0] = now
+                    messages.put((_MESSAGE_PROGRESS, display, index, done, total))
+
+            try:
+                _countdown_quietly(job["countdown"] + job["pre_delay"], stop_event)
+                started = time.perf_counter()
+                completed = engine.run_plan(plan, stop_event, on_progress=on_progress)
+                result["duration"] = round(time.perf_counter() - started, 3)
+                result["achieved_cps"] = round(engine.last_stats.achieved_cps, 1)
+                result["status"] = STATUS_DONE if completed else STATUS_STOPPED
+            except Exception as e:
+                result["status"] = STATUS_FAILED
+                result["error"] = str(e)
+            messages.put((_MESSAGE_RESULT, display, result))
+            if result["status"] == STATUS_STOPPED:
+                break
+            if result["status"] == STATUS_DONE:
+                _countdown_quietly(job["post_delay"], stop_event)
+    finally:
+        engine.close()
+    return results
+
+
+def _countdown_quietly(seconds, stop_event):
+    """等待 seconds 秒，stop_event 被设置时提前返回"""
+    if seconds > 0:
+        stop_event.wait(seconds)
+
+
+class FanOutRunner:
+    """多显示器并行输入：每个显示一个工作进程，共享同一份编译好的计划"""
+
+    def __init__(self, displays, jobs, backend=None, countdown=3):
+        """
+        Args:
+            displays (list): X 显示名称列表
+            jobs (list): 已编译计划的 BatchJob 列表
+            backend (str): 按键后端名称，默认 xtest（实例无法传给其他进程）
+            countdown (int): 开始前的倒计时秒数
+        """
+        self.displays = displays
+        self.jobs = jobs
+        self.backend = backend or DEFAULT_FANOUT_BACKEND
+        self.countdown = countdown
+        # 显示 -> 任务序号 -> (已输入, 总量)
+        self.progress = {display: {} for display in displays}
+
+    def run(self, stop_event=None):
+        """
+        并行执行全部任务
+
+        Args:
+            stop_event (threading.Event): 被设置时停止所有显示上的输入
+
+        Returns:
+            dict: 显示 -> 该显示上每个任务的结果字典列表
+        """
+        import multiprocessing
+        from concurrent.futures import ProcessPoolExecutor
+
+        context = multiprocessing.get_context("spawn")
+        messages = context.Queue()
+        worker_stop = context.Event()
+        shared = SharedPlans([job.plan for job in self.jobs])
+        specs = [{
+            "result": job.result(),
+            "countdown": job.countdown,
+            "pre_delay": job.pre_delay,
+            "post_delay": job.post_delay,
+        } for job in self.jobs]
+
+        print(f"🖥️ 并行输入到 {len(self.displays)} 个显示: {', '.join(self.displays)}"
+              f"（后端 {self.backend}，共享计划 {shared.size} 字节）")
+        results = {}
+        try:
+            with ProcessPoolExecutor(max_workers=len(self.displays), mp_context=context,
+                                     initializer=_init_worker, initargs=(messages, worker_stop)) as pool:
+                futures = {}
+                try:
+                    _countdown(self.countdown, stop_event)
+                    futures = {pool.submit(_run_display, display, self.backend, shared.name, shared.layout,
+                                           specs): display
+                               for display in self.displays}
+                    self._follow(futures, messages, worker_stop, stop_event)
+                except KeyboardInterrupt:
+                    worker_stop.set()
+                    print("\n⏹️ 用户中断，正在停止所有显示上的输入...")
+                    self._follow(futures, messages, worker_stop, stop_event)
+
+                for future, display in futures.items():
+                    try:
+                        results[display] = future.result()
+                    except Exception as e:
+                        results[display] = [dict(spec["result"], display=display, status=STATUS_FAILED,
+                                                 error=f"工作进程异常退出: {e}") for spec in specs]
+        finally:
+            shared.close()
+
+        # 没有开始执行的显示（倒计时中被中断）
+        for display in self.displays:
+            results.setdefault(display, [dict(spec["result"], display=display) for spec in specs])
+        return results
+
+    def _follow(self, futures, messages, worker_stop, stop_event):
+        """接收工作进程的进度消息并刷新进度行，直到所有工作进程结束"""
+        import queue
+
+        pending = set(futures)
+        last_line = 0.0
+        while pending:
+            if stop_event is not None and stop_event.is_set():
+                worker_stop.set()
+            try:
+                self._handle(messages.get(timeout=0.2))
+            except queue.Empty:
+                pass
+            pending = {future for future in pending if not future.done()}
+            now = time.monotonic()
+            if now - last_line >= PROGRESS_INTERVAL:
+                last_line = now
+                print(f"\r📡 {self.format_progress()}", end="", flush=True)
+        # 工作进程结束前发出的最后几条消息
+        while True:
+            try:
+                self._handle(messages.get_nowait())
+            except queue.Empty:
+                break
+        if futures:
+            print(f"\r📡 {self.format_progress()}")
+
+    def _handle(self, message):
+        kind, display = message[0], message[1]
+        if kind == _MESSAGE_PROGRESS:
+            _, _, index, done, total = message
+            self.progress[display][index] = (done, total)
+        elif kind == _MESSAGE_RESULT:
+            result = message[2]
+            chars = result["chars"]
+            if result["status"] == STATUS_DONE:
+                self.progress[display][result["index"]] = (chars, chars)
+            elif result["error"]:
+                print(f"\n❌ {display} 任务 {result['index']}. {result['name']}: {result['error']}")
+
+    def format_progress(self):
+        """各显示的总进度，如 ":1 45% | :2 50%" """
+        total_chars = sum(len(job.plan.text) for job in self.jobs) or 1
+        parts = []
+        for display in self.displays:
+            done = sum(done for done, _ in self.progress[display].values())
+            parts.append(f"{display} {done / total_chars:.0%}")
+        return " | ".join(parts)
+
+
+def format_fanout_results(results):
+    """把每个显示的任务结果格式化为表格"""
+    blocks = []
+    for display, display_results in results.items():
+        blocks.append(f"🖥️ {display}\n{format_results(display_results)}")
+    return "\n\n".join(blocks)
+
+
+def run_fanout(manifest, displays, base_dir=".", backend=None, summary_path=None, stop_event=None,
+               manifest_path=None):
+    """
+    校验并编译任务清单，然后并行输入到每个显示
+
+    Args:
+        manifest (dict): 任务清单（格式同批量任务）
+        displays (list | str): X 显示名称列表或逗号分隔的字符串
+        base_dir (str): 任务中相对路径的基准目录
+        backend (str): 按键后端名称，优先于清单中的设置，默认 xtest
+        summary_path (str): 把结果写入该 JSON 文件
+        stop_event (threading.Event): 被设置时停止
+        manifest_path (str): 清单文件路径（只用于结果文件）
+
+    Returns:
+        bool: 所有显示上的全部任务都完成返回 True
+    """
+    try:
+        displays = parse_displays(displays)
+    except ValueError as e:
+        print(f"❌ {e}")
+        return False
+    if backend is None and isinstance(manifest, dict):
+        backend = manifest.get("backend")
+    if backend is not None and not isinstance(backend, str):
+        print("❌ 并行输入只能使用后端名称（每个工作进程各自创建后端）")
+        return False
+
+    runner = BatchRunner(manifest, base_dir, backend or DEFAULT_FANOUT_BACKEND)
+    # 后端由每个工作进程各自创建
+    errors = runner.prepare(open_backend=False)
+    if errors:
+        print("❌ 任务清单校验失败，未执行任何任务:")
+        for error in errors:
+            print(f"   - {error}")
+        return False
+    total_chars = sum(len(job.plan.text) for job in runner.jobs)
+    print(f"📋 已校验并编译 {len(runner.jobs)} 个任务，共 {total_chars} 字符")
+
+    fanout = FanOutRunner(displays, runner.jobs, backend, runner.countdown)
+    try:
+        results = fanout.run(stop_event)
+    except (OSError, RuntimeError) as e:
+        print(f"❌ 无法启动并行输入: {e}")
+        return False
+    print("\n" + format_fanout_results(results))
+
+    if summary_path:
+        summary = {
+            "manifest": os.path.abspath(manifest_path) if manifest_path else None,
+            "finished_at": time.time(),
+            "displays": results,
+        }
+        try:
+            with open(summary_path, "w", encoding="utf-8") as f:
+                json.dump(summary, f, ensure_ascii=False, indent=2)
+            print(f"\n📝 结果已写入 {summary_path}")
+        except OSError as e:
+            print(f"\n⚠️ 写入结果失败: {e}")
+
+    return all(result["status"] == STATUS_DONE for display_results in results.values()
+               for result in display_results)
+
+
+def run_fanout_manifest(manifest_path, displays, summary_path=None, backend=None, stop_event=None):
+    """读取任务清单文件并并行输入到每个显示（参数同 run_fanout）"""
+    try:
+        manifest = load_manifest(manifest_path)
+    except (OSError, ValueError) as e:
+        print(f"❌ 无法读取任务清单: {e}")
+        return False
+    return run_fanout(manifest, displays, os.path.dirname(os.path.abspath(manifest_path)), backend, summary_path,
+                      stop_event, manifest_path)
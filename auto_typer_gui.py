@@ -1,13 +1,45 @@
 import tkinter as tk
-from tkinter import ttk, messagebox, scrolledtext
-import pyautogui
+from tkinter import ttk, messagebox, scrolledtext, filedialog
 import pyperclip
+import os
+import queue
+import sys
 import time
 import threading
 from typing import Optional
 
+from auto_typer_backends import PyAutoGUIBackend, XTestBackend
+from auto_typer_checkpoint import CheckpointStore
+from auto_typer_dryrun import dry_run, format_duration
+from auto_typer_engine import MODES, TypingEngine
+from auto_typer_pacing import DEFAULT_MAX_CPS, DEFAULT_MIN_CPS, AdaptiveRate
+from auto_typer_sources import FileSource, StringSource, count_text
+
+# 打字期间界面刷新间隔（毫秒），约30帧/秒，与打字速度无关
+UI_POLL_INTERVAL_MS = 33
+
+# 超过这么多字符的剪贴板内容不放入文本框，而是作为文档载入
+LARGE_TEXT_CHARS = 200_000
+# 文档预览每次渲染的字符数，滚动到预览末尾时再渲染下一段
+PREVIEW_CHUNK_CHARS = 20_000
+# 文档预览最多渲染的字符数
+PREVIEW_MAX_CHARS = 1_000_000
+
+# 自适应速度选项
+ADAPTIVE_SPEED_LABEL = f"自适应 ({DEFAULT_MIN_CPS:.0f}-{DEFAULT_MAX_CPS:.0f}字符/s)"
+
+# 界面中可选的按键后端（XTEST 仅在 Linux 上可用）
+GUI_BACKENDS = [PyAutoGUIBackend.name]
+if sys.platform.startswith("linux"):
+    GUI_BACKENDS.append(XTestBackend.name)
+
 class AutoTyperGUI:
-    def __init__(self, root):
+    def __init__(self, root, engine=None):
+        """
+        Args:
+            root (tk.Tk): 主窗口
+            engine (TypingEngine): 打字引擎，默认新建一个
+        """
         self.root = root
         self.root.title("智能自动打字助手")
         self.root.geometry("600x720")
@@ -28,6 +60,26 @@ class AutoTyperGUI:
         self.pause_event = threading.Event()
         self.stop_event = threading.Event()
         self.is_topmost = False
+        self.engine = engine or TypingEngine()
+        self.checkpoints = CheckpointStore()
+        
+        # 载入的大文档（TextSource）：打字时直接从文档流式读取，文本框只显示预览
+        self.document = None
+        self._document_name = ""
+        self._preview_source = None
+        self._preview_pieces = None
+        self._preview_chars = 0
+        # 后台统计字数的结果 (文档, 字符数, 行数)，由主线程定时读取
+        self._document_counts = None
+        self._count_cancel = threading.Event()
+        
+        # 工作线程只写入这些字段和队列，界面由主线程定时读取后刷新
+        self._progress_done = 0
+        self._progress_total = 0
+        self._shown_progress = None
+        # 试运行结果（DryRunReport），用于估算剩余时间
+        self._estimate = None
+        self._ui_queue = queue.Queue()
         
         self.setup_ui()
         
@@ -58,14 +110,20 @@ class AutoTyperGUI:
         # 文本框
         self.text_area = scrolledtext.ScrolledText(text_frame, height=8, font=('Consolas', 10), wrap=tk.WORD)
         self.text_area.grid(row=1, column=0, sticky=(tk.W, tk.E, tk.N, tk.S), pady=(5, 0))
+        # 滚动时检查是否需要渲染更多文档预览
+        self.text_area.configure(yscrollcommand=self._on_text_scroll)
         
         # 按钮框架
         button_frame = ttk.Frame(text_frame)
         button_frame.grid(row=0, column=0, sticky=(tk.W, tk.E), pady=(0, 5))
         
         ttk.Button(button_frame, text="📋 从剪贴板粘贴", command=self.paste_from_clipboard, style='Custom.TButton').pack(side=tk.LEFT, padx=(0, 10))
+        ttk.Button(button_frame, text="📂 打开文件", command=self.open_file, style='Custom.TButton').pack(side=tk.LEFT, padx=(0, 10))
         ttk.Button(button_frame, text="🗑️ 清空", command=self.clear_text, style='Custom.TButton').pack(side=tk.LEFT)
         
+        self.document_var = tk.StringVar()
+        ttk.Label(button_frame, textvariable=self.document_var, style='Subtitle.TLabel').pack(side=tk.RIGHT)
+        
         # 设置区域
         settings_frame = ttk.LabelFrame(main_frame, text="⚙️ 打字设置", padding="10")
         settings_frame.grid(row=3, column=0, columnspan=3, sticky=(tk.W, tk.E), pady=(0, 15))
@@ -76,7 +134,8 @@ class AutoTyperGUI:
         
         self.speed_var = tk.StringVar(value="中速")
         speed_combo = ttk.Combobox(settings_frame, textvariable=self.speed_var, 
-                                 values=["慢速 (0.1s/字符)", "中速 (0.05s/字符)", "快速 (0.02s/字符)", "极速 (0.01s/字符)"],
+                                 values=["慢速 (0.1s/字符)", "中速 (0.05s/字符)", "快速 (0.02s/字符)", "极速 (0.01s/字符)",
+                                         ADAPTIVE_SPEED_LABEL],
                                  state="readonly", width=20)
         speed_combo.grid(row=0, column=1, sticky=(tk.W, tk.E), padx=(0, 10))
         speed_combo.set("中速 (0.05s/字符)")
@@ -90,6 +149,24 @@ class AutoTyperGUI:
         
         ttk.Label(settings_frame, text="秒").grid(row=0, column=4, sticky=tk.W)
         
+        # 输入模式设置
+        ttk.Label(settings_frame, text="输入模式:").grid(row=1, column=0, sticky=tk.W, padx=(0, 10), pady=(10, 0))
+        
+        self.mode_var = tk.StringVar()
+        mode_combo = ttk.Combobox(settings_frame, textvariable=self.mode_var,
+                                values=list(MODES.values()), state="readonly", width=20)
+        mode_combo.grid(row=1, column=1, sticky=(tk.W, tk.E), padx=(0, 10), pady=(10, 0))
+        mode_combo.set(MODES[self.engine.mode])
+        
+        # 按键后端设置
+        ttk.Label(settings_frame, text="按键后端:").grid(row=1, column=2, sticky=tk.W, padx=(10, 10), pady=(10, 0))
+        
+        self.backend_var = tk.StringVar()
+        backend_combo = ttk.Combobox(settings_frame, textvariable=self.backend_var,
+                                   values=GUI_BACKENDS, state="readonly", width=10)
+        backend_combo.grid(row=1, column=3, columnspan=2, sticky=tk.W, pady=(10, 0))
+        backend_combo.set(self.engine.backend_name)
+        
         # 控制按钮区域
         control_frame = ttk.Frame(main_frame)
         control_frame.grid(row=4, column=0, columnspan=3, pady=(0, 15))
@@ -129,58 +206,218 @@ class AutoTyperGUI:
         self.progress_bar.grid(row=1, column=0, sticky=(tk.W, tk.E), pady=(5, 0))
         
     def paste_from_clipboard(self):
-        """从剪贴板粘贴文本"""
+        """从剪贴板粘贴文本（大段文本作为文档载入，只显示预览）"""
+        if self.is_typing:
+            return
         try:
             clipboard_content = pyperclip.paste()
-            if clipboard_content:
-                self.text_area.delete(1.0, tk.END)
+            if not clipboard_content:
+                messagebox.showwarning("警告", "剪贴板为空！")
+            elif len(clipboard_content) > LARGE_TEXT_CHARS:
+                self._load_document(StringSource(clipboard_content), "剪贴板内容")
+            else:
+                self._unload_document()
                 self.text_area.insert(1.0, clipboard_content)
                 self.update_status("📋 已从剪贴板粘贴文本")
-            else:
-                messagebox.showwarning("警告", "剪贴板为空！")
         except Exception as e:
             messagebox.showerror("错误", f"粘贴失败: {e}")
     
+    def open_file(self):
+        """打开文本文件作为文档（不读入文本框，打字时按块读取）"""
+        if self.is_typing:
+            return
+        path = filedialog.askopenfilename(title="选择要输入的文本文件",
+                                          filetypes=[("文本文件", "*.txt *.md *.csv *.log"), ("所有文件", "*.*")])
+        if not path:
+            return
+        try:
+            self._load_document(FileSource(path), os.path.basename(path))
+        except OSError as e:
+            messagebox.showerror("错误", f"无法打开文件: {e}")
+    
     def clear_text(self):
         """清空文本"""
-        self.text_area.delete(1.0, tk.END)
+        if self.is_typing:
+            return
+        self._unload_document()
         self.update_status("🗑️ 文本已清空")
     
+    def _load_document(self, source, name):
+        """载入文档：文本框改为只读预览，字数在后台线程统计"""
+        self._unload_document()
+        self.document = source
+        self._document_name = name
+        self._preview_source = source.reopen()
+        self._preview_pieces = self._iter_preview(self._preview_source)
+        self._render_preview()
+        self.text_area.config(state=tk.DISABLED)
+        
+        self.document_var.set(f"📄 {name} · 正在统计…")
+        self.update_status(f"📄 已载入{name}，预览按需显示")
+        self._count_cancel = threading.Event()
+        counter = threading.Thread(target=self._count_worker, args=(source, source.reopen(), self._count_cancel))
+        counter.daemon = True
+        counter.start()
+        self.root.after(100, self._poll_document_counts)
+    
+    def _unload_document(self):
+        """关闭已载入的文档，文本框恢复为可编辑"""
+        if self.document is not None:
+            self._count_cancel.set()
+            for source in (self.document, self._preview_source):
+                source.close()
+            self.document = None
+            self._preview_source = None
+            self._preview_pieces = None
+            self.document_var.set("")
+        self.text_area.config(state=tk.NORMAL)
+        self.text_area.delete(1.0, tk.END)
+        self._preview_chars = 0
+    
+    @staticmethod
+    def _iter_preview(source):
+        """把文档切成预览片段"""
+        for chunk, _ in source.chunks():
+            for start in range(0, len(chunk), PREVIEW_CHUNK_CHARS):
+                yield chunk[start:start + PREVIEW_CHUNK_CHARS]
+    
+    def _render_preview(self):
+        """在预览末尾追加下一段文档内容"""
+        if self._preview_pieces is None:
+            return
+        piece = next(self._preview_pieces, None)
+        if piece is not None and self._preview_chars < PREVIEW_MAX_CHARS:
+            self._preview_chars += len(piece)
+        else:
+            self._preview_pieces = None
+            piece = f"\n\n…（预览只显示前 {self._preview_chars} 个字符，打字时输入完整文档）" if piece else None
+        if piece:
+            state = self.text_area.cget("state")
+            self.text_area.config(state=tk.NORMAL)
+            self.text_area.insert(tk.END, piece)
+            self.text_area.config(state=state)
+    
+    def _on_text_scroll(self, first, last):
+        """文本框滚动回调：更新滚动条，接近预览末尾时渲染下一段"""
+        self.text_area.vbar.set(first, last)
+        if self._preview_pieces is not None and float(last) > 0.9:
+            self.root.after_idle(self._render_preview)
+    
+    def _count_worker(self, document, source, cancel):
+        """统计文档字数（后台线程，不碰界面）"""
+        try:
+            counts = count_text(source, cancel)
+        finally:
+            source.close()
+        if counts is not None:
+            self._document_counts = (document,) + counts
+    
+    def _poll_document_counts(self):
+        """主线程定时检查字数统计结果"""
+        result = self._document_counts
+        if result is None or result[0] is not self.document:
+            if self.document is not None and not self._count_cancel.is_set():
+                self.root.after(100, self._poll_document_counts)
+            return
+        self._document_counts = None
+        _, chars, lines = result
+        self.document_var.set(f"📄 {self._document_name} · {chars:,} 字符 · {lines:,} 行")
+    
     def get_typing_delay(self):
         """获取打字延迟"""
         speed_map = {
             "慢速 (0.1s/字符)": 0.1,
             "中速 (0.05s/字符)": 0.05,
             "快速 (0.02s/字符)": 0.02,
-            "极速 (0.01s/字符)": 0.01
+            "极速 (0.01s/字符)": 0.01,
+            # 自适应速度从最低速度起步
+            ADAPTIVE_SPEED_LABEL: 1 / DEFAULT_MIN_CPS,
         }
         return speed_map.get(self.speed_var.get(), 0.05)
     
+    def get_typing_mode(self):
+        """获取输入模式"""
+        for mode, label in MODES.items():
+            if label == self.mode_var.get():
+                return mode
+        return self.engine.mode
+    
     def update_status(self, message, color='#34495e'):
-        """更新状态信息"""
+        """更新状态信息（只能在主线程调用，工作线程请使用 _post_status）"""
         self.status_label.config(text=f"📊 状态: {message}", foreground=color)
-        self.root.update_idletasks()
     
     def start_typing(self):
         """开始打字"""
-        text = self.text_area.get(1.0, tk.END).strip()
-        if not text:
-            messagebox.showwarning("警告", "请先输入要打字的文本！")
+        # 先在主线程读取并校验设置（工作线程不访问任何Tk对象），设置有误时不改动任何状态
+        try:
+            countdown = int(self.delay_var.get())
+            if countdown < 0:
+                raise ValueError
+        except ValueError:
+            self.update_status("❌ 开始延迟必须是不小于 0 的整数秒", '#e74c3c')
             return
+        settings = (self.get_typing_delay(), countdown, self.get_typing_mode())
+        
+        if self.document is not None:
+            # 大文档直接从文档流式输入，不经过文本框
+            source = self.document
+        else:
+            text = self.text_area.get(1.0, tk.END).strip()
+            if not text:
+                messagebox.showwarning("警告", "请先输入要打字的文本！")
+                return
+            source = StringSource(text)
+        
+        # 上次中断的同一段文本可以从断点继续
+        key, state = self.checkpoints.find(source)
+        skip = 0
+        # 文件的总量按字节计算，无法与已输入的字符数比较
+        is_text = isinstance(source, StringSource)
+        if state is not None and (not is_text or state["chars"] < source.total):
+            of_total = f"（共 {source.total} 字符）" if is_text else ""
+            answer = messagebox.askyesnocancel(
+                "继续上次的打字",
+                f"这段文本上次输入到第 {state['chars']} 个字符{of_total}。\n\n"
+                f"是：从第 {state['chars'] + 1} 个字符继续\n否：从头开始")
+            if answer is None:
+                return
+            if answer:
+                skip = state["chars"]
+        checkpoint = self.checkpoints.open(source, key)
         
         self.is_typing = True
         self.pause_event.set()
         self.stop_event.clear()
+        self._progress_done = skip if is_text else 0
+        self._progress_total = source.total
+        self._shown_progress = None
+        self._estimate = None
+        self.progress_var.set(0)
         
         # 更新按钮状态
         self.start_button.config(state=tk.DISABLED)
         self.pause_button.config(state=tk.NORMAL)
         self.stop_button.config(state=tk.NORMAL)
         
+        self.engine.rate_control = AdaptiveRate() if self.speed_var.get() == ADAPTIVE_SPEED_LABEL else None
+        # 在启动工作线程之前更换后端（只记下名称，第一次按键时才创建），
+        # 打字线程和试运行线程看到的是同一个后端的名称、校准数据和 Unicode 能力
+        backend = self.backend_var.get()
+        if backend != self.engine.backend_name:
+            self.engine.set_backend(backend)
+        
         # 启动打字线程
-        self.typing_thread = threading.Thread(target=self._typing_worker, args=(text,))
+        self.typing_thread = threading.Thread(target=self._typing_worker,
+                                              args=(source,) + settings + (skip, checkpoint))
         self.typing_thread.daemon = True
         self.typing_thread.start()
+        
+        # 另开线程试运行整个来源，用于显示预计剩余时间（大文档编译需要一些时间，不耽误开始打字）
+        estimate_source = source.reopen()
+        if estimate_source is not None:
+            threading.Thread(target=self._estimate_worker, args=(estimate_source, settings[0], settings[2]),
+                             daemon=True).start()
+        self.root.after(UI_POLL_INTERVAL_MS, self._poll_worker)
     
     def pause_typing(self):
         """暂停/继续打字"""
@@ -196,6 +433,8 @@ class AutoTyperGUI:
     def stop_typing(self):
         """停止打字"""
         self.stop_event.set()
+        # 解除暂停，让处于暂停中的工作线程能看到停止信号并退出
+        self.pause_event.set()
         self.is_typing = False
         
         # 重置按钮状态
@@ -206,54 +445,79 @@ class AutoTyperGUI:
         self.progress_var.set(0)
         self.update_status("⏹️ 打字已停止", '#e74c3c')
     
-    def _typing_worker(self, text):
+    def _typing_worker(self, source, delay, start_delay, mode, skip=0, checkpoint=None):
         """打字工作线程"""
         try:
-            delay = self.get_typing_delay()
-            start_delay = int(self.delay_var.get())
-            
             # 倒计时
             for i in range(start_delay, 0, -1):
                 if self.stop_event.is_set():
                     return
-                self.update_status(f"⏰ {i} 秒后开始打字，请将光标放在目标位置...", '#f39c12')
+                self._post_status(f"⏰ {i} 秒后开始打字，请将光标放在目标位置...", '#f39c12')
                 time.sleep(1)
             
             if self.stop_event.is_set():
                 return
             
-            self.update_status("🖊️ 正在打字中...", '#3498db')
+            self._post_status("🖊️ 正在打字中...", '#3498db')
             
-            total_chars = len(text)
-            for i, char in enumerate(text):
-                if self.stop_event.is_set():
-                    break
-                
-                # 等待暂停解除
-                self.pause_event.wait()
-                
-                if self.stop_event.is_set():
-                    break
-                
-                pyautogui.write(char)
-                time.sleep(delay)
-                
-                # 更新进度
-                progress = (i + 1) / total_chars * 100
-                self.progress_var.set(progress)
-                
-                if (i + 1) % 50 == 0:
-                    self.update_status(f"🖊️ 打字进度: {progress:.1f}%", '#3498db')
+            self.engine.type_source(source, delay, self.stop_event, self.pause_event, self._on_progress, mode=mode,
+                                    skip=skip, checkpoint=checkpoint)
             
             if not self.stop_event.is_set():
-                self.update_status("✅ 打字完成！", '#27ae60')
-                self.progress_var.set(100)
+                stats = self.engine.last_stats
+                self._post_status(f"✅ 打字完成！实际速度 {stats.achieved_cps:.1f} 字符/秒", '#27ae60')
             
         except Exception as e:
-            self.update_status(f"❌ 错误: {e}", '#e74c3c')
-        finally:
-            # 重置状态
-            self.root.after(0, self._reset_ui_state)
+            self._post_status(f"❌ 错误: {e}", '#e74c3c')
+    
+    def _estimate_worker(self, source, delay, mode):
+        """试运行工作线程：估算整个来源的用时"""
+        try:
+            with source:
+                report = dry_run(self.engine, source, delay, mode)
+        except Exception:
+            # 估算失败只是不显示剩余时间
+            return
+        if not self.stop_event.is_set():
+            self._estimate = report
+    
+    def _on_progress(self, done, total):
+        """打字进度回调（工作线程中调用，只记录数值，不碰界面）"""
+        self._progress_done = done
+        self._progress_total = total
+    
+    def _post_status(self, message, color='#34495e'):
+        """从工作线程发送状态信息，由主线程在下一帧显示"""
+        self._ui_queue.put((message, color))
+    
+    def _poll_worker(self):
+        """主线程定时刷新：显示工作线程发来的状态和最新进度"""
+        while True:
+            try:
+                message, color = self._ui_queue.get_nowait()
+            except queue.Empty:
+                break
+            self.update_status(message, color)
+        
+        if not self.stop_event.is_set() and self._progress_total:
+            progress = self._progress_done / self._progress_total * 100
+            if progress != self._shown_progress:
+                self._shown_progress = progress
+                self.progress_var.set(progress)
+                if progress < 100:
+                    message = f"🖊️ 打字进度: {progress:.1f}%"
+                    if self._estimate is not None:
+                        remaining = self._estimate.remaining(progress / 100)
+                        message += f"，预计剩余 {format_duration(remaining)}"
+                    self.update_status(message, '#3498db')
+        
+        if self.typing_thread is not None and self.typing_thread.is_alive():
+            self.root.after(UI_POLL_INTERVAL_MS, self._poll_worker)
+        elif not self._ui_queue.empty():
+            # 线程刚结束，再刷新一次以显示最后的状态
+            self.root.after(0, self._poll_worker)
+        else:
+            self._reset_ui_state()
     
     def _reset_ui_state(self):
         """重置UI状态"""
@@ -299,10 +563,15 @@ class AutoTyperGUI:
         
         messagebox.showinfo("关于 - 智能自动打字助手", about_text)
 
-def main():
-    """主函数"""
+def main(engine=None):
+    """
+    主函数
+    
+    Args:
+        engine (TypingEngine): 打字引擎，从命令行菜单启动时可复用已有的引擎
+    """
     root = tk.Tk()
-    app = AutoTyperGUI(root)
+    app = AutoTyperGUI(root, engine)
     
     # 设置窗口图标（如果有的话）
     try:
@@ -319,6 +588,8 @@ def main():
     root.geometry(f'{width}x{height}+{x}+{y}')
     
     root.mainloop()
+    if engine is None:
+        app.engine.close()
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
@@ -0,0 +1,175 @@
+"""
+打字性能指标
+
+可选的打字引擎埋点：把后端调用耗时、休眠超时和暂停时长记录到固定内存的直方图中，
+打字结束后可以导出为 JSON 或 Prometheus 文本格式。未启用时引擎只多做一次 None 判断。
+"""
+
+import json
+import os
+import time
+from array import array
+
+# 直方图桶数：第 i 个桶统计 [2^(i-1), 2^i) 微秒，最后一个桶收纳所有更大的值
+BUCKET_COUNT = 32
+
+
+class LatencyHistogram:
+    """以2为底按微秒分桶的固定内存直方图"""
+
+    def __init__(self):
+        self.counts = array('Q', bytes(8 * BUCKET_COUNT))
+        self.count = 0
+        self.sum = 0.0
+        self.min = None
+        self.max = None
+
+    def observe(self, seconds):
+        """
+        记录一次耗时
+
+        Args:
+            seconds (float): 耗时（秒），负数按0处理
+        """
+        if seconds < 0:
+            seconds = 0.0
+        index = min(int(seconds * 1e6).bit_length(), BUCKET_COUNT - 1)
+        self.counts[index] += 1
+        self.count += 1
+        self.sum += seconds
+        if self.min is None or seconds < self.min:
+            self.min = seconds
+        if self.max is None or seconds > self.max:
+            self.max = seconds
+
+    @staticmethod
+    def upper_bound(index):
+        """第 index 个桶的上界（秒），最后一个桶为正无穷"""
+        if index >= BUCKET_COUNT - 1:
+            return float("inf")
+        return (1 << index) / 1e6
+
+    def percentile(self, p):
+        """
+        估算分位数（返回所在桶的上界，最后一个桶返回最大值）
+
+        Args:
+            p (float): 0-100 之间的百分位
+        """
+        if not self.count:
+            return None
+        rank = p / 100 * self.count
+        seen = 0
+        for index, bucket in enumerate(self.counts):
+            seen += bucket
+            if seen >= rank and bucket:
+                return min(self.upper_bound(index), self.max)
+        return self.max
+
+    def reset(self):
+        """清空直方图"""
+        for index in range(BUCKET_COUNT):
+            self.counts[index] = 0
+        self.count = 0
+        self.sum = 0.0
+        self.min = None
+        self.max = None
+
+    def to_dict(self):
+        """转换为可 JSON 序列化的字典（只包含非空桶）"""
+        return {
+            "count": self.count,
+            "sum": self.sum,
+            "min": self.min,
+            "max": self.max,
+            "p50": self.percentile(50),
+            "p90": self.percentile(90),
+            "p99": self.percentile(99),
+            "buckets": [
+                {"le": self.upper_bound(index) if index < BUCKET_COUNT - 1 else "+Inf", "count": bucket}
+                for index, bucket in enumerate(self.counts) if bucket
+            ],
+        }
+
+
+class TypingMetrics:
+    """一组打字引擎指标"""
+
+    # 指标名 -> 说明（也用作 Prometheus 的 HELP 文本）
+    DESCRIPTIONS = {
+        "backend_call_seconds": "Latency of a single keystroke backend call",
+        "sleep_overshoot_seconds": "Time the pacing sleep overshot its deadline",
+        "pause_seconds": "Time spent paused by the user",
+    }
+
+    def __init__(self):
+        self.backend_call = LatencyHistogram()
+        self.sleep_overshoot = LatencyHistogram()
+        self.pause = LatencyHistogram()
+        # 打字次数（含中途停止的）和已输入的字符数
+        self.runs = 0
+        self.chars = 0
+
+    def histograms(self):
+        """返回 (指标名, 直方图) 列表"""
+        return [
+            ("backend_call_seconds", self.backend_call),
+            ("sleep_overshoot_seconds", self.sleep_overshoot),
+            ("pause_seconds", self.pause),
+        ]
+
+    def reset(self):
+        """清空所有指标"""
+        for _, histogram in self.histograms():
+            histogram.reset()
+        self.runs = 0
+        self.chars = 0
+
+    def to_dict(self):
+        """转换为可 JSON 序列化的字典"""
+        data = {"runs": self.runs, "chars": self.chars}
+        for name, histogram in self.histograms():
+            data[name] = histogram.to_dict()
+        return data
+
+    def to_prometheus(self, prefix="auto_typer"):
+        """转换为 Prometheus 文本格式"""
+        lines = [
+            f"# HELP {prefix}_runs_total Typing runs started by the engine",
+            f"# TYPE {prefix}_runs_total counter",
+            f"{prefix}_runs_total {self.runs}",
+            f"# HELP {prefix}_chars_total Characters sent to the backend",
+            f"# TYPE {prefix}_chars_total counter",
+            f"{prefix}_chars_total {self.chars}",
+        ]
+        for name, histogram in self.histograms():
+            metric = f"{prefix}_{name}"
+            lines.append(f"# HELP {metric} {self.DESCRIPTIONS[name]}")
+            lines.append(f"# TYPE {metric} histogram")
+            cumulative = 0
+            for index, bucket in enumerate(histogram.counts):
+                cumulative += bucket
+                if index < BUCKET_COUNT - 1:
+                    lines.append(f'{metric}_bucket{{le="{histogram.upper_bound(index):.6g}"}} {cumulative}')
+            lines.append(f'{metric}_bucket{{le="+Inf"}} {histogram.count}')
+            lines.append(f"{metric}_sum {histogram.sum:.9f}")
+            lines.append(f"{metric}_count {histogram.count}")
+        return "\n".join(lines) + "\n"
+
+    def dump_json(self, path):
+        """写入 JSON 文件"""
+        data = self.to_dict()
+        data["timestamp"] = time.time()
+        _write_atomic(path, json.dumps(data, ensure_ascii=False, indent=2))
+
+    def dump_prometheus(self, path):
+        """写入 Prometheus 文本格式文件（可供 node_exporter 的 textfile collector 读取）"""
+        _write_atomic(path, self.to_prometheus())
+
+
+def _write_atomic(path, content):
+    """先写临时文件再替换，避免读取方看到写了一半的文件"""
+    temp_path = f"{path}.tmp"
+    with open(temp_path, "w", encoding="utf-8") as f:
+        f.write(content)
+    os.replace(temp_path, path)
@@ -0,0 +1,279 @@
+"""
+打字节奏控制
+
+按"绝对截止时间"安排每一次按键：第 k 个字符应在 开始时间 + k × 间隔 时发出。
+后端调用耗时和 sleep 的超时都会被下一次等待吸收，误差不会逐字符累积。
+
+AdaptiveRate 可以在打字过程中自动调整间隔：系统跟得上时逐步提速，
+后端调用变慢或调度落后（目标程序或系统来不及处理按键）时立即减速。
+"""
+
+import time
+
+# 落后计划超过这个时间（秒）时不再追赶，而是把计划整体后移，避免突发连打
+DEFAULT_MAX_LAG = 0.25
+# 间隔小于这个值（秒）时使用 sleep + 自旋 的混合等待
+DEFAULT_SPIN_BELOW = 0.01
+# 混合等待时最后留给自旋的时间（秒）
+DEFAULT_SPIN_MARGIN = 0.002
+
+# 自适应速度的默认范围（字符/秒）
+DEFAULT_MIN_CPS = 5.0
+DEFAULT_MAX_CPS = 100.0
+
+
+class PacingStats:
+    """一次打字的节奏统计"""
+
+    def __init__(self, interval):
+        self.interval = interval
+        self.chars = 0
+        self.elapsed = 0.0
+        self.paused = 0.0
+        self.lag_resets = 0
+        # 自适应速度时达到过的 (最低, 最高) 速度（字符/秒）及减速次数
+        self.rate_range = None
+        self.backoffs = 0
+
+    @property
+    def target_cps(self):
+        """目标速度（字符/秒），间隔为0时为 None（不限速）"""
+        if self.interval <= 0:
+            return None
+        return 1.0 / self.interval
+
+    @property
+    def achieved_cps(self):
+        """实际速度（字符/秒），不含暂停时间"""
+        active = self.elapsed - self.paused
+        if active <= 0:
+            return 0.0
+        return self.chars / active
+
+    def format_report(self):
+        """格式化为一行可读的报告"""
+        if self.rate_range is not None:
+            target = f"自适应 {self.rate_range[0]:.1f}-{self.rate_range[1]:.1f} 字符/秒"
+        elif self.target_cps is None:
+            target = "不限速"
+        else:
+            target = f"{self.target_cps:.1f} 字符/秒"
+        report = f"🎯 目标速度: {target} | 实际速度: {self.achieved_cps:.1f} 字符/秒 | 用时: {self.elapsed - self.paused:.2f}秒"
+        if self.lag_resets:
+            report += f" | 放弃追赶: {self.lag_resets}次"
+        if self.backoffs:
+            report += f" | 减速: {self.backoffs}次"
+        return report
+
+
+class DeadlineScheduler:
+    """基于单调时钟截止时间的节奏调度器"""
+
+    def __init__(self, interval, max_lag=DEFAULT_MAX_LAG, spin_below=DEFAULT_SPIN_BELOW,
+                 spin_margin=DEFAULT_SPIN_MARGIN, clock=time.perf_counter, sleep=time.sleep, overshoot=None):
+        """
+        Args:
+            interval (float): 每个字符之间的目标间隔（秒）
+            max_lag (float): 允许追赶的最大落后时间（秒）
+            spin_below (float): 间隔小于该值时启用自旋等待
+            spin_margin (float): 自旋等待的时长（秒）
+            clock (callable): 单调时钟
+            sleep (callable): 休眠函数
+            overshoot (LatencyHistogram): 可选，记录每次等待超出截止时间的长度
+        """
+        self.interval = interval
+        self.max_lag = max_lag
+        self.spin_below = spin_below
+        self._spin_margin = spin_margin
+        self.spin_margin = spin_margin if interval < spin_below else 0.0
+        self.clock = clock
+        self.sleep = sleep
+        self.overshoot = overshoot
+        self.stats = PacingStats(interval)
+        self.start_time = None
+        self.deadline = None
+        # 最近一次 wait() 时落后计划的时间（秒），按时则为0
+        self.last_lag = 0.0
+
+    def set_interval(self, interval):
+        """更改之后字符的间隔（已安排的截止时间不变）"""
+        self.interval = interval
+        self.spin_margin = self._spin_margin if interval < self.spin_below else 0.0
+
+    def start(self):
+        """开始计时，第一个字符立即发出"""
+        self.start_time = self.deadline = self.clock()
+
+    def remaining(self):
+        """
+        距下一次按键的截止时间还有多久（秒），已到期时返回0
+
+        如果已经落后（追赶），落后超过 max_lag 时把计划后移到只落后 max_lag。
+        异步打字用它代替 wait()，由事件循环的定时器等待。
+        """
+        if self.interval <= 0:
+            return 0.0
+
+        now = self.clock()
+        remaining = self.deadline - now
+        self.last_lag = max(0.0, -remaining)
+        if remaining <= 0:
+            if -remaining > self.max_lag:
+                self.deadline = now - self.max_lag
+                self.stats.lag_resets += 1
+            return 0.0
+        return remaining
+
+    def wait(self):
+        """
+        等待到下一次按键的截止时间
+
+        如果已经落后，直接返回（追赶）；落后超过 max_lag 时把计划后移到只落后 max_lag。
+        """
+        remaining = self.remaining()
+        if remaining <= 0:
+            return
+
+        if remaining > self.spin_margin:
+            self.sleep(remaining - self.spin_margin)
+        # 自旋等待剩余的一小段时间，精度远高于 sleep
+        while self.clock() < self.deadline:
+            pass
+        if self.overshoot is not None:
+            self.overshoot.observe(self.clock() - self.deadline)
+
+    def advance(self, chars, seconds=None):
+        """
+        记录已发出 chars 个字符，把截止时间推后相应的间隔
+
+        Args:
+            chars (int): 字符数
+            seconds (float): 推后的时间（秒），默认 间隔 × 字符数；拟人节奏由预先生成的时间表给出
+        """
+        self.deadline += self.interval * chars if seconds is None else seconds
+        self.stats.chars += chars
+
+    def rebase(self, chars):
+        """
+        记录一段不按字符节奏发出的 chars 个字符（如粘贴），并从当前时间重新开始计划
+        """
+        self.deadline = max(self.deadline, self.clock())
+        self.stats.chars += chars
+
+    def shift(self, seconds):
+        """
+        把整个计划推后 seconds 秒（用于暂停），暂停时间不计入追赶
+        """
+        self.deadline += seconds
+        self.stats.paused += seconds
+
+    def finish(self, wait=True):
+        """
+        结算统计
+
+        Args:
+            wait (bool): 是否先等待最后一个字符的间隔结束（被中断时传 False）
+        """
+        if wait:
+            self.wait()
+            end = self.clock()
+        else:
+            # 中途停止时，已发出的字符算到它们各自间隔的结束为止
+            end = max(self.clock(), self.deadline)
+        self.stats.elapsed = end - self.start_time
+        return self.stats
+
+
+class AdaptiveRate:
+    """
+    自适应速度控制：加性提速、乘性减速（AIMD）
+
+    每个批次发出后，打字引擎把 每字符的后端调用耗时 和 调度落后时间 交给 observe()：
+
+    - 耗时明显高于历史基线，或者调度落后超过容忍值，说明目标程序或系统跟不上，速度乘以 decrease
+    - 连续 window 个批次都正常时，速度增加 increase 字符/秒
+    - 速度始终限制在 [min_cps, max_cps] 之内，减速后的 window 个批次内不再重复减速
+    """
+
+    def __init__(self, min_cps=DEFAULT_MIN_CPS, max_cps=DEFAULT_MAX_CPS, increase=None, decrease=0.7,
+                 latency_factor=2.0, latency_slack=0.002, lag_tolerance=0.05, window=8):
+        """
+        Args:
+            min_cps (float): 最低速度（字符/秒）
+            max_cps (float): 最高速度（字符/秒）
+            increase (float): 每次提速的幅度（字符/秒），默认取速度范围的 2%
+            decrease (float): 减速时速度乘以的系数
+            latency_factor (float): 每字符耗时超过 基线 × 该倍数 + latency_slack 时视为拥塞
+            latency_slack (float): 耗时判定的绝对余量（秒），避免基线很小时误判
+            lag_tolerance (float): 调度落后超过该时间（秒）时视为拥塞
+            window (int): 连续正常多少个批次后提速一次
+        """
+        if min_cps <= 0 or max_cps < min_cps:
+            raise ValueError(f"无效的速度范围: {min_cps}-{max_cps} 字符/秒")
+        self.min_cps = min_cps
+        self.max_cps = max_cps
+        self.increase = increase if increase is not None else max(0.5, (max_cps - min_cps) * 0.02)
+        self.decrease = decrease
+        self.latency_factor = latency_factor
+        self.latency_slack = latency_slack
+        self.lag_tolerance = lag_tolerance
+        self.window = window
+        self.start()
+
+    def start(self, cps=None):
+        """
+        开始一次打字
+
+        Args:
+            cps (float): 起始速度（字符/秒），默认为最低速度
+        """
+        self.cps = min(self.max_cps, max(self.min_cps, cps or self.min_cps))
+        self.baseline = None
+        self.lowest = self.highest = self.cps
+        self.backoffs = 0
+        self._good = 0
+        self._hold = 0
+
+    @property
+    def interval(self):
+        """当前的字符间隔（秒）"""
+        return 1.0 / self.cps
+
+    def observe(self, latency, chars, lag=0.0):
+        """
+        记录一个批次的表现并调整速度
+
+        Args:
+            latency (float): 该批次后端调用（含刷新、同步）的总耗时（秒）
+            chars (int): 该批次的字符数
+            lag (float): 发出该批次时落后计划的时间（秒）
+
+        Returns:
+            float: 调整后的字符间隔（秒）
+        """
+        per_char = latency / max(1, chars)
+        if self.baseline is None or per_char < self.baseline:
+            self.baseline = per_char
+        else:
+            # 基线缓慢跟随，适应后端本身的正常波动
+            self.baseline += (per_char - self.baseline) * 0.01
+
+        congested = (per_char > self.baseline * self.latency_factor + self.latency_slack
+                     or lag > self.lag_tolerance)
+        if self._hold:
+            self._hold -= 1
+        if congested:
+            self._good = 0
+            if not self._hold:
+                self.cps = max(self.min_cps, self.cps * self.decrease)
+                self.backoffs += 1
+                self._hold = self.window
+        else:
+            self._good += 1
+            if self._good >= self.window:
+                self._good = 0
+                self.cps = min(self.max_cps, self.cps + self.increase)
+
+        self.lowest = min(self.lowest, self.cps)
+        self.highest = max(self.highest, self.cps)
+        return 1.0 / self.cps
@@ -0,0 +1,502 @@
+"""
+打字计划
+
+打字前把文本"编译"成一份紧凑的操作列表（KeyPlan），打字引擎只负责按顺序执行：
+
+- 按输入模式划分打字段和粘贴段
+- pyautogui 等按键后端只能模拟键盘上有的字符，遇到中文等字符会静默丢弃，
+  因此打字段再划分为"可直接按键"和"需要粘贴"的片段（由正则表达式在 C 层完成）
+- 打字段按延迟切成字符批次，每个批次对应一次后端调用
+
+编译结果保存在 array 中，可以按 文本哈希 + 设置 缓存到磁盘，同一模板反复输入时直接重放。
+"""
+
+import hashlib
+import json
+import os
+import re
+import struct
+from array import array
+
+from auto_typer_clipboard import split_segments
+
+# 程序数据目录（计划缓存等），可用环境变量 AUTO_TYPER_HOME 覆盖
+APP_DIR = os.environ.get("AUTO_TYPER_HOME") or os.path.join(os.path.expanduser("~"), ".auto_typer")
+
+# 批次时间窗口（秒）：一个批次内的字符按计划要在这么长时间内打完
+DEFAULT_BATCH_WINDOW = 0.02
+# 单个批次最多包含的字符数
+DEFAULT_MAX_RUN = 64
+
+# 输入模式
+MODE_TYPE = "type"
+MODE_PASTE = "paste"
+MODE_HYBRID = "hybrid"
+MODES = {
+    MODE_TYPE: "逐字输入",
+    MODE_PASTE: "粘贴输入",
+    MODE_HYBRID: "智能混合",
+}
+
+# 粘贴模式下每段的字符数
+DEFAULT_PASTE_SEGMENT_SIZE = 4000
+# 每次粘贴后的等待时间（秒），给目标程序留出读取剪贴板的时间
+DEFAULT_PASTE_DELAY = 0.05
+# 估算的单次按键最小耗时（秒），智能混合模式据此比较打字和粘贴的代价
+KEYSTROKE_COST = 0.001
+
+# 分段类型
+SEGMENT_TYPE = "type"
+SEGMENT_PASTE = "paste"
+
+# 可以直接用按键模拟的字符：可打印 ASCII 以及制表符、换行符
+TYPEABLE_CHARS = r"\x20-\x7e\t\n\r"
+# 两个不可按键片段之间不超过这么多字符的可按键字符会并入粘贴，避免频繁切换
+UNICODE_MERGE_GAP = 8
+
+_UNTYPEABLE_RUN = re.compile(
+    rf"[^{TYPEABLE_CHARS}]+(?:[{TYPEABLE_CHARS}]{{1,{UNICODE_MERGE_GAP}}}[^{TYPEABLE_CHARS}]+)*"
+)
+
+# 片段类型
+RUN_KEYS = "keys"
+RUN_UNICODE = "unicode"
+
+# 计划操作码
+OP_TYPE = 1     # 输入 text[a:b]
+OP_PASTE = 2    # 粘贴 text[a:b]，之后等待 paste_delay
+OP_KEY = 3      # 按下 keys[a] 共 b 次
+OP_HOTKEY = 4   # 按下组合键 keys[a]（以 "+" 连接，如 "ctrl+v"）
+OP_WAIT = 5     # 等待 a 微秒
+
+# 计划文件格式版本，编译规则变化时递增，使旧缓存失效
+PLAN_VERSION = 1
+_PLAN_MAGIC = b"ATPL"
+_PLAN_HEADER = struct.Struct("<4sHIII")
+
+
+def has_untypeable(text):
+    """文本中是否含有无法直接按键输入的字符"""
+    return _UNTYPEABLE_RUN.search(text) is not None
+
+
+def split_typeable(text):
+    """
+    把文本划分为可直接按键的片段和需要其他方式输入的片段
+
+    中文句子里夹杂的少量空格、数字和标点会并入相邻的中文片段一起粘贴。
+
+    Yields:
+        tuple: (RUN_KEYS 或 RUN_UNICODE, 文本片段)
+    """
+    position = 0
+    for match in _UNTYPEABLE_RUN.finditer(text):
+        start, end = match.span()
+        if start > position:
+            yield RUN_KEYS, text[position:start]
+        yield RUN_UNICODE, text[start:end]
+        position = end
+    if position < len(text):
+        yield RUN_KEYS, text[position:]
+
+
+def run_length(delay, batch_window=DEFAULT_BATCH_WINDOW, max_run=DEFAULT_MAX_RUN):
+    """
+    计算每个批次的字符数
+
+    延迟大于等于时间窗口时每批只有1个字符（与逐字符输入完全一致），
+    延迟越小批次越大，延迟为0时取 max_run。
+
+    Args:
+        delay (float): 每个字符之间的延迟时间（秒）
+        batch_window (float): 批次时间窗口（秒）
+        max_run (int): 单个批次最多包含的字符数
+    """
+    if delay <= 0:
+        return max_run
+    return max(1, min(max_run, int(batch_window / delay)))
+
+
+def coalesce_runs(text, delay, batch_window=DEFAULT_BATCH_WINDOW, max_run=DEFAULT_MAX_RUN):
+    """
+    把文本切成连续的字符批次
+
+    Args:
+        text (str): 要输入的文本
+        delay (float): 每个字符之间的延迟时间（秒）
+
+    Yields:
+        str: 一个批次的字符
+    """
+    size = run_length(delay, batch_window, max_run)
+    for start in range(0, len(text), size):
+        yield text[start:start + size]
+
+
+def plan_segments(text, mode, delay, segment_size=DEFAULT_PASTE_SEGMENT_SIZE, paste_delay=DEFAULT_PASTE_DELAY,
+                  unicode_ok=True):
+    """
+    按输入模式把文本划分为打字段和粘贴段
+
+    智能混合模式下，打完一段的预计耗时超过一次粘贴的耗时就粘贴，否则直接打字，
+    因此长段落会被粘贴，短的零头会被打出来。
+    后端无法直接输入中文等字符时，打字段中的这些字符会改为粘贴。
+
+    Args:
+        text (str): 要输入的文本
+        mode (str): 输入模式（MODE_TYPE / MODE_PASTE / MODE_HYBRID）
+        delay (float): 每个字符之间的延迟时间（秒）
+        segment_size (int): 粘贴时每段的字符数
+        paste_delay (float): 每次粘贴后的等待时间（秒）
+        unicode_ok (bool): 后端能否直接输入任意Unicode字符
+
+    Yields:
+        tuple: (分段类型, 文本)
+    """
+    if mode not in MODES:
+        raise ValueError(f"未知的输入模式: {mode}（可选: {', '.join(MODES)}）")
+
+    if mode == MODE_TYPE:
+        segments = [(SEGMENT_TYPE, text)] if text else []
+    else:
+        segments = (
+            (SEGMENT_PASTE, segment)
+            if mode == MODE_PASTE or len(segment) * (delay + KEYSTROKE_COST) > paste_delay
+            else (SEGMENT_TYPE, segment)
+            for segment in split_segments(text, segment_size)
+        )
+
+    for kind, segment in segments:
+        if kind == SEGMENT_PASTE or unicode_ok:
+            yield kind, segment
+            continue
+        for run_kind, run in split_typeable(segment):
+            if run_kind == RUN_UNICODE:
+                for piece in split_segments(run, segment_size):
+                    yield SEGMENT_PASTE, piece
+            else:
+                yield SEGMENT_TYPE, run
+
+
+class KeyPlan:
+    """
+    编译好的打字计划
+
+    每个操作占 ops 中的一个操作码和 args 中的两个参数，文本操作的参数是 text 中的起止位置，
+    因此整份计划只保存一份原文，不会为每个批次单独保存字符串。
+    """
+
+    def __init__(self, text, delay, settings):
+        """
+        Args:
+            text (str): 原文
+            delay (float): 每个字符之间的延迟时间（秒）
+            settings (dict): 编译时使用的设置（输入模式、粘贴参数等）
+        """
+        self.text = text
+        self.delay = delay
+        self.settings = settings
+        self.ops = array('B')
+        self.args = array('I')
+        self.keys = []
+        # 计划之前已输入的文本末尾（不属于本计划），编辑器精简据此确定当前行的内容
+        self.context = ""
+
+    def add(self, op, a=0, b=0):
+        """追加一个操作"""
+        self.ops.append(op)
+        self.args.append(a)
+        self.args.append(b)
+
+    def add_key(self, key, presses=1):
+        """追加一次按键操作"""
+        self.add(OP_KEY, self._key_index(key), presses)
+
+    def add_hotkey(self, *keys):
+        """追加一次组合键操作"""
+        self.add(OP_HOTKEY, self._key_index("+".join(keys)))
+
+    def add_text(self, start, end):
+        """
+        追加输入 text[start:end] 的操作：按编译设置划分打字段和粘贴段，打字段按延迟切成批次
+
+        Args:
+            start (int): 起始位置
+            end (int): 结束位置
+        """
+        settings = self.settings
+        size = run_length(self.delay, settings["batch_window"], settings["max_run"])
+        profile = None
+        if settings.get("editor"):
+            from auto_typer_editor import add_editor_text, get_profile
+            profile = get_profile(settings["editor"])
+        position = start
+        for kind, segment in plan_segments(self.text[start:end], settings["mode"], self.delay,
+                                           settings["paste_segment_size"], settings["paste_delay"],
+                                           settings["unicode_ok"]):
+            segment_end = position + len(segment)
+            if kind == SEGMENT_PASTE:
+                self.add(OP_PASTE, position, segment_end)
+            elif profile is not None:
+                add_editor_text(self, position, segment_end, profile, size, settings.get("key_repeat", False))
+            else:
+                for batch_start in range(position, segment_end, size):
+                    self.add(OP_TYPE, batch_start, min(batch_start + size, segment_end))
+            position = segment_end
+
+    def _key_index(self, key):
+        try:
+            return self.keys.index(key)
+        except ValueError:
+            self.keys.append(key)
+            return len(self.keys) - 1
+
+    def __len__(self):
+        return len(self.ops)
+
+    def __iter__(self):
+        """
+        Yields:
+            tuple: (操作码, 参数a, 参数b)
+        """
+        args = self.args
+        for index, op in enumerate(self.ops):
+            yield op, args[2 * index], args[2 * index + 1]
+
+    @property
+    def paste_delay(self):
+        return self.settings.get("paste_delay", DEFAULT_PASTE_DELAY)
+
+    @property
+    def has_paste(self):
+        """计划中是否有粘贴操作"""
+        return OP_PASTE in self.ops
+
+    def keystrokes(self):
+        """计划发出的按键次数（粘贴和组合键各计一次）"""
+        count = 0
+        for op, a, b in self:
+            if op == OP_TYPE:
+                count += b - a
+            elif op == OP_KEY:
+                count += b
+            elif op in (OP_PASTE, OP_HOTKEY):
+                count += 1
+        return count
+
+    def estimate_duration(self):
+        """按计划中的延迟估算用时（秒），不含后端开销"""
+        estimated = 0.0
+        for op, a, b in self:
+            if op == OP_TYPE:
+                estimated += (b - a) * self.delay
+            elif op == OP_KEY:
+                estimated += b * self.delay
+            elif op == OP_HOTKEY:
+                estimated += self.delay
+            elif op == OP_PASTE:
+                estimated += self.paste_delay
+            elif op == OP_WAIT:
+                estimated += a / 1e6
+        return estimated
+
+    def to_bytes(self):
+        """序列化为字节串"""
+        header = json.dumps({"delay": self.delay, "settings": self.settings, "keys": self.keys},
+                            ensure_ascii=False).encode("utf-8")
+        text = self.text.encode("utf-8")
+        ops = self.ops.tobytes()
+        args = self.args.tobytes()
+        return b"".join([
+            _PLAN_HEADER.pack(_PLAN_MAGIC, PLAN_VERSION, len(header), len(self.ops), len(text)),
+            header, ops, args, text,
+        ])
+
+    @classmethod
+    def from_bytes(cls, data):
+        """
+        从字节串恢复计划
+
+        Args:
+            data (bytes | memoryview): 序列化的计划；可以是共享内存的视图，读取时不必先复制成字节串
+
+        Raises:
+            ValueError: 数据格式不正确或版本不符
+        """
+        try:
+            magic, version, header_size, op_count, text_size = _PLAN_HEADER.unpack_from(data)
+        except struct.error:
+            raise ValueError("计划文件已损坏") from None
+        if magic != _PLAN_MAGIC or version != PLAN_VERSION:
+            raise ValueError("计划文件格式或版本不符")
+
+        position = _PLAN_HEADER.size
+        header = json.loads(str(data[position:position + header_size], "utf-8"))
+        position += header_size
+
+        plan = cls(None, header["delay"], header["settings"])
+        plan.keys = header["keys"]
+        plan.ops.frombytes(data[position:position + op_count])
+        position += op_count
+        args_size = 2 * op_count * plan.args.itemsize
+        plan.args.frombytes(data[position:position + args_size])
+        position += args_size
+        if len(data) != position + text_size:
+            raise ValueError("计划文件已损坏")
+        plan.text = str(data[position:], "utf-8")
+        return plan
+
+
+def compile_plan(text, delay, mode=MODE_TYPE, paste_segment_size=DEFAULT_PASTE_SEGMENT_SIZE,
+                 paste_delay=DEFAULT_PASTE_DELAY, unicode_ok=True, batch_window=DEFAULT_BATCH_WINDOW,
+                 max_run=DEFAULT_MAX_RUN, editor=None, key_repeat=False, context=""):
+    """
+    把文本编译为打字计划
+
+    Args:
+        text (str): 要输入的文本
+        delay (float): 每个字符之间的延迟时间（秒）
+        mode (str): 输入模式
+        paste_segment_size (int): 粘贴时每段的字符数
+        paste_delay (float): 每次粘贴后的等待时间（秒）
+        unicode_ok (bool): 后端能否直接输入任意Unicode字符
+        batch_window (float): 批次时间窗口（秒）
+        max_run (int): 单个批次最多包含的字符数
+        editor (str): 目标编辑器配置名称（见 auto_typer_editor），None 表示逐字输入原文
+        key_repeat (bool): 后端能否在一次调用中重复按键（编辑器精简据此合并重复字符）
+        context (str): 之前已输入的文本末尾（分块编译时传入上一块的末尾）
+
+    Returns:
+        KeyPlan: 打字计划
+
+    Raises:
+        ValueError: 未知的输入模式或编辑器配置
+    """
+    settings = plan_settings(mode, paste_segment_size, paste_delay, unicode_ok, batch_window, max_run, editor,
+                             key_repeat)
+    plan = KeyPlan(text, delay, settings)
+    plan.context = context
+    plan.add_text(0, len(text))
+    return plan
+
+
+def plan_settings(mode, paste_segment_size, paste_delay, unicode_ok, batch_window, max_run, editor=None,
+                  key_repeat=False):
+    """把影响编译结果的设置整理为字典（也是缓存键的一部分）"""
+    return {
+        "mode": mode,
+        "paste_segment_size": paste_segment_size,
+        "paste_delay": paste_delay,
+        "unicode_ok": unicode_ok,
+        "batch_window": batch_window,
+        "max_run": max_run,
+        "editor": editor,
+        "key_repeat": key_repeat,
+    }
+
+
+def settings_from_options(options):
+    """把 compile_plan 的关键字参数整理为设置字典，未给出的取默认值"""
+    return plan_settings(
+        options.get("mode", MODE_TYPE),
+        options.get("paste_segment_size", DEFAULT_PASTE_SEGMENT_SIZE),
+        options.get("paste_delay", DEFAULT_PASTE_DELAY),
+        options.get("unicode_ok", True),
+        options.get("batch_window", DEFAULT_BATCH_WINDOW),
+        options.get("max_run", DEFAULT_MAX_RUN),
+        options.get("editor"),
+        options.get("key_repeat", False),
+    )
+
+
+def plan_cache_key(text, delay, settings):
+    """
+    计算缓存键：文本哈希 + 设置
+
+    Returns:
+        str: 十六进制 SHA-256
+    """
+    digest = hashlib.sha256()
+    digest.update(json.dumps({"version": PLAN_VERSION, "delay": delay, "settings": settings},
+                             sort_keys=True).encode("utf-8"))
+    digest.update(b"\0")
+    digest.update(text.encode("utf-8"))
+    return digest.hexdigest()
+
+
+class PlanCache:
+    """打字计划的磁盘缓存"""
+
+    # 最多保留的计划文件数，超出时删除最久未使用的
+    MAX_ENTRIES = 200
+
+    def __init__(self, directory=None):
+        """
+        Args:
+            directory (str): 缓存目录，默认 ~/.auto_typer/plans
+        """
+        self.directory = directory or os.path.join(APP_DIR, "plans")
+
+    def _path(self, key):
+        return os.path.join(self.directory, f"{key}.plan")
+
+    def get(self, key):
+        """
+        读取缓存的计划
+
+        Returns:
+            KeyPlan | None: 未命中或文件损坏时返回 None
+        """
+        path = self._path(key)
+        try:
+            with open(path, "rb") as f:
+                plan = KeyPlan.from_bytes(f.read())
+        except (OSError, ValueError):
+            return None
+        # 更新修改时间，供清理时判断最近使用
+        try:
+            os.utime(path)
+        except OSError:
+            pass
+        return plan
+
+    def put(self, key, plan):
+        """保存计划（写入失败时静默跳过，缓存只是加速手段）"""
+        try:
+            os.makedirs(self.directory, exist_ok=True)
+            temp_path = f"{self._path(key)}.tmp"
+            with open(temp_path, "wb") as f:
+                f.write(plan.to_bytes())
+            os.replace(temp_path, self._path(key))
+            self._prune()
+        except OSError:
+            pass
+
+    def _prune(self):
+        entries = [entry for entry in os.scandir(self.directory) if entry.name.endswith(".plan")]
+        if len(entries) <= self.MAX_ENTRIES:
+            return
+        entries.sort(key=lambda entry: entry.stat().st_mtime)
+        for entry in entries[:len(entries) - self.MAX_ENTRIES]:
+            os.remove(entry.path)
+
+    def load_or_compile(self, text, delay, **options):
+        """
+        命中缓存时直接返回缓存的计划，否则编译并写入缓存
+
+        Args:
+            text (str): 要输入的文本
+            delay (float): 每个字符之间的延迟时间（秒）
+            **options: 传给 compile_plan 的其余设置
+
+        Returns:
+            tuple: (KeyPlan, 是否命中缓存)
+        """
+        settings = settings_from_options(options)
+        key = plan_cache_key(text, delay, settings)
+        plan = self.get(key)
+        if plan is not None:
+            return plan, True
+        plan = compile_plan(text, delay, **settings)
+        self.put(key, plan)
+        return plan, False
@@ -0,0 +1,301 @@
+"""
+文本来源
+
+打字引擎按块读取文本来源，边读边打，内存占用只和块大小有关，与文本总长度无关：
+
+- ``StringSource``: 内存中的字符串
+- ``FileSource``: 文件（内存映射读取，按字节计算进度）
+- ``StreamSource``: 二进制或文本流，如标准输入管道
+- ``IterableSource``: 任意产生字符串的可迭代对象（如生成器）
+
+每个来源的 ``chunks()`` 产生 (文本块, 读完该块后的位置)，位置和 ``total`` 使用同一单位
+（字符串按字符、文件和流按字节），引擎据此计算进度。
+"""
+
+import codecs
+import io
+import mmap
+import os
+import sys
+
+# 每次读取的字节数
+DEFAULT_CHUNK_SIZE = 64 * 1024
+
+
+class TextSource:
+    """文本来源基类"""
+
+    # 进度单位（"字符" 或 "字节"）
+    unit = "字符"
+
+    def __init__(self):
+        # 总量，未知时为 None
+        self.total = None
+
+    def chunks(self):
+        """
+        按顺序产生文本块
+
+        Yields:
+            tuple: (文本块, 读完该块后的位置)
+        """
+        raise NotImplementedError
+
+    def describe(self):
+        """用于提示信息的简短描述"""
+        return "文本"
+
+    def preview(self, length=50):
+        """返回开头最多 length 个字符，用于预览（无法预览时返回空字符串）"""
+        return ""
+
+    def reopen(self):
+        """
+        返回可以独立读取的同一来源（例如在另一个线程中统计字数、渲染预览）
+
+        Returns:
+            TextSource | None: 只能读取一次的来源（标准输入、生成器）返回 None
+        """
+        return None
+
+    def close(self):
+        """释放来源占用的资源"""
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+class StringSource(TextSource):
+    """内存中的字符串"""
+
+    def __init__(self, text):
+        super().__init__()
+        self.text = text
+        self.total = len(text)
+
+    def chunks(self):
+        # 整个字符串作为一块，不做任何复制
+        if self.text:
+            yield self.text, self.total
+
+    def describe(self):
+        return f"文本 ({self.total} 字符)"
+
+    def preview(self, length=50):
+        return self.text[:length]
+
+    def reopen(self):
+        # chunks() 不修改任何状态，可以共用
+        return self
+
+
+def _decode_chunks(read, encoding, chunk_size, start=0):
+    """
+    把按字节读取的函数包装成增量解码的文本块生成器
+
+    与以文本模式打开文件一样统一换行符：\r\n 和 \r 都转换为 \n，
+    否则 Windows 换行会被打成两次回车。跨块的 \r\n 也能正确合并。
+
+    Args:
+        read (callable): read(字节数) 返回 bytes，读完时返回空
+        encoding (str): 文本编码
+        chunk_size (int): 每次读取的字节数
+        start (int): 起始字节位置
+
+    Yields:
+        tuple: (文本块, 读完该块后的字节位置)
+    """
+    decoder = io.IncrementalNewlineDecoder(codecs.getincrementaldecoder(encoding)(errors="replace"), translate=True)
+    position = start
+    while True:
+        data = read(chunk_size)
+        if not data:
+            break
+        position += len(data)
+        text = decoder.decode(data)
+        if text:
+            yield text, position
+    tail = decoder.decode(b"", final=True)
+    if tail:
+        yield tail, position
+
+
+class FileSource(TextSource):
+    """文件来源：使用内存映射按块读取，进度按字节计算"""
+
+    unit = "字节"
+
+    def __init__(self, path, encoding="utf-8", chunk_size=DEFAULT_CHUNK_SIZE):
+        """
+        Args:
+            path (str): 文件路径
+            encoding (str): 文件编码
+            chunk_size (int): 每次读取的字节数
+        """
+        super().__init__()
+        self.path = path
+        self.encoding = encoding
+        self.chunk_size = chunk_size
+        self.total = os.path.getsize(path)
+        self._file = None
+        self._map = None
+
+    def _open(self):
+        if self._file is None:
+            self._file = open(self.path, "rb")
+            # 空文件无法建立内存映射
+            if self.total > 0:
+                self._map = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+
+    def chunks(self):
+        self._open()
+        if self._map is None:
+            return
+        self._map.seek(0)
+        # utf-8 文件开头的 BOM 不应被打出来
+        start = 0
+        if self.encoding.lower().replace("-", "") == "utf8" and self._map[:3] == codecs.BOM_UTF8:
+            start = len(codecs.BOM_UTF8)
+            self._map.seek(start)
+        yield from _decode_chunks(self._map.read, self.encoding, self.chunk_size, start)
+
+    def describe(self):
+        return f"文件 {os.path.basename(self.path)} ({format_size(self.total)})"
+
+    def preview(self, length=50):
+        with open(self.path, "rb") as f:
+            # 每个字符最多4字节
+            data = f.read(length * 4)
+        text = data.decode(self.encoding, errors="ignore").lstrip("\ufeff")
+        return text[:length]
+
+    def reopen(self):
+        return FileSource(self.path, self.encoding, self.chunk_size)
+
+    def close(self):
+        if self._map is not None:
+            self._map.close()
+            self._map = None
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+
+class StreamSource(TextSource):
+    """流来源（如标准输入管道），总长度通常未知"""
+
+    unit = "字节"
+
+    def __init__(self, stream=None, encoding="utf-8", chunk_size=DEFAULT_CHUNK_SIZE):
+        """
+        Args:
+            stream: 二进制或文本流，默认为标准输入
+            encoding (str): 流的编码（二进制流时使用）
+            chunk_size (int): 每次读取的字节数
+        """
+        super().__init__()
+        if stream is None:
+            stream = sys.stdin
+        # 文本流优先读取其底层的二进制缓冲区，避免重复解码
+        self.stream = getattr(stream, "buffer", stream)
+        self.encoding = encoding
+        self.chunk_size = chunk_size
+
+    def chunks(self):
+        if isinstance(self.stream, io.TextIOBase):
+            # 没有二进制缓冲区的文本流：直接按字符读取
+            position = 0
+            while True:
+                text = self.stream.read(self.chunk_size)
+                if not text:
+                    break
+                position += len(text.encode(self.encoding))
+                yield text, position
+            return
+        yield from _decode_chunks(self.stream.read, self.encoding, self.chunk_size)
+
+    def describe(self):
+        return "标准输入" if self.stream in (sys.stdin, getattr(sys.stdin, "buffer", None)) else "数据流"
+
+
+class IterableSource(TextSource):
+    """可迭代对象来源：逐个取出字符串，进度按字符计算"""
+
+    def __init__(self, iterable, total=None):
+        """
+        Args:
+            iterable: 产生字符串的可迭代对象
+            total (int): 总字符数（已知时提供，用于计算进度百分比）
+        """
+        super().__init__()
+        self.iterable = iterable
+        self.total = total
+
+    def chunks(self):
+        position = 0
+        for text in self.iterable:
+            if text:
+                position += len(text)
+                yield text, position
+
+    def describe(self):
+        return "文本流" if self.total is None else f"文本流 ({self.total} 字符)"
+
+
+def open_source(source, encoding="utf-8"):
+    """
+    把各种输入统一为 TextSource
+
+    Args:
+        source: TextSource、文件路径、"-"（标准输入）、文件对象或产生字符串的可迭代对象
+        encoding (str): 文件或流的编码
+
+    Returns:
+        TextSource: 文本来源
+    """
+    if isinstance(source, TextSource):
+        return source
+    if source == "-":
+        return StreamSource(encoding=encoding)
+    if isinstance(source, (str, os.PathLike)):
+        return FileSource(source, encoding=encoding)
+    if hasattr(source, "read"):
+        return StreamSource(source, encoding=encoding)
+    return IterableSource(source)
+
+
+def count_text(source, stop_event=None):
+    """
+    按块统计文本的字符数和行数（不会把全部内容读入内存）
+
+    Args:
+        source (TextSource): 文本来源
+        stop_event (threading.Event): 被设置时放弃统计
+
+    Returns:
+        tuple | None: (字符数, 行数)；被放弃时返回 None
+    """
+    chars = 0
+    newlines = 0
+    last = ""
+    for chunk, _ in source.chunks():
+        if stop_event is not None and stop_event.is_set():
+            return None
+        chars += len(chunk)
+        newlines += chunk.count("\n")
+        last = chunk[-1]
+    # 最后一行没有换行符时也算一行
+    lines = newlines + (1 if chars and last != "\n" else 0)
+    return chars, lines
+
+
+def format_size(size):
+    """把字节数格式化为易读的字符串"""
+    for unit in ("B", "KB", "MB"):
+        if size < 1024:
+            return f"{size:.0f} {unit}" if unit == "B" else f"{size:.1f} {unit}"
+        size /= 1024
+    return f"{size:.1f} GB"
@@ -0,0 +1,206 @@
+"""
+拟人打字节奏
+
+固定的字符间隔一眼就能看出是机器在打字。TimingModel 在打字开始前为整段文本一次性生成
+每个字符之后的等待时间：
+
+- 基础间隔按对数正态分布随机波动（均值不变）
+- 常见字母组合（如 th、er、ing 中的相邻字母）打得更快
+- 逗号、句号等标点和换行后停顿
+- 以单词为单位随机出现"连打"，整词加速
+
+安装了 NumPy 时用向量运算生成，否则退回标准库 random + array；指定 seed 时结果可复现
+（两种实现的随机序列不同，但同一环境下相同）。打字引擎只按下标读取生成好的累计时间表，
+打字循环中没有任何逐字符的随机数计算。
+"""
+
+import math
+import random
+from array import array
+from itertools import accumulate
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+# 英文中最常见的字母组合，打这些组合时第二个键按得更快
+COMMON_BIGRAMS = (
+    "th he in er an re on at en nd ti es or te of ed is it al ar st to nt ng "
+    "se ha as ou io le ve co me de hi ri ro ic ne ea ra ce li ch ll be ma si om ur"
+).split()
+# 常见字母组合的速度系数（间隔乘以该值）
+COMMON_BIGRAM_FACTOR = 0.75
+
+# 停顿字符
+PUNCTUATION = ",;:，；：、"
+SENTENCE_END = ".!?。！？…"
+LINE_BREAK = "\n"
+WORD_BREAK = " \t"
+
+
+class TimingModel:
+    """拟人打字节奏模型"""
+
+    def __init__(self, delay=0.08, jitter=0.35, punctuation_pause=0.2, sentence_pause=0.5, line_pause=0.7,
+                 burst_probability=0.25, burst_factor=0.6, bigram_factors=None, seed=None):
+        """
+        Args:
+            delay (float): 默认的平均字符间隔（秒），打字引擎会传入用户选择的速度
+            jitter (float): 间隔波动幅度（对数正态分布的 sigma），0 表示不波动
+            punctuation_pause (float): 逗号、分号等之后的额外停顿（秒）
+            sentence_pause (float): 句号、问号等之后的额外停顿（秒）
+            line_pause (float): 换行后的额外停顿（秒）
+            burst_probability (float): 每个单词整词连打的概率
+            burst_factor (float): 连打时的间隔系数
+            bigram_factors (dict): 字母组合 -> 间隔系数，默认常见英文字母组合为 0.75
+            seed (int): 随机种子，指定后生成的节奏可复现
+        """
+        if delay <= 0:
+            raise ValueError("拟人节奏的平均间隔必须大于0")
+        self.delay = delay
+        self.jitter = jitter
+        self.punctuation_pause = punctuation_pause
+        self.sentence_pause = sentence_pause
+        self.line_pause = line_pause
+        self.burst_probability = burst_probability
+        self.burst_factor = burst_factor
+        if bigram_factors is None:
+            bigram_factors = dict.fromkeys(COMMON_BIGRAMS, COMMON_BIGRAM_FACTOR)
+        self.bigram_factors = bigram_factors
+        self.seed = seed
+        self._rng = None
+        self.start()
+
+    def start(self):
+        """开始一次打字：按种子重置随机数生成器"""
+        if np is not None:
+            self._rng = np.random.default_rng(self.seed)
+        else:
+            self._rng = random.Random(self.seed)
+
+    def delays(self, text, delay=None, expected=False):
+        """
+        生成每个字符之后的等待时间
+
+        Args:
+            text (str): 文本
+            delay (float): 平均字符间隔（秒），默认使用模型的 delay
+            expected (bool): 为 True 时不加随机成分，返回期望值（用于估算用时）
+
+        Returns:
+            array: array('d')，长度与文本相同
+        """
+        if not text:
+            return array('d')
+        if np is not None:
+            values = self._delays_numpy(text, delay or self.delay, expected)
+            result = array('d')
+            result.frombytes(values.astype(np.float64).tobytes())
+            return result
+        return array('d', self._delays_python(text, delay or self.delay, expected))
+
+    def schedule(self, text, delay=None):
+        """
+        生成累计时间表：第 i 个元素为前 i 个字符的等待时间之和
+
+        打字引擎输入 text[a:b] 后把截止时间推后 schedule[b] - schedule[a]。
+
+        Returns:
+            array: array('d')，长度为 len(text) + 1
+        """
+        delays = self.delays(text, delay)
+        if np is not None:
+            cumulative = np.concatenate(([0.0], np.cumsum(np.frombuffer(delays, dtype=np.float64))))
+            result = array('d')
+            result.frombytes(cumulative.tobytes())
+            return result
+        result = array('d', [0.0])
+        result.extend(accumulate(delays))
+        return result
+
+    def estimate(self, text, delay=None):
+        """估算输入文本的总用时（秒，不含随机成分）"""
+        return sum(self.delays(text, delay, expected=True))
+
+    def _jitter_mean(self):
+        # 对数正态分布 exp(N(-sigma²/2, sigma)) 的均值为1
+        return -self.jitter * self.jitter / 2
+
+    def _delays_numpy(self, text, delay, expected):
+        codes = np.frombuffer(text.encode("utf-32-le", errors="surrogatepass"), dtype=np.uint32)
+        count = len(codes)
+        delays = np.full(count, float(delay))
+
+        # 字母组合：当前字符与下一个字符组成的组合决定到下一次按键的间隔
+        if self.bigram_factors and count > 1:
+            keys = [(ord(pair[0]) << 21) | ord(pair[1]) for pair in self.bigram_factors]
+            lowered = np.frombuffer(text.lower().encode("utf-32-le", errors="surrogatepass"), dtype=np.uint32)
+            if len(lowered) == count:
+                pairs = (lowered[:-1].astype(np.int64) << 21) | lowered[1:]
+                order = np.argsort(keys)
+                sorted_keys = np.asarray(keys, dtype=np.int64)[order]
+                factors = np.asarray(list(self.bigram_factors.values()), dtype=np.float64)[order]
+                index = np.clip(np.searchsorted(sorted_keys, pairs), 0, len(sorted_keys) - 1)
+                matched = sorted_keys[index] == pairs
+                delays[:-1] *= np.where(matched, factors[index], 1.0)
+
+        # 连打：按单词随机
+        is_break = np.isin(codes, _codes(WORD_BREAK + LINE_BREAK))
+        if self.burst_probability > 0:
+            # 分隔符归属于它前面的单词
+            word_ids = np.cumsum(is_break) - is_break
+            if expected:
+                delays *= 1 - self.burst_probability * (1 - self.burst_factor)
+            else:
+                bursts = self._rng.random(int(word_ids[-1]) + 1) < self.burst_probability
+                delays *= np.where(bursts[word_ids], self.burst_factor, 1.0)
+
+        # 随机波动
+        if self.jitter > 0 and not expected:
+            delays *= np.exp(self._rng.normal(self._jitter_mean(), self.jitter, count))
+
+        # 停顿
+        delays += np.isin(codes, _codes(PUNCTUATION)) * self.punctuation_pause
+        delays += np.isin(codes, _codes(SENTENCE_END)) * self.sentence_pause
+        delays += (codes == ord(LINE_BREAK)) * self.line_pause
+        return delays
+
+    def _delays_python(self, text, delay, expected):
+        rng = self._rng
+        base = delay
+        factors = self.bigram_factors
+        lowered = text.lower()
+        if len(lowered) != len(text):
+            lowered = text
+        next_chars = lowered[1:] + "\0"
+
+        burst_expected = 1 - self.burst_probability * (1 - self.burst_factor)
+        burst = self.burst_probability > 0 and not expected and rng.random() < self.burst_probability
+        sigma = self.jitter if not expected else 0.0
+        mu = self._jitter_mean()
+
+        delays = []
+        for char, lower, following in zip(text, lowered, next_chars):
+            delay = base * factors.get(lower + following, 1.0)
+            if expected and self.burst_probability > 0:
+                delay *= burst_expected
+            elif burst:
+                delay *= self.burst_factor
+            if sigma > 0:
+                delay *= math.exp(rng.gauss(mu, sigma))
+            if char in PUNCTUATION:
+                delay += self.punctuation_pause
+            elif char in SENTENCE_END:
+                delay += self.sentence_pause
+            elif char == LINE_BREAK:
+                delay += self.line_pause
+            if char in WORD_BREAK or char == LINE_BREAK:
+                # 新单词：重新决定是否连打
+                burst = self.burst_probability > 0 and not expected and rng.random() < self.burst_probability
+            delays.append(delay)
+        return delays
+
+
+def _codes(chars):
+    return [ord(char) for char in chars]
@@ -0,0 +1,527 @@
+"""
+按键轨迹记录与重放
+
+启用轨迹记录后，打字引擎发给按键后端的每一次调用（输入、按键、组合键、粘贴）都连同单调时钟时间戳
+和调用耗时写入一个紧凑的二进制文件，用来排查出错的运行、复现性能问题：
+
+- 文件只追加写入：文件头之后是一条条记录，每条为定长的记录头加上变长的内容（UTF-8）；
+  每次打字开始时写入一条"运行"记录（后端名称、延迟、开始时间），之后记录的时间相对于这次运行的开始
+- 读取时把文件映射到内存（mmap），只建立各记录位置的数组索引，大文件也不必整个读进内存
+- 重放：按原来的节奏（或按倍数加快、放慢）把轨迹重新发送给任意后端
+- 汇总：每次运行的吞吐量、调用耗时、按键间隔分位数和最长的停顿
+
+示例:
+    python auto_typer.py notes.txt --trace run.trace
+    python auto_typer_trace.py summary run.trace
+    python auto_typer_trace.py replay run.trace --speed 2 --backend xtest
+"""
+
+import json
+import mmap
+import os
+import struct
+import time
+from array import array
+from collections import namedtuple
+
+from auto_typer_backends import KeyBackend
+
+TRACE_VERSION = 1
+_TRACE_MAGIC = b"ATTR"
+_TRACE_HEADER = struct.Struct("<4sH")
+# 记录头：相对运行开始的时间（纳秒）、调用耗时（微秒）、字符数 / 按键次数、内容长度（字节）、类型
+_RECORD = struct.Struct("<QIIIB")
+
+# 记录类型
+KIND_WRITE = 1
+KIND_PRESS = 2
+KIND_HOTKEY = 3
+KIND_PASTE = 4
+KIND_RUN = 5
+KIND_NAMES = {KIND_WRITE: "write", KIND_PRESS: "press", KIND_HOTKEY: "hotkey", KIND_PASTE: "paste", KIND_RUN: "run"}
+
+# 组合键内容中各键之间的分隔符（键名中不会出现换行，"+" 本身可能是键名）
+_KEY_SEPARATOR = "\n"
+
+# 写入缓冲达到该大小时写入文件
+DEFAULT_BUFFER_SIZE = 64 * 1024
+# 汇总中列出的最长停顿数
+SLOWEST_GAPS = 5
+# 重放时提前结束 sleep、改为自旋等待的时间（秒）
+REPLAY_SPIN = 0.002
+
+# 轨迹中的一条记录：所属运行序号（从0开始）、相对运行开始的时间（秒）、调用耗时（秒）、类型、数量、内容
+TraceEvent = namedtuple("TraceEvent", "run elapsed cost kind count payload")
+
+
+class TraceWriter:
+    """轨迹文件写入器（只追加）"""
+
+    def __init__(self, path, buffer_size=DEFAULT_BUFFER_SIZE):
+        """
+        Args:
+            path (str): 轨迹文件路径，已存在时在末尾追加
+            buffer_size (int): 缓冲达到该字节数时写入文件
+
+        Raises:
+            OSError: 无法打开文件
+            ValueError: 已有的文件不是轨迹文件或版本不符
+        """
+        self.path = path
+        self.buffer_size = buffer_size
+        self._file = None
+        self._buffer = bytearray()
+        self._started = time.perf_counter_ns()
+        self._open()
+
+    def _open(self):
+        self._file = open(self.path, "ab")
+        if self._file.tell() == 0:
+            self._buffer[:0] = _TRACE_HEADER.pack(_TRACE_MAGIC, TRACE_VERSION)
+            return
+        with open(self.path, "rb") as f:
+            header = f.read(_TRACE_HEADER.size)
+        if len(header) != _TRACE_HEADER.size or _TRACE_HEADER.unpack(header) != (_TRACE_MAGIC, TRACE_VERSION):
+            self._file.close()
+            self._file = None
+            raise ValueError(f"{self.path} 不是轨迹文件或版本不符")
+
+    def begin_run(self, backend, delay):
+        """
+        开始记录一次运行：之后的记录时间相对于此刻
+
+        Args:
+            backend (str): 后端名称
+            delay (float): 每个字符之间的延迟时间（秒）
+        """
+        self._started = time.perf_counter_ns()
+        info = json.dumps({"backend": backend, "delay": delay, "started_at": time.time()}, ensure_ascii=False)
+        self._append(KIND_RUN, info, 0, self._started, self._started)
+
+    def record(self, kind, payload, count, started, finished):
+        """
+        记录一次后端调用
+
+        Args:
+            kind (int): 记录类型（KIND_WRITE 等）
+            payload (str): 输入的文本、按键名称或以换行连接的组合键
+            count (int): 字符数或按键次数
+            started (int): 调用开始时的 time.perf_counter_ns()
+            finished (int): 调用结束时的 time.perf_counter_ns()
+        """
+        self._append(kind, payload, count, started, finished)
+        if len(self._buffer) >= self.buffer_size:
+            self.flush()
+
+    def _append(self, kind, payload, count, started, finished):
+        data = payload.encode("utf-8", errors="surrogatepass")
+        cost = min((finished - started) // 1000, 0xFFFFFFFF)
+        self._buffer += _RECORD.pack(max(0, started - self._started), cost, count, len(data), kind)
+        self._buffer += data
+
+    def wrap(self, backend, delay):
+        """
+        开始记录一次运行，返回记录每次调用的包装后端
+
+        Args:
+            backend (KeyBackend): 实际发送按键的后端
+            delay (float): 每个字符之间的延迟时间（秒）
+        """
+        self.begin_run(backend.name, delay)
+        return TracingBackend(backend, self)
+
+    def flush(self):
+        """把缓冲中的记录写入文件"""
+        if self._buffer and self._file is not None:
+            self._file.write(self._buffer)
+            self._file.flush()
+            self._buffer.clear()
+
+    def close(self):
+        self.flush()
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+
+class TracingBackend(KeyBackend):
+    """包装另一个后端：照常转发每次调用，并把调用记录到轨迹文件"""
+
+    def __init__(self, backend, writer):
+        """
+        Args:
+            backend (KeyBackend): 实际发送按键的后端
+            writer (TraceWriter): 轨迹写入器
+        """
+        self.backend = backend
+        self.writer = writer
+        self.name = backend.name
+        self.supports_unicode = backend.supports_unicode
+        self.pastes_via_clipboard = backend.pastes_via_clipboard
+        self.supports_key_repeat = backend.supports_key_repeat
+
+    def write(self, text):
+        started = time.perf_counter_ns()
+        self.backend.write(text)
+        self.writer.record(KIND_WRITE, text, len(text), started, time.perf_counter_ns())
+
+    def press(self, key, presses=1):
+        started = time.perf_counter_ns()
+        self.backend.press(key, presses=presses)
+        self.writer.record(KIND_PRESS, key, presses, started, time.perf_counter_ns())
+
+    def hotkey(self, *keys):
+        started = time.perf_counter_ns()
+        self.backend.hotkey(*keys)
+        self.writer.record(KIND_HOTKEY, _KEY_SEPARATOR.join(keys), 1, started, time.perf_counter_ns())
+
+    def paste(self, text):
+        started = time.perf_counter_ns()
+        self.backend.paste(text)
+        self.writer.record(KIND_PASTE, text, len(text), started, time.perf_counter_ns())
+
+    def flush(self):
+        self.backend.flush()
+
+    def sync(self):
+        self.backend.sync()
+
+    def close(self):
+        """只结束记录，实际的后端由它的所有者关闭"""
+        self.writer.flush()
+
+
+class TraceReader:
+    """轨迹文件读取器：映射到内存，按需解析记录"""
+
+    def __init__(self, path):
+        """
+        Args:
+            path (str): 轨迹文件路径
+
+        Raises:
+            OSError: 文件无法读取
+            ValueError: 不是轨迹文件或版本不符
+        """
+        self.path = path
+        self._file = open(path, "rb")
+        size = os.fstat(self._file.fileno()).st_size
+        if size < _TRACE_HEADER.size:
+            self._file.close()
+            raise ValueError(f"{path} 不是轨迹文件")
+        self._data = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        if _TRACE_HEADER.unpack_from(self._data) != (_TRACE_MAGIC, TRACE_VERSION):
+            self.close()
+            raise ValueError(f"{path} 不是轨迹文件或版本不符")
+        # 每条记录的起始位置，以及每条记录所属的运行序号
+        self._offsets = array("Q")
+        self._runs = array("I")
+        self.truncated = False
+        self._build_index()
+
+    def _build_index(self):
+        data = self._data
+        size = len(data)
+        position = _TRACE_HEADER.size
+        run = -1
+        while position + _RECORD.size <= size:
+            _, _, _, payload_size, kind = _RECORD.unpack_from(data, position)
+            end = position + _RECORD.size + payload_size
+            if end > size:
+                break
+            if kind == KIND_RUN:
+                run += 1
+            self._offsets.append(position)
+            self._runs.append(max(run, 0))
+            position = end
+        # 写入中途中断时，末尾不完整的记录被忽略
+        self.truncated = position != size
+
+    def __len__(self):
+        return len(self._offsets)
+
+    def __getitem__(self, index):
+        """
+        Returns:
+            TraceEvent: 第 index 条记录
+        """
+        position = self._offsets[index]
+        elapsed, cost, count, payload_size, kind = _RECORD.unpack_from(self._data, position)
+        start = position + _RECORD.size
+        payload = str(self._data[start:start + payload_size], "utf-8", "surrogatepass")
+        return TraceEvent(self._runs[index], elapsed / 1e9, cost / 1e6, kind, count, payload)
+
+    def __iter__(self):
+        for index in range(len(self)):
+            yield self[index]
+
+    def _kind(self, index):
+        # 类型是记录头的最后一个字节，不必解析内容
+        return self._data[self._offsets[index] + _RECORD.size - 1]
+
+    def runs(self):
+        """
+        Returns:
+            list: 每次运行的信息字典（backend、delay、started_at），以及该次运行按键记录的 first / last 下标
+        """
+        runs = []
+        for index in range(len(self)):
+            if self._kind(index) == KIND_RUN:
+                try:
+                    info = json.loads(self[index].payload)
+                except ValueError:
+                    info = {}
+                info.update(first=index + 1, last=index)
+                runs.append(info)
+            elif runs:
+                runs[-1]["last"] = index
+        return runs
+
+    def events(self, run=None):
+        """
+        Args:
+            run (int): 只返回该次运行（从0开始）的按键记录，None 表示全部运行
+
+        Yields:
+            TraceEvent: 按键记录（不含运行记录）
+        """
+        for index in range(len(self)):
+            if (run is None or self._runs[index] == run) and self._kind(index) != KIND_RUN:
+                yield self[index]
+
+    def close(self):
+        if self._data is not None:
+            self._data.close()
+            self._data = None
+        self._file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+def replay(reader, backend, speed=1.0, run=None, stop_event=None):
+    """
+    把轨迹重新发送给后端
+
+    每次运行从头计时，运行之间不等待。
+
+    Args:
+        reader (TraceReader): 轨迹
+        backend (KeyBackend): 按键后端
+        speed (float): 速度倍数，2 表示用一半的时间重放，0 表示不等待、尽快发送
+        run (int): 只重放该次运行，None 表示依次重放全部运行
+        stop_event (threading.Event): 被设置时停止
+
+    Returns:
+        bool: 全部重放完成返回 True，被停止返回 False
+    """
+    from contextlib import ExitStack
+    from auto_typer_clipboard import preserved_clipboard
+
+    with ExitStack() as stack:
+        if backend.pastes_via_clipboard:
+            stack.enter_context(preserved_clipboard())
+        current_run = None
+        started = time.perf_counter()
+        for event in reader.events(run):
+            if stop_event is not None and stop_event.is_set():
+                return False
+            if event.run != current_run:
+                current_run = event.run
+                started = time.perf_counter()
+            if speed > 0:
+                _wait_until(started + event.elapsed / speed)
+            if event.kind == KIND_WRITE:
+                backend.write(event.payload)
+            elif event.kind == KIND_PRESS:
+                backend.press(event.payload, presses=event.count)
+            elif event.kind == KIND_HOTKEY:
+                backend.hotkey(*event.payload.split(_KEY_SEPARATOR))
+            elif event.kind == KIND_PASTE:
+                backend.paste(event.payload)
+            backend.flush()
+        backend.sync()
+    return True
+
+
+def _wait_until(deadline):
+    remaining = deadline - time.perf_counter()
+    if remaining > REPLAY_SPIN:
+        time.sleep(remaining - REPLAY_SPIN)
+    while time.perf_counter() < deadline:
+        pass
+
+
+class RunSummary:
+    """一次运行的汇总"""
+
+    def __init__(self, number, info):
+        self.number = number
+        self.backend = info.get("backend", "?")
+        self.delay = info.get("delay")
+        self.started_at = info.get("started_at")
+        self.calls = 0
+        self.chars = 0
+        self.keystrokes = 0
+        self.pastes = 0
+        # 从运行开始到最后一次调用结束（秒）
+        self.duration = 0.0
+        # 后端调用总耗时（秒）
+        self.backend_time = 0.0
+        # 相邻两次调用开始时间的间隔（秒）
+        self.gaps = array("d")
+        # [(间隔秒数, 记录在本次运行中的序号, 间隔之后那次调用的内容预览)]，从长到短
+        self.slowest = []
+
+    @property
+    def throughput(self):
+        """实际吞吐量（字符/秒）"""
+        return self.chars / self.duration if self.duration > 0 else 0.0
+
+    def gap_percentile(self, p):
+        if not self.gaps:
+            return None
+        ordered = sorted(self.gaps)
+        return ordered[int(round(p / 100 * (len(ordered) - 1)))]
+
+    def format_report(self):
+        target = f"{1 / self.delay:.0f} 字符/秒" if self.delay else "不限速"
+        lines = [
+            f"▶️ 运行 {self.number + 1}: 后端 {self.backend}，目标 {target}"
+            + (f"，开始于 {time.strftime('%Y-%m-%d %H:%M:%S', time.localtime(self.started_at))}"
+               if self.started_at else ""),
+            f"   调用 {self.calls} 次 | 字符 {self.chars} | 按键 {self.keystrokes} | 粘贴 {self.pastes}",
+            f"   用时 {self.duration:.3f}秒 | 吞吐量 {self.throughput:.1f} 字符/秒 | 后端耗时 {self.backend_time:.3f}秒",
+        ]
+        if self.gaps:
+            p50, p95, p99 = (self.gap_percentile(p) * 1000 for p in (50, 95, 99))
+            lines.append(f"   调用间隔 p50 {p50:.2f}ms | p95 {p95:.2f}ms | p99 {p99:.2f}ms | "
+                         f"最长 {max(self.gaps) * 1000:.2f}ms")
+        if self.slowest:
+            lines.append("   最长的停顿:")
+            for gap, index, preview in self.slowest:
+                lines.append(f"     {gap * 1000:9.2f}ms  第 {index + 1} 次调用之前  {preview}")
+        return "\n".join(lines)
+
+
+def summarize(reader, slowest=SLOWEST_GAPS):
+    """
+    汇总轨迹中的每次运行
+
+    Args:
+        reader (TraceReader): 轨迹
+        slowest (int): 列出的最长停顿数
+
+    Returns:
+        list: RunSummary 列表
+    """
+    import heapq
+
+    summaries = []
+    previous = None
+    index = 0
+    for event in reader:
+        if event.kind == KIND_RUN or not summaries:
+            try:
+                info = json.loads(event.payload) if event.kind == KIND_RUN else {}
+            except ValueError:
+                info = {}
+            summaries.append(RunSummary(len(summaries), info))
+            previous = None
+            index = 0
+            if event.kind == KIND_RUN:
+                continue
+        summary = summaries[-1]
+        summary.calls += 1
+        summary.backend_time += event.cost
+        summary.duration = max(summary.duration, event.elapsed + event.cost)
+        if event.kind in (KIND_WRITE, KIND_PASTE):
+            summary.chars += event.count
+        if event.kind == KIND_PASTE:
+            summary.pastes += 1
+            summary.keystrokes += 1
+        elif event.kind == KIND_HOTKEY:
+            summary.keystrokes += 1
+        else:
+            summary.keystrokes += event.count
+        if previous is not None:
+            gap = event.elapsed - previous
+            summary.gaps.append(gap)
+            entry = (gap, index, _preview(event))
+            if len(summary.slowest) < slowest:
+                heapq.heappush(summary.slowest, entry)
+            elif summary.slowest and gap > summary.slowest[0][0]:
+                heapq.heapreplace(summary.slowest, entry)
+        previous = event.elapsed
+        index += 1
+    for summary in summaries:
+        summary.slowest.sort(reverse=True)
+    return summaries
+
+
+def _preview(event):
+    """记录内容的单行预览"""
+    if event.kind == KIND_HOTKEY:
+        return "+".join(event.payload.split(_KEY_SEPARATOR))
+    return event.payload[:30].replace("\n", "\\n")
+
+
+def main(argv=None):
+    """轨迹工具入口"""
+    import argparse
+    from auto_typer_backends import BACKENDS, create_backend
+
+    parser = argparse.ArgumentParser(description="按键轨迹汇总与重放")
+    commands = parser.add_subparsers(dest="command")
+    summary_parser = commands.add_parser("summary", help="汇总每次运行的吞吐量和停顿")
+    summary_parser.add_argument("trace", help="轨迹文件")
+    summary_parser.add_argument("--gaps", type=int, default=SLOWEST_GAPS, help="列出的最长停顿数")
+    replay_parser = commands.add_parser("replay", help="按原来的节奏重新发送轨迹中的按键")
+    replay_parser.add_argument("trace", help="轨迹文件")
+    replay_parser.add_argument("--speed", type=float, default=1.0, help="速度倍数，默认1（原速），0 表示尽快发送")
+    replay_parser.add_argument("--run", type=int, default=None, help="只重放第几次运行（从1开始），默认全部")
+    replay_parser.add_argument("--backend", choices=list(BACKENDS), default=None, help="按键后端，默认 pyautogui")
+    replay_parser.add_argument("--countdown", type=int, default=3, help="开始前的倒计时秒数，默认3")
+    args = parser.parse_args(argv)
+    if args.command is None:
+        parser.print_help()
+        return 1
+    if args.command == "replay" and args.speed < 0:
+        parser.error("--speed 不能为负数")
+
+    try:
+        reader = TraceReader(args.trace)
+    except (OSError, ValueError) as e:
+        print(f"❌ 无法读取轨迹: {e}")
+        return 1
+    with reader:
+        if reader.truncated:
+            print("⚠️ 轨迹末尾有不完整的记录（写入时被中断），已忽略")
+        if args.command == "summary":
+            summaries = summarize(reader, args.gaps)
+            print(f"📼 {args.trace}: {len(reader)} 条记录，{len(summaries)} 次运行")
+            for summary in summaries:
+                print(summary.format_report())
+            return 0
+
+        run = None if args.run is None else args.run - 1
+        for i in range(args.countdown, 0, -1):
+            print(f"⏳ {i}...")
+            time.sleep(1)
+        backend = create_backend(args.backend)
+        try:
+            print(f"🔁 重放轨迹（{'尽快' if args.speed == 0 else f'{args.speed:g} 倍速'}）...")
+            completed = replay(reader, backend, args.speed, run)
+        except KeyboardInterrupt:
+            completed = False
+        finally:
+            backend.close()
+        print("✅ 重放完成" if completed else "⏹️ 重放被中断")
+        return 0 if completed else 1
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,240 @@
+"""
+回读校验与定点修复
+
+速度很快时，目标程序偶尔会丢掉或打乱个别按键。启用回读校验后，每次打字完成时：
+
+1. 在目标中全选并复制（Ctrl+A、Ctrl+C），通过 pyperclip 读回目标中的实际内容
+2. 与要输入的文本对齐比较（与增量输入相同的逐行、再逐字符比较）
+3. 只重新输入不一致的区域：光标移到出错处，删除错误的字符、补上正确的字符，而不是整篇重打
+4. 再次回读，直到内容一致或达到修复轮数上限
+
+每次校验第一轮的出错字符数按 后端 + 速度 累计到 ~/.auto_typer/verification.json，
+用 --verify-stats 查看各速度的出错率，据此选择既快又可靠的速度。
+
+目标中只能有本次输入的文本（例如新建的空白文档），全选读回的是整个文档；
+修复用到方向键、Home / End 和 Delete，目标的自动缩进、自动补全括号等功能需要关闭。
+"""
+
+import json
+import os
+import time
+import uuid
+
+from auto_typer_clipboard import COPY_HOTKEY, SELECT_ALL_HOTKEY, _pyperclip, copy_text, paste_text, preserved_clipboard
+from auto_typer_diff import KEY_RIGHT, NAVIGATE_LINES, compile_diff_plan, diff_edits
+from auto_typer_plan import APP_DIR
+
+# 默认的修复轮数：每轮回读一次，有出错区域时重新输入
+DEFAULT_REPAIR_ROUNDS = 2
+# 修复时每个字符的最短延迟（秒）：出错往往是因为太快，修复时不必追求速度
+REPAIR_MIN_DELAY = 0.02
+# 发送复制快捷键后等待目标写入剪贴板的时间（秒）
+COPY_SETTLE = 0.3
+
+# 复制前写入剪贴板的标记前缀：复制后剪贴板内容仍是标记，说明目标没有响应复制（或目标为空）
+# 标记只用可打印字符，每次回读都不同：含 NUL 的标记在 Windows 剪贴板中会被截断成空串
+_CLIPBOARD_MARKER = "auto-typer-read-back-"
+
+
+def read_back(backend, settle=COPY_SETTLE):
+    """
+    全选并复制目标中的内容，然后把光标移到末尾（取消选择）
+
+    Args:
+        backend (KeyBackend): 按键后端
+        settle (float): 发送复制快捷键后等待的时间（秒）
+
+    Returns:
+        str | None: 目标中的文本；读取失败、目标没有响应复制或读回空内容时返回 None
+    """
+    pyperclip = _pyperclip()
+    marker = f"{_CLIPBOARD_MARKER}{uuid.uuid4().hex}"
+
+    with preserved_clipboard():
+        try:
+            copy_text(marker)
+            backend.hotkey(*SELECT_ALL_HOTKEY)
+            backend.hotkey(*COPY_HOTKEY)
+            backend.flush()
+            backend.sync()
+            time.sleep(settle)
+            text = paste_text()
+        except pyperclip.PyperclipException as e:
+            print(f"⚠️ 读取剪贴板失败: {e}")
+            text = None
+        finally:
+            # 全选后按右方向键：取消选择，光标停在末尾
+            backend.press(KEY_RIGHT)
+            backend.flush()
+    # 空内容无法与“剪贴板没有更新”区分（有的剪贴板会把标记截断），按读取失败处理，避免整篇重打
+    if not text or text == marker:
+        return None
+    return text
+
+
+def count_mismatched(edits):
+    """编辑列表涉及的出错字符数：每处取删除与补上的字符数中较多的一个"""
+    return sum(max(i2 - i1, j2 - j1) for i1, i2, j1, j2 in edits)
+
+
+def speed_label(delay):
+    """速度分组的名称（字符/秒）"""
+    return f"{1 / delay:.0f}" if delay > 0 else "不限速"
+
+
+class VerifyReport:
+    """一次回读校验的结果"""
+
+    def __init__(self, chars):
+        self.chars = chars
+        # 目标中的文本能否读回
+        self.readable = True
+        # 每轮回读的 (出错区域数, 出错字符数)
+        self.rounds = []
+
+    @property
+    def clean(self):
+        """最后一次回读时目标内容与文本一致"""
+        return self.readable and bool(self.rounds) and self.rounds[-1][1] == 0
+
+    @property
+    def mismatched(self):
+        """第一轮回读（修复之前）的出错字符数"""
+        return self.rounds[0][1] if self.rounds else 0
+
+    @property
+    def error_rate(self):
+        """第一轮回读的出错率"""
+        return self.mismatched / self.chars if self.chars else 0.0
+
+    def format_report(self):
+        if not self.readable:
+            return "⚠️ 无法读回目标中的内容（目标不支持全选复制，或内容为空），未能校验"
+        regions, mismatched = self.rounds[0]
+        if not mismatched:
+            return f"🔍 回读校验通过：{self.chars} 字符全部正确"
+        lines = [f"🔍 回读校验：{regions} 处共 {mismatched} 字符出错（出错率 {self.error_rate:.3%}）"]
+        for number, (regions, mismatched) in enumerate(self.rounds[1:], 1):
+            lines.append(f"   第 {number} 轮修复后: " + (f"仍有 {regions} 处 {mismatched} 字符出错" if mismatched else "全部正确"))
+        if not self.clean:
+            lines.append("⚠️ 修复轮数已用完，目标中的内容仍与文本不一致")
+        return "\n".join(lines)
+
+
+class ReadBackVerifier:
+    """回读校验器：读回目标内容、定点修复出错区域，并记录各速度的出错率"""
+
+    def __init__(self, rounds=DEFAULT_REPAIR_ROUNDS, repair_delay=REPAIR_MIN_DELAY, settle=COPY_SETTLE,
+                 navigation=NAVIGATE_LINES, log=None):
+        """
+        Args:
+            rounds (int): 最多修复的轮数，0 表示只校验不修复
+            repair_delay (float): 修复时每个字符的最短延迟（秒）
+            settle (float): 复制后等待剪贴板更新的时间（秒）
+            navigation (str): 修复时的光标移动方式（见 auto_typer_diff）
+            log (VerificationLog | None): 出错率记录，None 表示不记录
+        """
+        self.rounds = rounds
+        self.repair_delay = repair_delay
+        self.settle = settle
+        self.navigation = navigation
+        self.log = log
+
+    def read(self, backend):
+        """读回目标中的内容（可在子类中改为其他读取方式）"""
+        return read_back(backend, self.settle)
+
+    def verify(self, engine, text, delay, stop_event=None):
+        """
+        校验目标中的内容，不一致时定点修复
+
+        Args:
+            engine (TypingEngine): 打字引擎
+            text (str): 应当输入的完整文本
+            delay (float): 输入时每个字符的延迟时间（秒），用于按速度记录出错率
+            stop_event (threading.Event): 被设置时停止修复
+
+        Returns:
+            VerifyReport: 校验结果
+        """
+        report = VerifyReport(len(text))
+        # 修复与增量输入一样按原文编辑，不使用编辑器精简
+        options = dict(engine.plan_options(), editor=None)
+        for number in range(self.rounds + 1):
+            actual = self.read(engine.backend)
+            if actual is None:
+                report.readable = False
+                break
+            if "\r" not in text:
+                actual = actual.replace("\r\n", "\n")
+            edits = diff_edits(actual, text)
+            report.rounds.append((len(edits), count_mismatched(edits)))
+            if not edits or number == self.rounds:
+                break
+            plan, _ = compile_diff_plan(actual, text, max(delay, self.repair_delay), self.navigation, **options)
+            if not engine.run_plan(plan, stop_event):
+                break
+        if report.rounds and self.log is not None:
+            self.log.record(engine.backend_name, delay, report.chars, report.mismatched)
+        return report
+
+
+class VerificationLog:
+    """各后端、各速度的累计出错率：按 后端名称 -> 速度 保存"""
+
+    def __init__(self, path=None):
+        """
+        Args:
+            path (str): 文件路径，默认 ~/.auto_typer/verification.json
+        """
+        self.path = path or os.path.join(APP_DIR, "verification.json")
+
+    def _read(self):
+        try:
+            with open(self.path, encoding="utf-8") as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            return {}
+        return data if isinstance(data, dict) else {}
+
+    def record(self, backend, delay, chars, mismatched):
+        """累计一次校验的结果（写入失败时静默跳过）"""
+        data = self._read()
+        entry = data.setdefault(backend, {}).setdefault(speed_label(delay), {"runs": 0, "chars": 0, "mismatched": 0})
+        entry["runs"] += 1
+        entry["chars"] += chars
+        entry["mismatched"] += mismatched
+        try:
+            os.makedirs(os.path.dirname(self.path), exist_ok=True)
+            temp_path = f"{self.path}.tmp"
+            with open(temp_path, "w", encoding="utf-8") as f:
+                json.dump(data, f, ensure_ascii=False, indent=2)
+            os.replace(temp_path, self.path)
+        except OSError:
+            pass
+
+    def rows(self):
+        """
+        Returns:
+            list: [(后端, 速度, 校验次数, 字符数, 出错字符数)]，按后端、速度从慢到快排列
+        """
+        rows = []
+        for backend, speeds in sorted(self._read().items()):
+            for speed, entry in speeds.items():
+                try:
+                    rows.append((backend, speed, int(entry["runs"]), int(entry["chars"]), int(entry["mismatched"])))
+                except (KeyError, TypeError, ValueError):
+                    continue
+        rows.sort(key=lambda row: (row[0], float(row[1]) if row[1].isdigit() else float("inf")))
+        return rows
+
+    def format_table(self):
+        """格式化为各速度出错率的表格"""
+        rows = self.rows()
+        if not rows:
+            return "📊 还没有回读校验的记录（使用 --verify 输入后会自动记录）"
+        lines = ["📊 各速度的出错率（回读校验第一轮）:", "   后端        速度(字符/秒)  校验次数    字符数    出错字符    出错率"]
+        for backend, speed, runs, chars, mismatched in rows:
+            rate = mismatched / chars if chars else 0.0
+            lines.append(f"   {backend:<11} {speed:>13}  {runs:>8}  {chars:>8}  {mismatched:>10}  {rate:>8.3%}")
+        return "\n".join(lines)
@@ -0,0 +1,11 @@
+"""测试公共设置：从仓库根目录导入 auto_typer_* 模块，状态目录放在临时目录中"""
+
+import os
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if ROOT not in sys.path:
+    sys.path.insert(0, ROOT)
+
+# 必须在导入 auto_typer_plan 之前设置，测试不写入用户的 ~/.auto_typer
+os.environ.setdefault("AUTO_TYPER_HOME", os.path.join(ROOT, ".pytest_cache", "auto_typer_home"))
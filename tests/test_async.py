@@ -0,0 +1,131 @@
+"""异步打字接口测试"""
+
+import asyncio
+
+from auto_typer_async import AsyncTyper
+from auto_typer_backends import RecordingBackend
+from auto_typer_checkpoint import CheckpointStore
+from auto_typer_engine import TypingEngine
+
+TEXT = "".join(f"async line {index}\n" for index in range(100))
+
+
+def make_typer(backend, checkpoints=False):
+    return AsyncTyper(engine=TypingEngine(backend=backend), checkpoints=checkpoints)
+
+
+def test_types_whole_text_without_blocking_the_loop():
+    backend = RecordingBackend()
+    typer = make_typer(backend)
+    ticks = []
+
+    async def ticker(task):
+        while not task.done():
+            ticks.append(task.position)
+            await asyncio.sleep(0.005)
+
+    async def main():
+        task = typer.type_text("hello async", delay=0.005)
+        await asyncio.gather(ticker(task), task)
+        return task
+
+    task = asyncio.run(main())
+    assert task.result() is True
+    assert backend.text == "hello async"
+    assert task.progress == (11, 11)
+    # 打字期间事件循环仍在运行其他协程
+    assert len(ticks) > 3
+
+
+def test_pause_and_resume():
+    backend = RecordingBackend()
+    typer = make_typer(backend)
+
+    async def main():
+        task = typer.type_text("p" * 40, delay=0.002)
+        await asyncio.sleep(0.01)
+        task.pause()
+        await asyncio.sleep(0.02)
+        paused_at = len(backend.text)
+        assert task.paused
+        await asyncio.sleep(0.03)
+        assert len(backend.text) == paused_at < 40
+        task.resume()
+        return await task
+
+    assert asyncio.run(main()) is True
+    assert backend.text == "p" * 40
+
+
+def test_cancel_wakes_sleeping_task_and_saves_checkpoint(tmp_path):
+    backend = RecordingBackend()
+    store = CheckpointStore(str(tmp_path), interval=0, min_size=10)
+    typer = make_typer(backend, checkpoints=store)
+
+    async def main():
+        task = typer.type_text(TEXT, delay=0.05)
+        await asyncio.sleep(0.12)
+        started = asyncio.get_running_loop().time()
+        task.cancel()
+        result = await task
+        return task, result, asyncio.get_running_loop().time() - started
+
+    task, result, waited = asyncio.run(main())
+    assert result is False and task.cancelled
+    # cancel() 立即唤醒正在等待的定时器，而不是等到下一个截止时间
+    assert waited < 0.04
+    typed = len(backend.text)
+    assert 0 < typed < len(TEXT)
+
+    # 从断点继续
+    backend.clear()
+
+    async def resume():
+        return await typer.type_text(TEXT, delay=0, resume=True)
+
+    assert asyncio.run(resume()) is True
+    assert TEXT[:typed] + backend.text == TEXT
+
+
+def test_cancel_during_countdown_types_nothing():
+    backend = RecordingBackend()
+    typer = make_typer(backend)
+
+    async def main():
+        task = typer.type_text("never", countdown=10)
+        await asyncio.sleep(0.01)
+        task.cancel()
+        return await task
+
+    assert asyncio.run(main()) is False
+    assert backend.events == []
+
+
+def test_tasks_on_one_typer_run_in_order():
+    backend = RecordingBackend()
+    typer = make_typer(backend)
+
+    async def main():
+        first = typer.type_text("first ", delay=0.001)
+        second = typer.type_text("second", delay=0)
+        return await asyncio.gather(first, second)
+
+    assert asyncio.run(main()) == [True, True]
+    assert backend.text == "first second"
+
+
+def test_async_sends_the_same_events_as_the_sync_engine():
+    # 同步与异步共用同一套打字步骤：粘贴、按键和等待的顺序完全一致
+    text = "标题: Hello 世界\nline two ✓\n" * 3
+    sync_backend = RecordingBackend(supports_unicode=False)
+    assert TypingEngine(backend=sync_backend, paste_delay=0).type_text(text, 0)
+
+    async_backend = RecordingBackend(supports_unicode=False)
+    typer = AsyncTyper(engine=TypingEngine(backend=async_backend, paste_delay=0), checkpoints=False)
+
+    async def main():
+        return await typer.type_text(text, delay=0)
+
+    assert asyncio.run(main()) is True
+    assert async_backend.text == text
+    assert [event[1:] for event in async_backend.events] == [event[1:] for event in sync_backend.events]
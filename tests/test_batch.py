@@ -0,0 +1,150 @@
+"""批量任务测试（null / recording 后端，倒计时为0）"""
+
+import json
+import os
+import subprocess
+import sys
+import threading
+import time
+
+import pytest
+
+from auto_typer_backends import RecordingBackend
+from auto_typer_batch import (
+    STATUS_DONE, STATUS_SKIPPED, STATUS_STOPPED, BatchRunner, load_manifest, parse_speed, run_batch,
+)
+from auto_typer_engine import SPEED_MAP
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def test_parse_speed():
+    assert parse_speed("1") == 0.1
+    assert parse_speed("快速") == 0.02
+    assert parse_speed(0.003) == 0.003
+    for bad in ("飞快", -1, True):
+        with pytest.raises(ValueError):
+            parse_speed(bad)
+
+
+def test_validation_collects_every_error(tmp_path):
+    manifest = {
+        "backend": "no-such-backend",
+        "countdown": -1,
+        "extra": 1,
+        "jobs": [
+            {"text": "a", "file": "b.txt"},
+            {"file": "missing.txt"},
+            {"text": "a", "mode": "telepathy"},
+            {"text": "a", "speed": "飞快"},
+            {"text": "a", "colour": "red"},
+            "not a job",
+        ],
+    }
+    errors = BatchRunner(manifest, str(tmp_path)).prepare()
+    assert len(errors) == 9
+    assert errors[0] == "清单: 未知的字段 extra"
+    assert [error.split(":")[0] for error in errors[3:]] == [f"任务 {index}" for index in range(1, 7)]
+
+
+def test_empty_jobs_are_rejected():
+    assert BatchRunner({"jobs": []}).prepare() == ["清单: jobs 必须是非空列表"]
+    assert BatchRunner([]).prepare() == ["清单必须是一个对象"]
+
+
+def test_runs_jobs_in_order_on_one_backend(tmp_path):
+    (tmp_path / "body.txt").write_bytes(b"\xef\xbb\xbf" + "正文\n".encode("utf-8"))
+    backend = RecordingBackend()
+    manifest = {
+        "countdown": 0,
+        "defaults": {"speed": 0},
+        "jobs": [{"name": "标题", "text": "Title\n"}, {"file": "body.txt"}],
+    }
+    runner = BatchRunner(manifest, str(tmp_path), backend)
+    assert runner.prepare() == []
+    results = runner.run()
+
+    assert [result["status"] for result in results] == [STATUS_DONE, STATUS_DONE]
+    assert [result["name"] for result in results] == ["标题", "body.txt"]
+    assert backend.text == "Title\n正文\n"
+
+
+def test_stop_skips_remaining_jobs():
+    stop_event = threading.Event()
+    stop_event.set()
+    manifest = {"countdown": 0, "jobs": [{"text": "one", "speed": 0}, {"text": "two", "speed": 0}]}
+    runner = BatchRunner(manifest, backend=RecordingBackend())
+    assert runner.prepare() == []
+    results = runner.run(stop_event)
+    assert [result["status"] for result in results] == [STATUS_SKIPPED, STATUS_SKIPPED]
+
+
+def test_stop_during_job_marks_it_stopped():
+    stop_event = threading.Event()
+    backend = RecordingBackend()
+    manifest = {"countdown": 0, "jobs": [{"text": "x" * 100, "speed": 0.001}, {"text": "never"}]}
+    runner = BatchRunner(manifest, backend=backend)
+    assert runner.prepare() == []
+    timer = threading.Timer(0.03, stop_event.set)
+    timer.start()
+    try:
+        results = runner.run(stop_event)
+    finally:
+        timer.cancel()
+    assert [result["status"] for result in results] == [STATUS_STOPPED, STATUS_SKIPPED]
+    assert "never" not in backend.text
+
+
+def test_run_batch_from_json_manifest(tmp_path, capsys):
+    manifest_path = tmp_path / "jobs.json"
+    manifest_path.write_text(json.dumps({
+        "backend": "null", "countdown": 0, "jobs": [{"text": "hello", "speed": 0}],
+    }), encoding="utf-8")
+    summary_path = tmp_path / "summary.json"
+
+    assert run_batch(str(manifest_path), str(summary_path))
+    summary = json.loads(summary_path.read_text(encoding="utf-8"))
+    assert [job["status"] for job in summary["jobs"]] == [STATUS_DONE]
+    assert load_manifest(str(manifest_path))["backend"] == "null"
+
+
+def test_invalid_manifest_types_nothing(tmp_path, capsys):
+    manifest_path = tmp_path / "broken.json"
+    manifest_path.write_text("{not json", encoding="utf-8")
+    assert not run_batch(str(manifest_path))
+    assert "JSON 格式错误" in capsys.readouterr().out
+
+
+def test_backend_failure_is_a_validation_error(monkeypatch):
+    # 没有 X 显示时 xtest 后端无法创建：在倒计时之前就报错
+    monkeypatch.delenv("DISPLAY", raising=False)
+    runner = BatchRunner({"backend": "xtest", "jobs": [{"text": "a"}]})
+    errors = runner.prepare()
+    assert len(errors) == 1 and errors[0].startswith("初始化按键后端失败")
+    # 由其他进程发送按键时不创建后端
+    runner = BatchRunner({"backend": "xtest", "jobs": [{"text": "a"}]})
+    assert runner.prepare(open_backend=False) == []
+
+
+def test_stop_interrupts_post_delay():
+    stop_event = threading.Event()
+    manifest = {"countdown": 0, "jobs": [{"text": "one", "speed": 0, "post_delay": 30}, {"text": "two"}]}
+    runner = BatchRunner(manifest, backend=RecordingBackend())
+    assert runner.prepare() == []
+    timer = threading.Timer(0.1, stop_event.set)
+    timer.start()
+    started = time.monotonic()
+    try:
+        results = runner.run(stop_event)
+    finally:
+        timer.cancel()
+    assert time.monotonic() - started < 5
+    assert [result["status"] for result in results] == [STATUS_DONE, STATUS_SKIPPED]
+
+
+def test_batch_does_not_import_the_interactive_cli():
+    # 预设速度来自引擎模块，批量任务和基准测试不必导入命令行菜单
+    code = "import sys, auto_typer_batch, auto_typer_bench; print('auto_typer' in sys.modules)"
+    output = subprocess.run([sys.executable, "-c", code], cwd=ROOT, capture_output=True, text=True, check=True).stdout
+    assert output.strip() == "False"
+    assert parse_speed("极速") == SPEED_MAP["4"][0]
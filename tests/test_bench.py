@@ -0,0 +1,46 @@
+"""基准测试工具测试（null 后端，用例很小）"""
+
+import json
+
+import pytest
+
+from auto_typer_bench import main, make_text, measure_startup, percentiles, run_case
+
+
+def test_make_text_has_exact_length():
+    assert len(make_text(0)) == 0
+    assert len(make_text(1234)) == 1234
+
+
+def test_percentiles():
+    result = percentiles([float(v) for v in range(101)])
+    assert result == {"p50": 50.0, "p90": 90.0, "p99": 99.0, "max": 100.0}
+    assert percentiles([]) == {"p50": None, "p90": None, "p99": None, "max": None}
+
+
+def test_run_case_unthrottled_completes():
+    result = run_case("null", 0, 500, max_seconds=5)
+    assert result["completed"]
+    assert result["chars"] == 500
+    assert result["target_cps"] is None
+    assert result["calls"] == 8  # 500 个字符，每批 64 个
+
+
+def test_run_case_stops_at_max_seconds():
+    result = run_case("null", 0.01, 10000, max_seconds=0.1)
+    assert not result["completed"]
+    assert 0 < result["chars"] < 10000
+    assert result["achieved_cps"] == pytest.approx(100, rel=0.3)
+
+
+def test_main_writes_json(tmp_path, capsys):
+    output = tmp_path / "bench.json"
+    main(["--sizes", "50", "--delays", "0", "--output", str(output)])
+    report = json.loads(output.read_text(encoding="utf-8"))
+    assert report["backend"] == "null"
+    assert [result["size"] for result in report["results"]] == [50]
+
+
+def test_startup_imports_no_heavy_modules():
+    result = measure_startup(repeat=1)
+    assert result["heavy_modules"] == []
@@ -0,0 +1,101 @@
+"""断点续打测试"""
+
+import threading
+
+from auto_typer_backends import RecordingBackend
+from auto_typer_checkpoint import CheckpointStore, source_key
+from auto_typer_engine import TypingEngine
+from auto_typer_sources import FileSource, IterableSource, StringSource
+
+TEXT = "".join(f"第{index}行 line {index}\n" for index in range(200))
+
+
+def stop_after(stop_event, chars):
+    def on_progress(done, total):
+        if done >= chars:
+            stop_event.set()
+    return on_progress
+
+
+def test_stop_saves_position_and_resume_finishes(tmp_path):
+    store = CheckpointStore(str(tmp_path), interval=0)
+    source = StringSource(TEXT)
+    backend = RecordingBackend()
+    engine = TypingEngine(backend=backend)
+    stop_event = threading.Event()
+
+    assert not engine.type_source(source, 0, stop_event, on_progress=stop_after(stop_event, 1000),
+                                  checkpoint=store.open(source))
+    key, state = store.find(source)
+    typed = len(backend.text)
+    assert state["chars"] == typed
+    assert state["total"] == len(TEXT)
+    assert 1000 <= typed < len(TEXT)
+
+    # 从断点继续：只输入剩余部分，完成后删除断点
+    backend.clear()
+    assert engine.type_source(source, 0, skip=state["chars"], checkpoint=store.open(source, key))
+    assert TEXT[:typed] + backend.text == TEXT
+    assert store.find(source) == (key, None)
+
+
+def test_resume_skips_across_file_chunks(tmp_path):
+    path = tmp_path / "long.txt"
+    path.write_text(TEXT, encoding="utf-8")
+    backend = RecordingBackend()
+    progress = []
+
+    with FileSource(str(path), chunk_size=100) as source:
+        assert TypingEngine(backend=backend).type_source(
+            source, 0, skip=1234, on_progress=lambda done, total: progress.append(done))
+    assert backend.text == TEXT[1234:]
+    assert progress[-1] == len(TEXT.encode("utf-8"))
+
+
+def test_keys_follow_content(tmp_path):
+    assert source_key(StringSource("a")) != source_key(StringSource("b"))
+    assert source_key(IterableSource(["a"])) is None
+
+    path = tmp_path / "a.txt"
+    path.write_text("one")
+    before = source_key(FileSource(str(path)))
+    path.write_text("two!")
+    assert source_key(FileSource(str(path))) != before
+
+
+def test_short_and_unrewindable_sources_are_not_checkpointed(tmp_path):
+    store = CheckpointStore(str(tmp_path))
+    assert store.open(StringSource("short")) is None
+    assert store.open(IterableSource(iter([TEXT]))) is None
+    assert store.open(StringSource(TEXT)) is not None
+
+
+def test_corrupted_state_is_ignored(tmp_path):
+    store = CheckpointStore(str(tmp_path))
+    store.save("k", {"chars": 0})
+    assert store.load("k") is None
+    (tmp_path / "k.json").write_text("{broken")
+    assert store.load("k") is None
+    store.save("k", {"chars": 5})
+    assert store.load("k") == {"chars": 5}
+
+
+def test_resume_offsets_count_windows_newlines_once(tmp_path):
+    # 断点按换行符统一后的字符数保存，续打时不会错位
+    path = tmp_path / "crlf.txt"
+    path.write_bytes(TEXT.replace("\n", "\r\n").encode("utf-8"))
+    store = CheckpointStore(str(tmp_path / "state"), interval=0)
+    backend = RecordingBackend()
+    engine = TypingEngine(backend=backend)
+    stop_event = threading.Event()
+
+    with FileSource(str(path), chunk_size=100) as source:
+        assert not engine.type_source(source, 0, stop_event, on_progress=stop_after(stop_event, 1000),
+                                      checkpoint=store.open(source))
+        key, state = store.find(source)
+        typed = backend.text
+        assert state["chars"] == len(typed)
+
+        backend.clear()
+        assert engine.type_source(source, 0, skip=state["chars"], checkpoint=store.open(source, key))
+    assert typed + backend.text == TEXT
@@ -0,0 +1,174 @@
+"""剪贴板工具：段落索引（ParagraphIndex）与剪贴板监视（ClipboardWatcher）"""
+
+import random
+import threading
+import time
+
+import pytest
+
+import auto_typer_clipboard
+from auto_typer_backends import RecordingBackend
+from auto_typer_clipboard import PARAGRAPH_SEPARATOR, ClipboardWatcher, ParagraphIndex, copy_text, preserved_clipboard
+from auto_typer_engine import TypingEngine
+
+CASES = [
+    "",
+    "one paragraph",
+    "first\n\nsecond\n\nthird",
+    "\n\nleading and trailing\n\n",
+    "three newlines\n\n\nsplit here",
+    "  spaced  \n\n\t tabbed \t\n\n中文段落\n第二行",
+    "\n\n\n\n",
+]
+
+
+def random_texts(seed, count):
+    rng = random.Random(seed)
+    for _ in range(count):
+        yield "".join(rng.choice(["a", "b c", " ", "\n", "\n\n", "中"]) for _ in range(rng.randint(0, 40)))
+
+
+def all_texts():
+    return CASES + list(random_texts(1, 300))
+
+
+def test_matches_str_split():
+    for text in all_texts():
+        expected = text.split(PARAGRAPH_SEPARATOR)
+        index = ParagraphIndex(text)
+        assert len(index) == len(expected), repr(text)
+        for number, paragraph in enumerate(expected):
+            start, end = index.span(number)
+            assert text[start:end] == paragraph
+            assert index[number] == paragraph.strip()
+
+
+def test_lazy_access_before_len():
+    # 不先求总数、直接按序号取段落时结果相同
+    for text in all_texts():
+        expected = text.split(PARAGRAPH_SEPARATOR)
+        index = ParagraphIndex(text)
+        for number in reversed(range(len(expected))):
+            assert index[number] == expected[number].strip()
+
+
+def test_paragraphs_skip_empty():
+    for text in all_texts():
+        expected = [(number, paragraph.strip()) for number, paragraph in enumerate(text.split(PARAGRAPH_SEPARATOR))
+                    if paragraph.strip()]
+        assert list(ParagraphIndex(text).paragraphs()) == expected
+        assert list(ParagraphIndex(text).paragraphs(1, 3)) == [item for item in expected if 1 <= item[0] < 3]
+
+
+def test_out_of_range():
+    index = ParagraphIndex("a\n\nb")
+    with pytest.raises(IndexError):
+        index.span(2)
+    with pytest.raises(IndexError):
+        index.span(-1)
+
+
+def test_custom_separator():
+    text = "a---b------c"
+    index = ParagraphIndex(text, "---")
+    assert [index[number] for number in range(len(index))] == text.split("---")
+
+
+def test_type_segments_pauses_between_paragraphs():
+    backend = RecordingBackend()
+    engine = TypingEngine(backend=backend)
+    index = ParagraphIndex("first\n\n\n\nsecond")
+    segments = ((paragraph, number, 1.0) for number, paragraph in index.paragraphs())
+
+    assert engine.type_segments(segments, 0, pause=0.05)
+    assert [payload for _, _, payload in backend.events] == ["first", "second"]
+    assert backend.events[1][0] - backend.events[0][0] >= 0.05
+
+
+class FakeClipboard:
+    """内存中的剪贴板，代替 pyperclip"""
+
+    class PyperclipException(Exception):
+        pass
+
+    def __init__(self):
+        self.content = ""
+
+    def copy(self, text):
+        self.content = text
+
+    def paste(self):
+        return self.content
+
+
+@pytest.fixture
+def clipboard(monkeypatch):
+    fake = FakeClipboard()
+    monkeypatch.setattr(auto_typer_clipboard, "_pyperclip", lambda: fake)
+    monkeypatch.setattr(auto_typer_clipboard, "_own_copies", auto_typer_clipboard.deque(maxlen=16))
+    return fake
+
+
+@pytest.mark.parametrize("history", [0, 20])
+def test_watcher_ignores_own_copies_and_restores(clipboard, history):
+    watcher = ClipboardWatcher(history=history, read=clipboard.paste)
+    clipboard.copy("user text")
+    assert watcher.poll() == "user text"
+    # 粘贴输入：写入片段，结束后恢复用户原来的内容，两者都不是新复制的内容
+    with preserved_clipboard():
+        copy_text("segment")
+        assert watcher.poll() is None
+    assert clipboard.content == "user text"
+    assert watcher.poll() is None
+    clipboard.copy("next copy")
+    assert watcher.poll() == "next copy"
+
+
+def test_watcher_deduplicates_recent_copies(clipboard):
+    watcher = ClipboardWatcher(read=clipboard.paste)
+    for text, expected in [("a", "a"), ("b", "b"), ("a", None), ("   ", None), ("c", "c")]:
+        clipboard.copy(text)
+        assert watcher.poll() == expected
+
+
+def test_watcher_backs_off_while_idle(clipboard):
+    watcher = ClipboardWatcher(min_interval=0.1, max_interval=0.4, backoff=2, read=clipboard.paste)
+    clipboard.copy("x")
+    watcher.prime()
+    for expected in (0.2, 0.4, 0.4):
+        assert watcher.poll() is None
+        assert watcher.interval == pytest.approx(expected)
+    clipboard.copy("y")
+    assert watcher.poll() == "y"
+    assert watcher.interval == 0.1
+
+
+def test_watch_stops_on_stop_event(clipboard):
+    stop_event = threading.Event()
+    seen = []
+    watcher = ClipboardWatcher(min_interval=0.001, read=clipboard.paste)
+    clipboard.copy("copied")
+
+    def on_text(text):
+        seen.append(text)
+        stop_event.set()
+
+    watcher.watch(on_text, stop_event)
+    assert seen == ["copied"]
+
+
+def test_stop_during_paragraph_pause_returns_promptly():
+    backend = RecordingBackend()
+    engine = TypingEngine(backend=backend)
+    index = ParagraphIndex("first\n\n\n\nsecond")
+    segments = ((paragraph, number, 1.0) for number, paragraph in index.paragraphs())
+    stop_event = threading.Event()
+    timer = threading.Timer(0.1, stop_event.set)
+    timer.start()
+    started = time.monotonic()
+    try:
+        assert not engine.type_segments(segments, 0, pause=30, stop_event=stop_event)
+    finally:
+        timer.cancel()
+    assert time.monotonic() - started < 5
+    assert backend.text == "first"
@@ -0,0 +1,149 @@
+"""增量输入：编辑列表（diff_edits）与编辑计划（compile_diff_plan）在模拟的目标缓冲区上的效果"""
+
+import random
+
+import pytest
+
+from auto_typer_diff import NAVIGATE_CHARS, NAVIGATE_LINES, compile_diff_plan, diff_edits
+from auto_typer_plan import MODE_HYBRID, MODE_TYPE, OP_HOTKEY, OP_KEY, OP_PASTE, OP_TYPE, OP_WAIT
+
+WORDS = "  indented alpha beta gamma 中文 delta\n epsilon, zeta. eta theta\n".split(" ")
+
+
+class Buffer:
+    """模拟的文本目标：光标位置 + 文本，按计划中的操作编辑"""
+
+    def __init__(self, text, rng):
+        self.chars = list(text)
+        self.cursor = len(text)
+        # 上下方向键之后的列号由目标决定，随机取一个，计划必须再用 Home / End 定位
+        self.rng = rng
+
+    @property
+    def text(self):
+        return "".join(self.chars)
+
+    def run(self, plan):
+        for op, a, b in plan:
+            if op in (OP_TYPE, OP_PASTE):
+                self.chars[self.cursor:self.cursor] = plan.text[a:b]
+                self.cursor += b - a
+            elif op == OP_KEY:
+                for _ in range(b):
+                    self.press(plan.keys[a])
+            else:
+                assert op not in (OP_HOTKEY, OP_WAIT), op
+            assert 0 <= self.cursor <= len(self.chars)
+
+    def press(self, key):
+        text = self.text
+        line_start = text.rfind("\n", 0, self.cursor) + 1
+        line_end = text.find("\n", self.cursor)
+        line_end = len(text) if line_end < 0 else line_end
+        if key == "left":
+            self.cursor -= 1
+        elif key == "right":
+            self.cursor += 1
+        elif key == "delete":
+            del self.chars[self.cursor]
+        elif key == "backspace":
+            self.cursor -= 1
+            del self.chars[self.cursor]
+        elif key == "home":
+            self.cursor = line_start
+        elif key == "end":
+            self.cursor = line_end
+        elif key == "up":
+            assert line_start > 0
+            previous = text.rfind("\n", 0, line_start - 1) + 1
+            self.cursor = previous + self.rng.randint(0, line_start - 1 - previous)
+        elif key == "down":
+            assert line_end < len(text)
+            following = text.find("\n", line_end + 1)
+            following = len(text) if following < 0 else following
+            self.cursor = line_end + 1 + self.rng.randint(0, following - line_end - 1)
+        else:
+            raise AssertionError(key)
+
+
+def apply_edits(old, new, edits):
+    result = old
+    for i1, i2, j1, j2 in reversed(edits):
+        result = result[:i1] + new[j1:j2] + result[i2:]
+    return result
+
+
+def mutate(rng, text):
+    chars = list(text)
+    for _ in range(rng.randint(0, 6)):
+        position = rng.randint(0, len(chars))
+        if rng.random() < 0.5 and position < len(chars):
+            del chars[position:position + rng.randint(1, 10)]
+        else:
+            chars[position:position] = rng.choice(WORDS)
+    return "".join(chars)
+
+
+def random_pairs(seed, count):
+    rng = random.Random(seed)
+    for trial in range(count):
+        old = " ".join(rng.choice(WORDS) for _ in range(rng.randint(0, 60)))
+        if trial % 10 == 0:
+            new = " ".join(rng.choice(WORDS) for _ in range(40))
+        else:
+            new = mutate(rng, old)
+        yield old, new
+
+
+def test_edits_rebuild_new_text():
+    for old, new in random_pairs(1, 300):
+        edits = diff_edits(old, new)
+        assert apply_edits(old, new, edits) == new
+        for (_, i2, _, j2), (i1, _, j1, _) in zip(edits, edits[1:]):
+            assert i2 <= i1 and j2 <= j1
+
+
+def test_repeated_lines_align_minimally():
+    old = "same line\n" * 50
+    new = "same line\n" * 20 + "inserted\n" + "same line\n" * 30
+    edits = diff_edits(old, new)
+    assert sum((i2 - i1) + (j2 - j1) for i1, i2, j1, j2 in edits) == len("inserted\n")
+
+
+@pytest.mark.parametrize("navigation", [NAVIGATE_LINES, NAVIGATE_CHARS])
+@pytest.mark.parametrize("mode, unicode_ok", [(MODE_TYPE, True), (MODE_HYBRID, False)])
+def test_plan_turns_old_into_new(navigation, mode, unicode_ok):
+    rng = random.Random(2)
+    for old, new in random_pairs(3, 200):
+        plan, _ = compile_diff_plan(old, new, 0.0, navigation, mode=mode, unicode_ok=unicode_ok)
+        buffer = Buffer(old, rng)
+        buffer.run(plan)
+        assert buffer.text == new
+        assert buffer.cursor == len(new)
+
+
+def test_small_change_in_large_document():
+    old = "\n".join(f"line {i} of the document with some text" for i in range(2000))
+    new = old.replace("line 1000 of", "line one thousand of").replace("line 5 ", "LINE 5 ")
+    plan, edits = compile_diff_plan(old, new, 0.0)
+    # 只改动两行：使用编辑脚本，按键主要花在移动光标上，远少于删除后重打
+    assert edits is not None
+    assert plan.keystrokes() < (len(old) + len(new)) // 10
+    buffer = Buffer(old, random.Random(4))
+    buffer.run(plan)
+    assert buffer.text == new
+
+
+def test_unrelated_text_is_retyped():
+    old = "abcdefghij" * 5
+    new = "0123456789" * 5
+    plan, edits = compile_diff_plan(old, new, 0.0)
+    assert edits is None
+    buffer = Buffer(old, random.Random(5))
+    buffer.run(plan)
+    assert buffer.text == new
+
+
+def test_unknown_navigation():
+    with pytest.raises(ValueError):
+        compile_diff_plan("a", "b", 0.0, "mouse")
@@ -0,0 +1,71 @@
+"""试运行与用时预测测试"""
+
+import pytest
+
+from auto_typer_backends import NullBackend, RecordingBackend
+from auto_typer_dryrun import (
+    BackendCosts, CalibrationStore, calibrate, dry_run, format_duration,
+)
+from auto_typer_engine import MODE_PASTE, TypingEngine
+from auto_typer_sources import StringSource
+
+FREE = BackendCosts("test", 0.0, 0.0, 0.0)
+
+
+def test_estimate_without_backend_cost_is_chars_times_delay():
+    engine = TypingEngine(backend="recording")
+    report = dry_run(engine, StringSource("a" * 100), 0.05, costs=FREE)
+    assert report.duration == pytest.approx(5.0)
+    assert report.chars == report.keystrokes == 100
+    assert report.remaining(0.5) == pytest.approx(2.5, abs=0.05)
+    # 全部发出后只剩最后一个间隔
+    assert report.remaining(1.0) == pytest.approx(0.05)
+
+
+def test_backend_cost_only_matters_when_it_exceeds_the_interval():
+    engine = TypingEngine(backend="recording")
+    slow = BackendCosts("slow", 0.0, 0.1, 0.0)
+    # 每个字符的后端耗时 0.1 秒超过 0.05 秒的间隔，总用时由后端决定
+    assert dry_run(engine, StringSource("a" * 10), 0.05, costs=slow).duration == pytest.approx(1.0)
+    fast = BackendCosts("fast", 0.0, 0.01, 0.0)
+    assert dry_run(engine, StringSource("a" * 10), 0.05, costs=fast).duration == pytest.approx(0.5)
+
+
+def test_paste_estimate_and_slowest_lines():
+    engine = TypingEngine(backend="recording", paste_segment_size=10, paste_delay=0.05)
+    costs = BackendCosts("paste", 0.0, 0.0, 0.02)
+    text = "short\n" + "x" * 30 + "\nend"
+    report = dry_run(engine, StringSource(text), 0.01, mode=MODE_PASTE, costs=costs)
+    assert report.pastes == 4
+    assert report.duration == pytest.approx(4 * 0.07)
+    assert report.slowest[0][0] == 2
+    assert "试运行" in report.format_report()
+
+
+def test_dry_run_sends_no_keys():
+    backend = RecordingBackend()
+    engine = TypingEngine(backend=backend)
+    dry_run(engine, StringSource("nothing is typed"), 0.01, costs=FREE)
+    assert backend.events == []
+
+
+def test_calibration_store_round_trip(tmp_path):
+    store = CalibrationStore(str(tmp_path / "calibration.json"))
+    assert not store.load("pyautogui").calibrated
+    store.save(BackendCosts("pyautogui", 0.001, 0.002, 0.03, calibrated_at=123.0))
+    loaded = store.load("pyautogui")
+    assert loaded.calibrated
+    assert (loaded.per_call, loaded.per_char, loaded.paste_call) == (0.001, 0.002, 0.03)
+
+
+def test_calibrate_with_null_backend():
+    costs = calibrate(NullBackend())
+    assert costs.backend == "null"
+    assert costs.calibrated
+    assert costs.per_call >= 0 and costs.per_char >= 0
+
+
+def test_format_duration():
+    assert format_duration(12.34) == "12.3秒"
+    assert format_duration(80) == "1分20秒"
+    assert format_duration(3725) == "1小时02分"
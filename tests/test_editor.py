@@ -0,0 +1,183 @@
+"""编辑器精简：按配置模拟编辑器的自动缩进和自动补全括号，精简后的计划必须得到原文"""
+
+import random
+
+import pytest
+
+from auto_typer_editor import EDITOR_PROFILES, get_profile
+from auto_typer_plan import MODE_HYBRID, MODE_TYPE, OP_KEY, OP_PASTE, OP_TYPE, compile_plan
+
+PYTHON_SOURCE = '''import os
+
+
+def main(argv):
+    """Entry point."""
+    values = [
+        1, 2, 3,
+    ]
+    if argv:
+        for item in argv:
+            print(item, values[0])
+        return 1
+
+    data = {"a": (1, 2), "b": [x for x in range(3)]}
+    while True:
+        try:
+            call(data)
+        except ValueError:
+            pass
+        break
+    # ======== separator ========
+    return 0
+'''
+JS_SOURCE = '''function f(a, b) {
+    const x = [1, 2, 3];
+    if (a) {
+        return g({
+            key: b,
+        });
+    }
+
+    for (let i = 0; i < 10; i++) {
+        console.log(i);
+    }
+}
+// 中文注释 ----------
+'''
+SAMPLES = [PYTHON_SOURCE, JS_SOURCE, PYTHON_SOURCE.strip(), "x\n\n\n    y\n"]
+
+
+class Editor:
+    """按 EditorProfile 描述的行为模拟编辑器"""
+
+    def __init__(self, profile):
+        self.profile = profile
+        self.chars = []
+        # 每个字符是否为编辑器自动补上的右括号
+        self.auto = []
+        self.cursor = 0
+        # 当前行是否只有编辑器插入的缩进
+        self.auto_indented = False
+
+    @property
+    def text(self):
+        return "".join(self.chars)
+
+    def before_cursor(self):
+        start = self.cursor
+        while start > 0 and self.chars[start - 1] != "\n":
+            start -= 1
+        return "".join(self.chars[start:self.cursor])
+
+    def insert(self, char, auto=False):
+        self.chars.insert(self.cursor, char)
+        self.auto.insert(self.cursor, auto)
+        self.cursor += 1
+
+    def erase(self, count):
+        for _ in range(count):
+            self.cursor -= 1
+            del self.chars[self.cursor]
+            del self.auto[self.cursor]
+
+    def run(self, plan):
+        for op, a, b in plan:
+            if op == OP_TYPE:
+                for char in plan.text[a:b]:
+                    self.key(char)
+            elif op == OP_PASTE:
+                for char in plan.text[a:b]:
+                    self.insert(char)
+                self.auto_indented = False
+            elif op == OP_KEY:
+                for _ in range(b):
+                    self.key(plan.keys[a])
+            else:
+                raise AssertionError(op)
+        return self.text
+
+    def key(self, key):
+        profile = self.profile
+        if key == "\n":
+            line = self.before_cursor()
+            indent = profile.new_line_indent(line)
+            if self.auto_indented and profile.trims_blank_lines and not line.strip():
+                self.erase(len(line))
+            self.insert("\n")
+            for char in indent:
+                self.insert(char)
+            self.auto_indented = bool(indent)
+            return
+        if key == "backspace":
+            line = self.before_cursor()
+            count = 1
+            if profile.backspace_unindents and line and not line.strip(" "):
+                unit = len(profile.indent_unit)
+                count = (len(line) - 1) % unit + 1
+            self.erase(count)
+            self.auto_indented = False
+            return
+        if key == "delete":
+            del self.chars[self.cursor]
+            del self.auto[self.cursor]
+            return
+        assert len(key) == 1, key
+        self.auto_indented = False
+        if self.cursor < len(self.chars) and self.chars[self.cursor] == key and self.auto[self.cursor]:
+            # 紧挨着的自动补全右括号被"跳过"
+            self.cursor += 1
+            return
+        if key in profile.outdent_closers:
+            line = self.before_cursor()
+            if line and not line.strip():
+                self.erase(len(line) - len(profile.dedent(line)))
+        self.insert(key)
+        if key in profile.auto_pairs:
+            self.insert(profile.auto_pairs[key], auto=True)
+            self.cursor -= 1
+
+
+def compile_for(name, text, mode=MODE_TYPE, unicode_ok=True, delay=0.0):
+    return compile_plan(text, delay, mode=mode, unicode_ok=unicode_ok, editor=name, key_repeat=True)
+
+
+@pytest.mark.parametrize("name", sorted(EDITOR_PROFILES))
+@pytest.mark.parametrize("mode, unicode_ok", [(MODE_TYPE, True), (MODE_TYPE, False), (MODE_HYBRID, False)])
+@pytest.mark.parametrize("delay", [0.0, 0.05])
+def test_editor_output_matches_source(name, mode, unicode_ok, delay):
+    for text in SAMPLES:
+        plan = compile_for(name, text, mode, unicode_ok, delay)
+        assert Editor(get_profile(name)).run(plan) == text
+
+
+@pytest.mark.parametrize("name", ["autoindent", "vscode", "vscode-python"])
+def test_profiles_save_keystrokes(name):
+    for text in (PYTHON_SOURCE, JS_SOURCE):
+        plain = compile_plan(text, 0.0)
+        assert compile_for(name, text).keystrokes() < plain.keystrokes()
+
+
+@pytest.mark.parametrize("name", ["vscode", "plain"])
+def test_random_brackets(name):
+    rng = random.Random(2)
+    profile = get_profile(name)
+    for _ in range(500):
+        text = "".join(rng.choice("([{}])ab ") for _ in range(rng.randint(0, 12)))
+        text += "\n" + "".join(rng.choice("([{}])ab \n") for _ in range(rng.randint(0, 20)))
+        assert Editor(profile).run(compile_for(name, text)) == text
+
+
+def test_chunked_compilation_uses_context():
+    # 分块编译时，后一块从上一块的末尾（context）得知当前行的内容
+    text = PYTHON_SOURCE * 3
+    editor = Editor(get_profile("vscode-python"))
+    for start in range(0, len(text), 97):
+        plan = compile_plan(text[start:start + 97], 0.0, editor="vscode-python", key_repeat=True,
+                            context=text[max(0, start - 200):start])
+        editor.run(plan)
+    assert editor.text == text
+
+
+def test_unknown_profile():
+    with pytest.raises(ValueError):
+        get_profile("emacs")
@@ -0,0 +1,99 @@
+"""打字引擎与按键后端测试"""
+
+import threading
+
+import pytest
+
+from auto_typer_backends import (
+    BACKENDS, KeyBackend, NullBackend, RecordingBackend, create_backend, register_backend,
+)
+from auto_typer_engine import TypingEngine
+from auto_typer_plan import coalesce_runs, run_length
+
+
+def test_run_length_follows_delay():
+    assert run_length(0) == 64
+    assert run_length(0.05) == 1
+    assert run_length(0.001) == 20
+    assert run_length(0.0001, max_run=8) == 8
+
+
+def test_coalesce_runs_preserves_text():
+    text = "hello, world\n" * 20
+    runs = list(coalesce_runs(text, 0.001))
+    assert "".join(runs) == text
+    assert max(len(run) for run in runs) == 20
+
+
+def test_engine_types_whole_text_in_batches():
+    backend = RecordingBackend()
+    engine = TypingEngine(backend=backend)
+    progress = []
+
+    assert engine.type_text("abcdef" * 50, 0, on_progress=lambda done, total: progress.append((done, total)))
+    assert backend.text == "abcdef" * 50
+    assert len(backend.events) == len(progress) == 5
+    assert progress[-1] == (300, 300)
+
+
+def test_engine_stops_before_next_batch():
+    backend = NullBackend()
+    stop_event = threading.Event()
+
+    def stop_after_first(done, total):
+        stop_event.set()
+
+    engine = TypingEngine(backend=backend)
+    assert not engine.type_text("x" * 200, 0, stop_event=stop_event, on_progress=stop_after_first)
+    assert backend.calls == 1
+    assert backend.chars == 64
+
+
+def test_create_backend_by_name_and_instance():
+    assert isinstance(create_backend("null"), NullBackend)
+    backend = RecordingBackend()
+    assert create_backend(backend) is backend
+    with pytest.raises(ValueError):
+        create_backend("no-such-backend")
+
+
+def test_register_backend():
+    class EchoBackend(KeyBackend):
+        name = "echo-test"
+
+    try:
+        register_backend(EchoBackend)
+        assert isinstance(create_backend("echo-test"), EchoBackend)
+    finally:
+        BACKENDS.pop("echo-test", None)
+
+
+def test_set_backend_closes_previous_backend():
+    closed = []
+
+    class ClosingBackend(NullBackend):
+        def close(self):
+            closed.append(self)
+
+    first = ClosingBackend()
+    engine = TypingEngine(backend=first)
+    assert engine.backend is first
+    engine.set_backend("recording")
+    assert closed == [first]
+    assert engine.backend_name == "recording"
+    assert isinstance(engine.backend, RecordingBackend)
+
+
+def test_xtest_keysyms():
+    from auto_typer_backends import XTestBackend
+
+    assert XTestBackend._char_keysym("a") == ord("a")
+    assert XTestBackend._char_keysym("\n") == 0xff0d
+    assert XTestBackend._char_keysym("é") == 0xe9
+    assert XTestBackend._char_keysym("中") == 0x01000000 | ord("中")
+
+
+def test_xtest_without_x_server_fails_cleanly(monkeypatch):
+    monkeypatch.setenv("DISPLAY", ":987")
+    with pytest.raises(RuntimeError):
+        create_backend("xtest")
@@ -0,0 +1,130 @@
+"""多显示器并行输入测试（null 后端，不需要 X 显示）"""
+
+import json
+import queue
+import threading
+
+import pytest
+
+import auto_typer_fanout
+from auto_typer_batch import STATUS_DONE, STATUS_FAILED, STATUS_SKIPPED, STATUS_STOPPED, BatchRunner
+from auto_typer_fanout import (
+    FanOutRunner, SharedPlans, _run_display, format_fanout_results, load_shared_plans, parse_displays, run_fanout,
+)
+
+MANIFEST = {
+    "countdown": 0,
+    "defaults": {"speed": 0},
+    "jobs": [{"name": "标题", "text": "Title\n"}, {"text": "正文 ✓\n" * 3}],
+}
+
+
+def prepared_jobs(manifest=MANIFEST):
+    runner = BatchRunner(manifest, ".", "null")
+    assert runner.prepare() == []
+    return runner.jobs
+
+
+def job_specs(jobs):
+    return [{"result": job.result(), "countdown": 0, "pre_delay": 0, "post_delay": 0} for job in jobs]
+
+
+@pytest.fixture
+def worker(monkeypatch):
+    """在当前进程中模拟工作进程的共享状态"""
+    messages = queue.Queue()
+    stop_event = threading.Event()
+    monkeypatch.setitem(auto_typer_fanout._worker_state, "messages", messages)
+    monkeypatch.setitem(auto_typer_fanout._worker_state, "stop_event", stop_event)
+    # _run_display 会设置 DISPLAY，测试结束后恢复
+    monkeypatch.setenv("DISPLAY", "")
+    return messages, stop_event
+
+
+def test_parse_displays():
+    assert parse_displays(":1, :2,,:3") == [":1", ":2", ":3"]
+    assert parse_displays([":1", ":2"]) == [":1", ":2"]
+    for bad in ("", " , ", ":1,:1"):
+        with pytest.raises(ValueError):
+            parse_displays(bad)
+
+
+def test_shared_plans_round_trip():
+    jobs = prepared_jobs()
+    shared = SharedPlans([job.plan for job in jobs])
+    try:
+        plans = load_shared_plans(shared.name, shared.layout)
+    finally:
+        shared.close()
+    assert [plan.text for plan in plans] == [job.plan.text for job in jobs]
+    assert [plan.ops for plan in plans] == [job.plan.ops for job in jobs]
+
+
+def test_run_display_types_every_job(worker):
+    messages, _ = worker
+    jobs = prepared_jobs()
+    shared = SharedPlans([job.plan for job in jobs])
+    try:
+        results = _run_display(":7", "null", shared.name, shared.layout, job_specs(jobs))
+    finally:
+        shared.close()
+
+    assert [result["status"] for result in results] == [STATUS_DONE, STATUS_DONE]
+    assert all(result["display"] == ":7" for result in results)
+    received = []
+    while not messages.empty():
+        received.append(messages.get_nowait())
+    assert [message[2]["index"] for message in received if message[0] == "result"] == [1, 2]
+
+    # 主进程根据消息汇总进度
+    runner = FanOutRunner([":7"], jobs, "null")
+    for message in received:
+        runner._handle(message)
+    assert runner.format_progress() == ":7 100%"
+
+
+def test_run_display_stops_before_next_job(worker):
+    _, stop_event = worker
+    stop_event.set()
+    jobs = prepared_jobs()
+    shared = SharedPlans([job.plan for job in jobs])
+    try:
+        results = _run_display(":7", "null", shared.name, shared.layout, job_specs(jobs))
+    finally:
+        shared.close()
+    assert [result["status"] for result in results] == [STATUS_SKIPPED, STATUS_SKIPPED]
+
+
+def test_run_display_reports_connection_failure(worker):
+    jobs = prepared_jobs()
+    shared = SharedPlans([job.plan for job in jobs])
+    try:
+        results = _run_display(":7", "no-such-backend", shared.name, shared.layout, job_specs(jobs))
+    finally:
+        shared.close()
+    assert [result["status"] for result in results] == [STATUS_FAILED, STATUS_FAILED]
+    assert results[0]["error"].startswith("无法连接显示 :7")
+
+
+def test_format_fanout_results():
+    results = {":1": [dict(job.result(), status=STATUS_DONE) for job in prepared_jobs()],
+               ":2": [dict(job.result(), status=STATUS_STOPPED) for job in prepared_jobs()]}
+    text = format_fanout_results(results)
+    assert text.index("🖥️ :1") < text.index("🖥️ :2")
+
+
+def test_run_fanout_rejects_invalid_input(capsys):
+    assert not run_fanout(MANIFEST, "")
+    assert not run_fanout(MANIFEST, ":1", backend=object())
+    assert not run_fanout({"jobs": []}, ":1")
+    output = capsys.readouterr().out
+    assert "请至少指定一个显示" in output and "任务清单校验失败" in output
+
+
+def test_run_fanout_on_two_displays(tmp_path):
+    # 真正启动工作进程；null 后端不连接显示
+    summary = tmp_path / "summary.json"
+    assert run_fanout(MANIFEST, ":1,:2", backend="null", summary_path=str(summary))
+    data = json.loads(summary.read_text(encoding="utf-8"))
+    assert sorted(data["displays"]) == [":1", ":2"]
+    assert all(result["status"] == STATUS_DONE for results in data["displays"].values() for result in results)
@@ -0,0 +1,69 @@
+"""性能指标测试"""
+
+import json
+
+import pytest
+
+from auto_typer_backends import NullBackend
+from auto_typer_engine import TypingEngine
+from auto_typer_metrics import BUCKET_COUNT, LatencyHistogram, TypingMetrics
+
+
+def test_histogram_buckets_by_power_of_two_microseconds():
+    histogram = LatencyHistogram()
+    for seconds in (0.0, 0.000001, 0.000003, 0.001, -1):
+        histogram.observe(seconds)
+    assert histogram.count == 5
+    assert histogram.counts[0] == 2  # 0 和 负数
+    assert histogram.counts[1] == 1  # 1us
+    assert histogram.counts[2] == 1  # 3us
+    assert histogram.counts[10] == 1  # 1000us
+    assert histogram.min == 0.0
+    assert histogram.max == 0.001
+
+
+def test_histogram_percentile_and_overflow_bucket():
+    histogram = LatencyHistogram()
+    assert histogram.percentile(50) is None
+    for _ in range(99):
+        histogram.observe(0.00001)
+    histogram.observe(10000.0)
+    assert histogram.percentile(50) == pytest.approx(16e-6)
+    assert histogram.percentile(100) == 10000.0
+    assert histogram.counts[BUCKET_COUNT - 1] == 1
+
+
+def test_engine_records_metrics():
+    engine = TypingEngine(backend=NullBackend())
+    engine.metrics = TypingMetrics()
+    assert engine.type_text("m" * 200, 0)
+    assert engine.metrics.runs == 1
+    assert engine.metrics.chars == 200
+    assert engine.metrics.backend_call.count == 4
+
+
+def test_json_export(tmp_path):
+    metrics = TypingMetrics()
+    metrics.backend_call.observe(0.0002)
+    path = tmp_path / "metrics.json"
+    metrics.dump_json(str(path))
+    data = json.loads(path.read_text(encoding="utf-8"))
+    assert data["backend_call_seconds"]["count"] == 1
+    assert data["backend_call_seconds"]["buckets"] == [{"le": 256e-6, "count": 1}]
+    assert "timestamp" in data
+    assert not (tmp_path / "metrics.json.tmp").exists()
+
+
+def test_prometheus_export_is_cumulative():
+    metrics = TypingMetrics()
+    metrics.runs = 2
+    metrics.pause.observe(0.5)
+    metrics.pause.observe(0.000001)
+    text = metrics.to_prometheus()
+    assert "auto_typer_runs_total 2\n" in text
+    assert '# TYPE auto_typer_pause_seconds histogram' in text
+    assert 'auto_typer_pause_seconds_bucket{le="2e-06"} 1\n' in text
+    assert 'auto_typer_pause_seconds_bucket{le="+Inf"} 2\n' in text
+    assert "auto_typer_pause_seconds_count 2\n" in text
+    metrics.reset()
+    assert metrics.to_dict()["pause_seconds"]["count"] == 0
@@ -0,0 +1,59 @@
+"""粘贴输入与智能混合模式测试"""
+
+import threading
+
+import pytest
+
+from auto_typer_backends import RecordingBackend
+from auto_typer_engine import TypingEngine
+from auto_typer_plan import (
+    MODE_HYBRID, MODE_PASTE, MODE_TYPE, SEGMENT_PASTE, SEGMENT_TYPE, plan_segments,
+)
+
+
+def test_type_mode_is_a_single_typed_segment():
+    assert list(plan_segments("abc", MODE_TYPE, 0.05)) == [(SEGMENT_TYPE, "abc")]
+    assert list(plan_segments("", MODE_TYPE, 0.05)) == []
+
+
+def test_paste_mode_splits_into_segments():
+    segments = list(plan_segments("x" * 10, MODE_PASTE, 0.05, segment_size=4))
+    assert segments == [(SEGMENT_PASTE, "xxxx"), (SEGMENT_PASTE, "xxxx"), (SEGMENT_PASTE, "xx")]
+
+
+def test_hybrid_pastes_long_segments_and_types_the_tail():
+    # 4 × (0.01 + 0.001) 秒 < 0.05 秒的粘贴等待，零头直接打字
+    segments = list(plan_segments("y" * 104, MODE_HYBRID, 0.01, segment_size=50, paste_delay=0.05))
+    assert [kind for kind, _ in segments] == [SEGMENT_PASTE, SEGMENT_PASTE, SEGMENT_TYPE]
+    assert "".join(text for _, text in segments) == "y" * 104
+
+
+def test_unknown_mode_is_rejected():
+    with pytest.raises(ValueError):
+        list(plan_segments("abc", "telepathy", 0.05))
+
+
+def test_paste_mode_output_matches_text():
+    backend = RecordingBackend()
+    engine = TypingEngine(backend=backend, paste_segment_size=5, paste_delay=0)
+    text = "粘贴模式可以输入中文和 emoji 🎉"
+
+    assert engine.type_text(text, 0.05, mode=MODE_PASTE)
+    assert backend.text == text
+    assert {kind for _, kind, _ in backend.events} == {"paste"}
+
+
+def test_paste_mode_stops_between_segments():
+    backend = RecordingBackend()
+    stop_event = threading.Event()
+    engine = TypingEngine(backend=backend, paste_segment_size=5, paste_delay=0)
+
+    assert not engine.type_text("z" * 50, 0, stop_event=stop_event, mode=MODE_PASTE,
+                                on_progress=lambda done, total: stop_event.set())
+    assert backend.text == "z" * 5
+
+
+def test_estimate_counts_pastes_by_paste_delay():
+    engine = TypingEngine(backend=RecordingBackend(), paste_segment_size=100, paste_delay=0.05)
+    assert engine.estimate_duration("a" * 250, 0.1, mode=MODE_PASTE) == pytest.approx(0.15)
+    assert engine.estimate_duration("a" * 250, 0.1, mode=MODE_TYPE) == pytest.approx(25.0)
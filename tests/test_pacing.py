@@ -0,0 +1,163 @@
+"""截止时间调度（使用可控的假时钟）与自适应速度测试"""
+
+import pytest
+
+from auto_typer_backends import NullBackend
+from auto_typer_engine import TypingEngine
+from auto_typer_pacing import AdaptiveRate, DeadlineScheduler
+
+
+class FakeClock:
+    """假时钟：sleep 直接推进时间，每次读取时钟额外推进 tick 秒（模拟自旋）"""
+
+    def __init__(self, tick=0.0):
+        self.now = 100.0
+        self.tick = tick
+        self.sleeps = []
+
+    def clock(self):
+        self.now += self.tick
+        return self.now
+
+    def sleep(self, seconds):
+        self.sleeps.append(seconds)
+        self.now += seconds
+
+
+def make_scheduler(interval, tick=0.0, **kwargs):
+    fake = FakeClock(tick)
+    scheduler = DeadlineScheduler(interval, clock=fake.clock, sleep=fake.sleep, **kwargs)
+    scheduler.start()
+    return scheduler, fake
+
+
+def test_deadlines_do_not_accumulate_backend_latency():
+    scheduler, fake = make_scheduler(0.1)
+    for _ in range(10):
+        scheduler.wait()
+        fake.now += 0.03  # 后端调用耗时
+        scheduler.advance(1)
+    stats = scheduler.finish()
+
+    # 每次只补足截止时间的剩余部分，总用时仍是 10 × 0.1 秒
+    assert stats.elapsed == pytest.approx(1.0)
+    assert stats.achieved_cps == pytest.approx(10.0)
+    assert fake.sleeps == pytest.approx([0.07] * 10)
+
+
+def test_catches_up_without_sleeping_when_behind():
+    scheduler, fake = make_scheduler(0.1)
+    scheduler.advance(1)
+    fake.now += 0.2  # 落后 0.1 秒，但未超过 max_lag
+    scheduler.wait()
+    assert fake.sleeps == []
+    scheduler.advance(1)
+    scheduler.wait()
+    assert fake.sleeps == []
+    assert scheduler.stats.lag_resets == 0
+
+
+def test_gives_up_catching_up_beyond_max_lag():
+    scheduler, fake = make_scheduler(0.1, max_lag=0.25)
+    scheduler.advance(1)
+    fake.now += 1.0
+    scheduler.wait()
+    assert scheduler.stats.lag_resets == 1
+    # 计划后移到只落后 max_lag，之后两个字符仍立即发出，第三个需要等待
+    scheduler.advance(1)
+    scheduler.wait()
+    scheduler.advance(1)
+    scheduler.wait()
+    assert fake.sleeps == []
+    scheduler.advance(1)
+    scheduler.wait()
+    assert fake.sleeps == pytest.approx([0.05])
+
+
+def test_shift_excludes_pause_from_rate():
+    scheduler, fake = make_scheduler(0.1)
+    scheduler.advance(1)
+    fake.now += 2.0
+    scheduler.shift(2.0)
+    scheduler.wait()
+    assert scheduler.stats.lag_resets == 0
+    scheduler.advance(1)
+    stats = scheduler.finish()
+    assert stats.paused == pytest.approx(2.0)
+    assert stats.achieved_cps == pytest.approx(10.0)
+
+
+def test_short_interval_spins_for_the_last_margin():
+    scheduler, fake = make_scheduler(0.005, tick=0.0001, spin_margin=0.002)
+    scheduler.advance(1)
+    scheduler.wait()
+    assert fake.sleeps and fake.sleeps[0] < 0.005 - 0.0019
+    assert fake.now >= scheduler.deadline
+
+
+def test_zero_interval_never_waits():
+    scheduler, fake = make_scheduler(0)
+    scheduler.advance(100)
+    stats = scheduler.finish()
+    assert fake.sleeps == []
+    assert stats.target_cps is None
+    assert "不限速" in stats.format_report()
+
+
+def test_aimd_ramps_up_additively_after_a_window():
+    rate = AdaptiveRate(min_cps=10, max_cps=20, increase=1, window=4)
+    rate.start(12)
+    for _ in range(8):
+        rate.observe(0.001, 1)
+    assert rate.cps == 14
+    assert rate.interval == pytest.approx(1 / 14)
+    for _ in range(100):
+        rate.observe(0.001, 1)
+    assert rate.cps == 20
+    assert rate.highest == 20
+
+
+def test_aimd_backs_off_on_latency_and_holds():
+    rate = AdaptiveRate(min_cps=10, max_cps=100, decrease=0.5, window=4)
+    rate.start(80)
+    rate.observe(0.001, 1)
+    rate.observe(0.05, 1)  # 远高于基线：减速
+    assert rate.cps == 40
+    assert rate.backoffs == 1
+    # 减速后的 window 个批次内不会重复减速
+    for _ in range(3):
+        rate.observe(0.05, 1)
+    assert rate.cps == 40
+    rate.observe(0.05, 1)
+    rate.observe(0.05, 1)
+    assert rate.cps == 20
+    assert rate.lowest == 20
+
+
+def test_aimd_backs_off_on_schedule_lag_and_respects_min():
+    rate = AdaptiveRate(min_cps=10, max_cps=100, decrease=0.1, window=1)
+    rate.start(50)
+    rate.observe(0.001, 1, lag=0.2)
+    assert rate.cps == 10
+    rate.observe(0.001, 1, lag=0.2)
+    rate.observe(0.001, 1, lag=0.2)
+    assert rate.cps == 10
+
+
+def test_aimd_rejects_invalid_range():
+    with pytest.raises(ValueError):
+        AdaptiveRate(min_cps=0)
+    with pytest.raises(ValueError):
+        AdaptiveRate(min_cps=20, max_cps=10)
+
+
+def test_engine_applies_rate_control():
+    backend = NullBackend()
+    engine = TypingEngine(backend=backend)
+    engine.rate_control = AdaptiveRate(min_cps=1000, max_cps=2000)
+    assert engine.type_text("r" * 200, 0.1)
+    stats = engine.last_stats
+    assert backend.chars == 200
+    # 起始速度被限制在 [min_cps, max_cps] 内，因此只用了约 0.1-0.2 秒而不是 20 秒
+    assert stats.rate_range[0] >= 1000
+    assert "自适应" in stats.format_report()
@@ -0,0 +1,193 @@
+"""打字计划测试：可按键字符的划分、计划的序列化（KeyPlan.to_bytes / from_bytes）与磁盘缓存"""
+
+import struct
+
+import pytest
+
+from auto_typer_backends import RecordingBackend
+from auto_typer_engine import TypingEngine
+from auto_typer_plan import (
+    MODE_HYBRID,
+    MODE_PASTE,
+    MODE_TYPE,
+    OP_PASTE,
+    OP_TYPE,
+    OP_WAIT,
+    PLAN_VERSION,
+    RUN_KEYS,
+    RUN_UNICODE,
+    SEGMENT_PASTE,
+    SEGMENT_TYPE,
+    KeyPlan,
+    PlanCache,
+    compile_plan,
+    has_untypeable,
+    plan_segments,
+    split_typeable,
+)
+
+TEXT = "def main():\n    print('你好, world')  # 注释\n\n" * 20 + "tail ✓"
+
+
+def assert_same_plan(restored, plan):
+    assert restored.text == plan.text
+    assert restored.delay == plan.delay
+    assert restored.settings == plan.settings
+    assert restored.keys == plan.keys
+    assert restored.ops == plan.ops
+    assert restored.args == plan.args
+    assert list(restored) == list(plan)
+
+
+def test_split_typeable_merges_short_ascii_gaps():
+    text = "print('你好, 世界') + len(中文)"
+    runs = list(split_typeable(text))
+    assert "".join(run for _, run in runs) == text
+    # ", " 只有两个字符，并入两侧的中文一起粘贴
+    assert runs == [
+        (RUN_KEYS, "print('"),
+        (RUN_UNICODE, "你好, 世界"),
+        (RUN_KEYS, "') + len("),
+        (RUN_UNICODE, "中文"),
+        (RUN_KEYS, ")"),
+    ]
+
+
+def test_has_untypeable():
+    assert not has_untypeable("plain ascii\tline\r\n")
+    assert has_untypeable("emoji 🎉")
+
+
+def test_unicode_capable_backend_types_everything():
+    segments = list(plan_segments("abc中文", MODE_TYPE, 0.01, unicode_ok=True))
+    assert segments == [(SEGMENT_TYPE, "abc中文")]
+
+
+def test_non_unicode_backend_pastes_cjk_runs():
+    segments = list(plan_segments("abc中文def", MODE_TYPE, 0.01, segment_size=1, unicode_ok=False))
+    assert segments == [
+        (SEGMENT_TYPE, "abc"), (SEGMENT_PASTE, "中"), (SEGMENT_PASTE, "文"), (SEGMENT_TYPE, "def"),
+    ]
+
+
+def test_engine_output_matches_text_on_non_unicode_backend():
+    backend = RecordingBackend(supports_unicode=False)
+    engine = TypingEngine(backend=backend, paste_delay=0)
+    text = "标题: Hello 世界\nline two ✓\n"
+
+    assert engine.type_text(text, 0)
+    assert backend.text == text
+    pasted = "".join(payload for _, kind, payload in backend.events if kind == "paste")
+    assert pasted == "标题: Hello 世界✓"
+
+
+@pytest.mark.parametrize("mode", [MODE_TYPE, MODE_PASTE, MODE_HYBRID])
+@pytest.mark.parametrize("unicode_ok", [True, False])
+def test_round_trip(mode, unicode_ok):
+    plan = compile_plan(TEXT, 0.01, mode=mode, paste_segment_size=50, unicode_ok=unicode_ok)
+    assert_same_plan(KeyPlan.from_bytes(plan.to_bytes()), plan)
+
+
+def test_round_trip_with_keys_and_waits():
+    plan = compile_plan(TEXT, 0.0, editor="vscode-python", key_repeat=True)
+    plan.add_hotkey("ctrl", "+")
+    plan.add_key("backspace", 3)
+    plan.add(OP_WAIT, 1500)
+    assert plan.keys
+    assert_same_plan(KeyPlan.from_bytes(plan.to_bytes()), plan)
+
+
+def test_from_memoryview():
+    # 并行输入的工作进程直接从共享内存的视图读取计划
+    plan = compile_plan(TEXT, 0.02, mode=MODE_HYBRID, unicode_ok=False)
+    data = bytearray(plan.to_bytes())
+    assert_same_plan(KeyPlan.from_bytes(memoryview(data)), plan)
+
+
+def test_empty_plan():
+    plan = compile_plan("", 0.05)
+    restored = KeyPlan.from_bytes(plan.to_bytes())
+    assert restored.text == "" and len(restored) == 0
+
+
+@pytest.mark.parametrize("cut", [0, 3, 10, -1])
+def test_truncated_data_is_rejected(cut):
+    data = compile_plan(TEXT, 0.01).to_bytes()
+    with pytest.raises(ValueError):
+        KeyPlan.from_bytes(data[:cut])
+
+
+def test_wrong_magic_or_version_is_rejected():
+    data = bytearray(compile_plan(TEXT, 0.01).to_bytes())
+    bad_magic = b"XXXX" + data[4:]
+    with pytest.raises(ValueError):
+        KeyPlan.from_bytes(bytes(bad_magic))
+    struct.pack_into("<H", data, 4, PLAN_VERSION + 1)
+    with pytest.raises(ValueError):
+        KeyPlan.from_bytes(bytes(data))
+
+
+def test_cache_round_trip(tmp_path):
+    cache = PlanCache(str(tmp_path))
+    plan, hit = cache.load_or_compile(TEXT, 0.01, mode=MODE_HYBRID, unicode_ok=False)
+    assert not hit
+    cached, hit = cache.load_or_compile(TEXT, 0.01, mode=MODE_HYBRID, unicode_ok=False)
+    assert hit
+    assert_same_plan(cached, plan)
+    # 设置不同时不能命中
+    _, hit = cache.load_or_compile(TEXT, 0.02, mode=MODE_HYBRID, unicode_ok=False)
+    assert not hit
+
+
+def test_corrupted_cache_entry_is_a_miss(tmp_path):
+    cache = PlanCache(str(tmp_path))
+    cache.load_or_compile(TEXT, 0.01)
+    for path in tmp_path.iterdir():
+        path.write_bytes(path.read_bytes()[:-5])
+    _, hit = cache.load_or_compile(TEXT, 0.01)
+    assert not hit
+
+
+def test_compiled_ops_cover_the_text():
+    plan = compile_plan("a" * 100 + "中文", 0.001, unicode_ok=False)
+    covered = []
+    for op, a, b in plan:
+        assert op in (OP_TYPE, OP_PASTE)
+        covered.append(plan.text[a:b])
+    assert "".join(covered) == plan.text
+    assert [op for op, _, _ in plan] == [OP_TYPE] * 5 + [OP_PASTE]
+    assert plan.keystrokes() == 101
+
+
+def test_run_plan_replays_cached_plan(tmp_path):
+    backend = RecordingBackend()
+    engine = TypingEngine(backend=backend, paste_delay=0)
+    cache = PlanCache(str(tmp_path))
+    cache.load_or_compile(TEXT, 0, **engine.plan_options())
+    plan, hit = cache.load_or_compile(TEXT, 0, **engine.plan_options())
+
+    assert hit
+    assert engine.run_plan(plan)
+    assert backend.text == TEXT
+
+
+@pytest.mark.parametrize("argv, enabled", [([], False), (["--plan-cache"], True)])
+def test_command_line_plan_cache_option(monkeypatch, argv, enabled):
+    import auto_typer
+
+    typers = []
+    monkeypatch.setattr(auto_typer, "_run_typer", lambda typer, args, delay: typers.append(typer) or True)
+    assert auto_typer.run_from_args(["notes.txt", "--backend", "null"] + argv)
+    assert (typers[0].plan_cache is not None) == enabled
+
+
+def test_cached_plan_is_replayed_by_auto_typer(tmp_path, capsys):
+    from auto_typer import AutoTyper
+
+    backend = RecordingBackend()
+    typer = AutoTyper(backend=backend, plan_cache=PlanCache(str(tmp_path)), checkpoints=False)
+    assert typer.auto_type_text("cached text", 0, countdown=0)
+    assert "使用缓存的打字计划" not in capsys.readouterr().out
+    assert typer.auto_type_text("cached text", 0, countdown=0)
+    assert "使用缓存的打字计划" in capsys.readouterr().out
+    assert backend.text == "cached text" * 2
@@ -0,0 +1,142 @@
+"""文本来源测试"""
+
+import io
+import threading
+
+from auto_typer_backends import RecordingBackend
+from auto_typer_engine import TypingEngine
+from auto_typer_sources import (
+    FileSource, IterableSource, StreamSource, StringSource, count_text, format_size, open_source,
+)
+
+
+def read_all(source):
+    chunks = list(source.chunks())
+    return "".join(text for text, _ in chunks), [position for _, position in chunks]
+
+
+def test_file_source_skips_utf8_bom(tmp_path):
+    path = tmp_path / "bom.txt"
+    path.write_bytes(b"\xef\xbb\xbfhello")
+    with FileSource(str(path)) as source:
+        text, positions = read_all(source)
+        assert text == "hello"
+        assert positions[-1] == source.total == 8
+        assert source.preview() == "hello"
+
+
+def test_file_source_decodes_across_chunk_boundaries(tmp_path):
+    text = "中文字符跨越块边界" * 50
+    path = tmp_path / "cjk.txt"
+    path.write_text(text, encoding="utf-8")
+    # 块大小不是3的倍数，多字节字符一定会被切开
+    with FileSource(str(path), chunk_size=7) as source:
+        decoded, positions = read_all(source)
+    assert decoded == text
+    assert positions == sorted(positions)
+    assert positions[-1] == len(text.encode("utf-8"))
+
+
+def test_empty_file_has_no_chunks(tmp_path):
+    path = tmp_path / "empty.txt"
+    path.write_bytes(b"")
+    with FileSource(str(path)) as source:
+        assert read_all(source) == ("", [])
+
+
+def test_stream_source_binary_and_text():
+    data = "第一行\nsecond line\n"
+    binary, _ = read_all(StreamSource(io.BytesIO(data.encode("utf-8")), chunk_size=4))
+    assert binary == data
+
+    text, positions = read_all(StreamSource(io.StringIO(data), chunk_size=4))
+    assert text == data
+    assert positions[-1] == len(data.encode("utf-8"))
+
+
+def test_iterable_source_skips_empty_pieces():
+    source = IterableSource(iter(["ab", "", "cd"]))
+    assert read_all(source) == ("abcd", [2, 4])
+    assert source.total is None
+
+
+def test_open_source_dispatch(tmp_path):
+    path = tmp_path / "a.txt"
+    path.write_text("x")
+    string = StringSource("x")
+    assert open_source(string) is string
+    assert isinstance(open_source(str(path)), FileSource)
+    assert isinstance(open_source(io.BytesIO(b"x")), StreamSource)
+    assert isinstance(open_source(["x"]), IterableSource)
+
+
+def test_engine_reports_progress_in_source_units(tmp_path):
+    text = "中文abc" * 100
+    path = tmp_path / "progress.txt"
+    path.write_text(text, encoding="utf-8")
+    backend = RecordingBackend()
+    progress = []
+
+    with FileSource(str(path), chunk_size=64) as source:
+        assert TypingEngine(backend=backend).type_source(
+            source, 0, on_progress=lambda done, total: progress.append((done, total)))
+    assert backend.text == text
+    assert progress[-1] == (len(text.encode("utf-8")),) * 2
+    assert [done for done, _ in progress] == sorted(done for done, _ in progress)
+
+
+def test_format_size():
+    assert format_size(512) == "512 B"
+    assert format_size(2048) == "2.0 KB"
+    assert format_size(3 * 1024 * 1024) == "3.0 MB"
+
+
+def test_reopened_file_reads_independently(tmp_path):
+    path = tmp_path / "doc.txt"
+    path.write_text("第一行\n第二行\nthird", encoding="utf-8")
+    with FileSource(str(path), chunk_size=5) as source:
+        with source.reopen() as copy:
+            assert copy is not source
+            assert read_all(copy)[0] == "第一行\n第二行\nthird"
+        # 另一个句柄关闭后，原来的来源仍可读取
+        assert read_all(source)[0] == "第一行\n第二行\nthird"
+
+
+def test_reopen_only_rewindable_sources():
+    string = StringSource("abc")
+    assert string.reopen() is string
+    assert IterableSource(["abc"]).reopen() is None
+    assert StreamSource(io.BytesIO(b"abc")).reopen() is None
+
+
+def test_count_text(tmp_path):
+    assert count_text(StringSource("")) == (0, 0)
+    assert count_text(StringSource("a\nb")) == (3, 2)
+    assert count_text(StringSource("a\nb\n")) == (4, 2)
+
+    path = tmp_path / "big.txt"
+    path.write_text("中文行\n" * 1000, encoding="utf-8")
+    with FileSource(str(path), chunk_size=64) as source:
+        assert count_text(source) == (4000, 1000)
+        stop_event = threading.Event()
+        stop_event.set()
+        assert count_text(source, stop_event) is None
+
+
+def test_file_source_translates_windows_newlines(tmp_path):
+    path = tmp_path / "crlf.txt"
+    path.write_bytes("第一行\r\nline two\r\n\r\nold mac\rend".encode("utf-8"))
+    expected = "第一行\nline two\n\nold mac\nend"
+    # 块大小为1时每个 \r\n 都被切开
+    for chunk_size in (1, 5, 1024):
+        with FileSource(str(path), chunk_size=chunk_size) as source:
+            text, positions = read_all(source)
+            assert text == expected
+            assert positions[-1] == source.total
+            assert count_text(source) == (len(expected), 5)
+    assert read_all(StreamSource(io.BytesIO(b"a\r\nb")))[0] == "a\nb"
+
+    backend = RecordingBackend()
+    with FileSource(str(path), chunk_size=3) as source:
+        assert TypingEngine(backend=backend).type_source(source, 0)
+    assert backend.text == expected
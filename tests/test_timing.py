@@ -0,0 +1,68 @@
+"""拟人打字节奏测试（NumPy 与标准库两种实现）"""
+
+import pytest
+
+import auto_typer_timing
+from auto_typer_backends import RecordingBackend
+from auto_typer_engine import TypingEngine
+from auto_typer_timing import TimingModel
+
+TEXT = "The other thing is, we need more tests. Then it ends!\nNext line"
+
+
+@pytest.fixture(params=["numpy", "python"])
+def implementation(request, monkeypatch):
+    if request.param == "numpy":
+        if auto_typer_timing.np is None:
+            pytest.skip("未安装 NumPy")
+    else:
+        monkeypatch.setattr(auto_typer_timing, "np", None)
+    return request.param
+
+
+def test_seed_makes_schedule_reproducible(implementation):
+    first = TimingModel(delay=0.05, seed=42).schedule(TEXT)
+    second = TimingModel(delay=0.05, seed=42).schedule(TEXT)
+    other = TimingModel(delay=0.05, seed=7).schedule(TEXT)
+    assert list(first) == list(second)
+    assert list(first) != list(other)
+    assert len(first) == len(TEXT) + 1
+    assert first[0] == 0.0
+    assert all(b > a for a, b in zip(first, first[1:]))
+
+
+def test_expected_delays_apply_bigrams_and_pauses(implementation):
+    model = TimingModel(delay=0.1, jitter=0, burst_probability=0, punctuation_pause=0.2,
+                        sentence_pause=0.5, line_pause=0.7)
+    delays = model.delays("th, x.\n", expected=True)
+    assert list(delays) == pytest.approx([0.075, 0.1, 0.3, 0.1, 0.1, 0.6, 0.8])
+
+
+def test_estimate_accounts_for_expected_bursts(implementation):
+    model = TimingModel(delay=0.1, jitter=0, burst_probability=0.5, burst_factor=0.5, bigram_factors={})
+    assert model.estimate("abcd") == pytest.approx(4 * 0.1 * 0.75)
+    assert model.delays("") == model.delays("", expected=True)
+
+
+def test_mean_interval_is_preserved(implementation):
+    model = TimingModel(delay=0.05, jitter=0.35, burst_probability=0, bigram_factors={}, seed=1)
+    delays = model.delays("x" * 20000)
+    assert sum(delays) / len(delays) == pytest.approx(0.05, rel=0.05)
+
+
+def test_invalid_delay():
+    with pytest.raises(ValueError):
+        TimingModel(delay=0)
+
+
+def test_engine_follows_the_schedule():
+    backend = RecordingBackend()
+    engine = TypingEngine(backend=backend)
+    engine.timing = TimingModel(delay=0.02, jitter=0, burst_probability=0, punctuation_pause=0.05,
+                                sentence_pause=0, line_pause=0, bigram_factors={})
+    assert engine.type_text("ab,cd", 0.02)
+    assert backend.text == "ab,cd"
+    # 逗号之后的停顿把 "c" 推后了约 50 毫秒
+    times = {payload: stamp for stamp, kind, payload in backend.events}
+    assert times["c"] - times[","] >= 0.06
+    assert engine.estimate_duration("ab,cd", 0.02) == pytest.approx(5 * 0.02 + 0.05)
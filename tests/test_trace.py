@@ -0,0 +1,136 @@
+"""按键轨迹的记录、读取、重放与汇总（auto_typer_trace）"""
+
+import struct
+import time
+
+import pytest
+
+from auto_typer_backends import RecordingBackend
+from auto_typer_engine import TypingEngine
+from auto_typer_trace import (
+    KIND_HOTKEY,
+    KIND_PRESS,
+    KIND_WRITE,
+    TRACE_VERSION,
+    TraceReader,
+    TraceWriter,
+    replay,
+    summarize,
+)
+
+TEXT = "hello world\n" * 10 + "中文 ✓ end"
+
+
+def record_run(path, text=TEXT, delay=0.0):
+    """用 recording 后端打一次字并记录轨迹，返回后端记录的事件"""
+    engine = TypingEngine(RecordingBackend())
+    engine.trace = TraceWriter(str(path))
+    try:
+        assert engine.type_text(text, delay)
+    finally:
+        engine.trace.close()
+    return engine.backend.events
+
+
+def calls(events):
+    return [(kind, payload) for _, kind, payload in events]
+
+
+def test_engine_run_round_trip(tmp_path):
+    path = tmp_path / "run.trace"
+    events = record_run(path)
+    with TraceReader(str(path)) as reader:
+        assert not reader.truncated
+        runs = reader.runs()
+        assert len(runs) == 1 and runs[0]["backend"] == "recording"
+        traced = list(reader.events())
+        assert "".join(event.payload for event in traced if event.kind == KIND_WRITE) == TEXT
+        assert all(event.run == 0 for event in traced)
+        elapsed = [event.elapsed for event in traced]
+        assert elapsed == sorted(elapsed)
+
+        target = RecordingBackend()
+        assert replay(reader, target, speed=0)
+    assert calls(target.events) == calls(events)
+
+
+def test_keys_and_hotkeys_round_trip(tmp_path):
+    path = tmp_path / "keys.trace"
+    writer = TraceWriter(str(path))
+    backend = writer.wrap(RecordingBackend(), 0.01)
+    backend.write("ab")
+    backend.press("backspace", presses=3)
+    backend.hotkey("ctrl", "+")
+    backend.paste("粘贴")
+    writer.close()
+
+    with TraceReader(str(path)) as reader:
+        kinds = [(event.kind, event.count) for event in reader.events()]
+        assert kinds[1:3] == [(KIND_PRESS, 3), (KIND_HOTKEY, 1)]
+        target = RecordingBackend()
+        replay(reader, target, speed=0)
+    assert calls(target.events) == [
+        ("write", "ab"), ("press", "backspace"), ("press", "backspace"), ("press", "backspace"),
+        ("hotkey", ("ctrl", "+")), ("paste", "粘贴"),
+    ]
+
+
+def test_runs_are_appended(tmp_path):
+    path = tmp_path / "runs.trace"
+    record_run(path, "first")
+    record_run(path, "second")
+    with TraceReader(str(path)) as reader:
+        assert len(reader.runs()) == 2
+        for run, text in enumerate(("first", "second")):
+            target = RecordingBackend()
+            replay(reader, target, speed=0, run=run)
+            assert target.text == text
+        summaries = summarize(reader)
+    assert [summary.chars for summary in summaries] == [5, 6]
+
+
+def test_replay_keeps_original_timing(tmp_path):
+    path = tmp_path / "timed.trace"
+    record_run(path, "x" * 20, delay=0.01)
+    with TraceReader(str(path)) as reader:
+        duration = summarize(reader)[0].duration
+        started = time.perf_counter()
+        replay(reader, RecordingBackend(), speed=2)
+        elapsed = time.perf_counter() - started
+    assert duration > 0.15
+    assert duration / 2 - 0.02 <= elapsed <= duration / 2 + 0.05
+
+
+def test_summary(tmp_path):
+    path = tmp_path / "summary.trace"
+    record_run(path, "abc" * 30, delay=0.001)
+    with TraceReader(str(path)) as reader:
+        summary, = summarize(reader, slowest=2)
+    assert summary.chars == 90 and summary.keystrokes == 90
+    assert summary.calls == len(summary.gaps) + 1
+    assert len(summary.slowest) == 2 and summary.slowest[0][0] >= summary.slowest[1][0]
+    assert summary.gap_percentile(50) <= summary.gap_percentile(99)
+    assert "运行 1" in summary.format_report()
+
+
+def test_truncated_tail_is_ignored(tmp_path):
+    path = tmp_path / "cut.trace"
+    record_run(path)
+    with TraceReader(str(path)) as reader:
+        count = len(reader)
+    path.write_bytes(path.read_bytes()[:-3])
+    with TraceReader(str(path)) as reader:
+        assert reader.truncated
+        assert len(reader) == count - 1
+
+
+def test_foreign_files_are_rejected(tmp_path):
+    path = tmp_path / "bad.trace"
+    path.write_bytes(b"not a trace file")
+    with pytest.raises(ValueError):
+        TraceReader(str(path))
+    with pytest.raises(ValueError):
+        TraceWriter(str(path))
+    path.write_bytes(struct.pack("<4sH", b"ATTR", TRACE_VERSION + 1))
+    with pytest.raises(ValueError):
+        TraceReader(str(path))
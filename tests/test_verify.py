@@ -0,0 +1,204 @@
+"""回读校验与定点修复测试（模拟的目标文本框）"""
+
+import pytest
+
+import auto_typer_clipboard
+from auto_typer_backends import KeyBackend
+from auto_typer_clipboard import COPY_HOTKEY, SELECT_ALL_HOTKEY
+from auto_typer_engine import TypingEngine
+from auto_typer_verify import ReadBackVerifier, VerificationLog, count_mismatched, read_back
+
+TEXT = "".join(f"line {index}: the quick brown fox\n" for index in range(30))
+
+
+class TextBoxBackend(KeyBackend):
+    """模拟的目标文本框：可以丢掉第 drop 个输入的字符，支持全选复制和编辑按键"""
+
+    name = "textbox"
+    supports_unicode = True
+    pastes_via_clipboard = False
+
+    def __init__(self, clipboard=None, drop=(), copies=True):
+        self.chars = []
+        self.cursor = 0
+        self.clipboard = clipboard
+        self.drop = set(drop)
+        self.copies = copies
+        self.typed = 0
+        self.selected = False
+
+    @property
+    def text(self):
+        return "".join(self.chars)
+
+    def write(self, text):
+        for char in text:
+            self.typed += 1
+            if self.typed in self.drop:
+                continue
+            self.chars.insert(self.cursor, char)
+            self.cursor += 1
+
+    def paste(self, text):
+        self.chars[self.cursor:self.cursor] = text
+        self.cursor += len(text)
+
+    def press(self, key, presses=1):
+        for _ in range(presses):
+            text = self.text
+            if key == "right":
+                self.cursor = len(self.chars) if self.selected else min(len(self.chars), self.cursor + 1)
+                self.selected = False
+            elif key == "left":
+                self.cursor -= 1
+            elif key == "delete":
+                del self.chars[self.cursor]
+            elif key == "backspace":
+                self.cursor -= 1
+                del self.chars[self.cursor]
+            elif key == "home":
+                self.cursor = text.rfind("\n", 0, self.cursor) + 1
+            elif key == "end":
+                end = text.find("\n", self.cursor)
+                self.cursor = len(text) if end < 0 else end
+            elif key in ("up", "down"):
+                # 保持列号移动到上一行 / 下一行
+                start = text.rfind("\n", 0, self.cursor) + 1
+                column = self.cursor - start
+                if key == "up":
+                    target = text.rfind("\n", 0, start - 1) + 1
+                else:
+                    target = text.find("\n", self.cursor) + 1
+                end = text.find("\n", target)
+                end = len(text) if end < 0 else end
+                self.cursor = min(target + column, end)
+            else:
+                raise AssertionError(key)
+
+    def hotkey(self, *keys):
+        if keys == SELECT_ALL_HOTKEY:
+            self.selected = True
+        elif keys == COPY_HOTKEY:
+            if self.copies and self.selected and self.clipboard is not None:
+                self.clipboard.copy(self.text)
+        else:
+            raise AssertionError(keys)
+
+
+class FakeClipboard:
+    class PyperclipException(Exception):
+        pass
+
+    def __init__(self, content="user clipboard"):
+        self.content = content
+
+    def copy(self, text):
+        self.content = text
+
+    def paste(self):
+        return self.content
+
+
+@pytest.fixture
+def clipboard(monkeypatch):
+    fake = FakeClipboard()
+    monkeypatch.setattr(auto_typer_clipboard, "_pyperclip", lambda: fake)
+    return fake
+
+
+def test_read_back_returns_target_text_and_restores_clipboard(clipboard):
+    backend = TextBoxBackend(clipboard)
+    backend.write("typed text")
+    assert read_back(backend, settle=0) == "typed text"
+    assert clipboard.content == "user clipboard"
+    # 最后按右方向键取消选择，光标停在末尾
+    assert backend.cursor == len("typed text") and not backend.selected
+
+
+def test_read_back_detects_target_that_does_not_copy(clipboard):
+    backend = TextBoxBackend(clipboard, copies=False)
+    backend.write("typed text")
+    assert read_back(backend, settle=0) is None
+    assert clipboard.content == "user clipboard"
+
+
+class TruncatingClipboard(FakeClipboard):
+    """像 Windows 剪贴板一样在第一个 NUL 处截断文本"""
+
+    def copy(self, text):
+        self.content = text.split("\x00", 1)[0]
+
+
+def test_read_back_treats_empty_clipboard_as_unreadable(monkeypatch):
+    clipboard = TruncatingClipboard()
+    monkeypatch.setattr(auto_typer_clipboard, "_pyperclip", lambda: clipboard)
+    markers = []
+    original_copy = clipboard.copy
+
+    def copy(text):
+        markers.append(text)
+        original_copy(text)
+
+    clipboard.copy = copy
+    backend = TextBoxBackend(clipboard, copies=False)
+    backend.write("typed text")
+    assert read_back(backend, settle=0) is None
+    assert read_back(backend, settle=0) is None
+    # 标记是可打印的，且每次回读都不同
+    assert markers[0] != markers[2] and markers[0].isprintable()
+    assert clipboard.content == "user clipboard"
+
+    # 空的目标读回空串，同样按读取失败处理
+    assert read_back(TextBoxBackend(clipboard), settle=0) is None
+
+
+def test_empty_read_back_does_not_retype_the_document(clipboard):
+    backend = TextBoxBackend(clipboard)
+    engine = TypingEngine(backend=backend)
+    engine.type_text("abc", 0)
+    clipboard.copy = lambda text: setattr(clipboard, "content", "")
+    report = ReadBackVerifier(settle=0).verify(engine, "abc", 0)
+    assert not report.readable
+    assert backend.text == "abc"
+
+
+def test_verify_repairs_dropped_characters(clipboard, tmp_path):
+    backend = TextBoxBackend(clipboard, drop=(7, 300, 301, 650))
+    engine = TypingEngine(backend=backend)
+    log = VerificationLog(str(tmp_path / "verification.json"))
+    verifier = ReadBackVerifier(repair_delay=0, settle=0, log=log)
+
+    assert engine.type_text(TEXT, 0)
+    assert backend.text != TEXT
+    report = verifier.verify(engine, TEXT, 0)
+
+    assert backend.text == TEXT
+    assert report.clean
+    assert report.rounds == [(3, 4), (0, 0)]
+    assert "第 1 轮修复后: 全部正确" in report.format_report()
+    # 只补打了出错的字符，没有整篇重打
+    assert backend.typed < len(TEXT) + 20
+    assert log.rows() == [("textbox", "不限速", 1, len(TEXT), 4)]
+
+
+def test_verify_without_repair_only_reports(clipboard):
+    backend = TextBoxBackend(clipboard, drop=(5,))
+    engine = TypingEngine(backend=backend)
+    engine.type_text(TEXT, 0)
+    report = ReadBackVerifier(rounds=0, settle=0).verify(engine, TEXT, 0)
+    assert not report.clean
+    assert report.mismatched == 1
+    assert backend.text != TEXT
+
+
+def test_unreadable_target(clipboard):
+    backend = TextBoxBackend(clipboard, copies=False)
+    engine = TypingEngine(backend=backend)
+    engine.type_text("abc", 0)
+    report = ReadBackVerifier(settle=0).verify(engine, "abc", 0)
+    assert not report.readable and not report.clean
+    assert "无法读回" in report.format_report()
+
+
+def test_count_mismatched():
+    assert count_mismatched([(0, 2, 0, 0), (5, 5, 3, 6), (8, 9, 9, 10)]) == 6